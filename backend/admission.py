@@ -0,0 +1,178 @@
+"""
+Admission control for the approval workflow.
+
+Each run holds a thread for up to a minute, places a phone call and calls four
+paid APIs, so at most `max_concurrent` run at once per server process. Runs
+past the cap wait in a bounded queue for up to `max_wait` seconds; when the
+queue (or the client's share of it) is full, or the wait runs out, the request
+is rejected with a Retry-After estimate instead of piling up.
+
+Waiting runs are queued per client (FIFO within a client) and a freed slot
+goes to the next client in round-robin order, so one client sending a burst
+cannot push everyone else to the back.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque
+
+import metrics
+from config import env_float, env_int
+
+admission_wait = metrics.histogram(
+    "admission_wait_seconds", "Time finance requests waited for a workflow slot", ["outcome"]
+)
+admission_rejections = metrics.counter(
+    "admission_rejections_total", "Finance requests turned away by admission control", ["reason"]
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get a workflow slot; retry_after is in seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"server busy ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("client_id", "granted", "event")
+
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.granted = False
+        self.event = threading.Event()
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, max_wait: float = 30,
+                 max_queued_per_client: int = 4, name: str = "workflow"):
+        """max_concurrent <= 0 admits everything"""
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_queued_per_client = max(1, max_queued_per_client)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._queues: "OrderedDict[str, Deque[_Ticket]]" = OrderedDict()
+        self._avg_run_seconds = 20.0  # moving average of slot hold time, seeds Retry-After
+        metrics.gauge_callback(
+            "admission_state", "Workflow runs holding a slot and waiting for one", ["controller", "state"],
+            lambda: [((name, "active"), self.active()), ((name, "queued"), self.queued())],
+        )
+
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    def queued(self) -> int:
+        with self._lock:
+            return self._queued
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: queued runs ahead, spread over the slots"""
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> int:
+        rounds = (self._queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(self._avg_run_seconds * rounds))
+
+    def _reject_reason_locked(self, client_id: str):
+        if self._queued >= self.max_queue:
+            return "queue_full"
+        if len(self._queues.get(client_id, ())) >= self.max_queued_per_client:
+            return "client_limit"
+        return None
+
+    def check(self, client_id: str):
+        """Fail fast, without queueing, when a request from client_id would be turned away right now"""
+        if self.max_concurrent <= 0:
+            return
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queued:
+                return
+            reason = self._reject_reason_locked(client_id)
+            retry_after = self._retry_after_locked()
+        if reason:
+            admission_rejections.inc(reason)
+            raise AdmissionRejected(reason, retry_after)
+
+    def acquire(self, client_id: str):
+        """Take a workflow slot, waiting in client_id's queue; raises AdmissionRejected"""
+        if self.max_concurrent <= 0:
+            return
+        start = time.perf_counter()
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                admission_wait.observe(0.0, "admitted")
+                return
+            reason = self._reject_reason_locked(client_id)
+            if reason:
+                retry_after = self._retry_after_locked()
+            else:
+                ticket = _Ticket(client_id)
+                self._queues.setdefault(client_id, deque()).append(ticket)
+                self._queued += 1
+        if reason:
+            admission_rejections.inc(reason)
+            raise AdmissionRejected(reason, retry_after)
+
+        ticket.event.wait(self.max_wait)
+        with self._lock:
+            if not ticket.granted:
+                # Timed out: leave the queue (a grant can't race us, it needs this lock)
+                queue = self._queues.get(client_id)
+                queue.remove(ticket)
+                if not queue:
+                    del self._queues[client_id]
+                self._queued -= 1
+                retry_after = self._retry_after_locked()
+        if not ticket.granted:
+            admission_wait.observe(time.perf_counter() - start, "timed_out")
+            admission_rejections.inc("timeout")
+            raise AdmissionRejected("timeout", retry_after)
+        admission_wait.observe(time.perf_counter() - start, "admitted")
+
+    def release(self, held_seconds: float = 0.0):
+        """Free a slot, handing it straight to the next client in round-robin order"""
+        if self.max_concurrent <= 0:
+            return
+        with self._lock:
+            if held_seconds > 0:
+                self._avg_run_seconds = 0.8 * self._avg_run_seconds + 0.2 * held_seconds
+            if not self._queues:
+                self._active -= 1
+                return
+            client_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            del self._queues[client_id]
+            if queue:
+                # Back of the line for this client's next request
+                self._queues[client_id] = queue
+            self._queued -= 1
+            ticket.granted = True
+            ticket.event.set()
+
+    @contextmanager
+    def admit(self, client_id: str):
+        """Hold a workflow slot for the duration of the block"""
+        self.acquire(client_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+
+workflow_admission = AdmissionController(
+    max_concurrent=env_int("WORKFLOW_MAX_CONCURRENT", 4),
+    max_queue=env_int("WORKFLOW_MAX_QUEUE", 16),
+    max_wait=env_float("WORKFLOW_MAX_WAIT", 30),
+    max_queued_per_client=env_int("WORKFLOW_MAX_QUEUED_PER_CLIENT", 4),
+)
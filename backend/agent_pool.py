@@ -0,0 +1,70 @@
+"""
+Pool of pre-built agents.
+
+Building an `Agent` with a fresh `Claude` model per request also means a fresh
+Anthropic HTTP client and connection. The pool builds agents once, warms their
+model clients, and lends them out one request at a time.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+
+class AgentPool:
+    def __init__(self, factory: Callable[[], object], size: int = 4):
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._built = 0
+
+    def _build(self):
+        agent = self.factory()
+        # Create the model's API client now rather than on the first request
+        get_client = getattr(getattr(agent, "model", None), "get_client", None)
+        if callable(get_client):
+            try:
+                get_client()
+            except Exception as e:
+                print(f"Agent client warm-up failed: {e}")
+        return agent
+
+    def warm(self, count: int = None):
+        """Build agents up to count (default: the pool size) ahead of traffic"""
+        target = self.size if count is None else min(count, self.size)
+        while True:
+            with self._lock:
+                if self._built >= target:
+                    return
+                self._built += 1
+            self._idle.put(self._build())
+
+    @contextmanager
+    def acquire(self, timeout: float = 30):
+        """Borrow an agent; builds one if the pool isn't full yet, otherwise waits for a free one"""
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_build = self._built < self.size
+                if can_build:
+                    self._built += 1
+            if not can_build:
+                agent = self._idle.get(timeout=timeout)
+            else:
+                try:
+                    agent = self._build()
+                except Exception:
+                    with self._lock:
+                        self._built -= 1
+                    raise
+        try:
+            yield agent
+        finally:
+            self._idle.put(agent)
+
+    def stats(self):
+        with self._lock:
+            built = self._built
+        return {"size": self.size, "built": built, "idle": self._idle.qsize()}
@@ -0,0 +1,131 @@
+"""
+Coalesce approval calls to the same manager.
+
+A request for a manager nobody is calling is dialled at once. Requests that
+arrive while a call to that manager is in flight wait (up to `window` seconds,
+`max_items` at a time) and then share the next call: it plays every
+recommendation in turn and gathers one digit per item, and each waiting
+request gets its own digit back. With window <= 0 every request places its
+own call, as before.
+"""
+import threading
+from typing import Callable, Dict, List
+
+import metrics
+
+batch_size = metrics.histogram(
+    "approval_batch_size", "Recommendations covered by each approval call", [], buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+approval_items = metrics.counter("approval_items_total", "Recommendations sent for approval", [])
+approval_calls = metrics.counter("approval_calls_total", "Approval phone calls placed", [])
+
+
+class _Item:
+    __slots__ = ("message", "done", "result")
+
+    def __init__(self, message: str):
+        self.message = message
+        self.done = threading.Event()
+        self.result = ""
+
+
+class _Batch:
+    __slots__ = ("items", "ready")
+
+    def __init__(self):
+        self.items: List[_Item] = []
+        self.ready = threading.Event()  # set when full or the manager's line is free
+
+
+def split_digits(result: str, count: int) -> List[str]:
+    """One result per item: the item's digit, or the call-wide outcome (timeout/error) when there is none"""
+    if count == 1:
+        return [result]
+    if result == "timeout" or result.startswith("error"):
+        return [result] * count
+    return [result[i] if i < len(result) else "timeout" for i in range(count)]
+
+
+class ApprovalBatcher:
+    def __init__(self, place_call: Callable[[str, List[str]], str], window: float = 0.0, max_items: int = 5):
+        """place_call(to_number, messages) returns the digits pressed, or "timeout"/"error: ..." """
+        self.place_call = place_call
+        self.window = window
+        self.max_items = max(1, max_items)
+        self._lock = threading.Lock()
+        self._open: Dict[str, _Batch] = {}
+        self._in_flight: Dict[str, int] = {}  # calls currently placed per number
+        self._waiting = 0
+        metrics.gauge_callback(
+            "approval_queue_depth", "Approval requests waiting for a batch call or its answer", [],
+            lambda: [((), self.waiting())],
+        )
+        metrics.gauge_callback(
+            "approval_batching_efficiency", "Recommendations per approval call placed", [],
+            lambda: [((), self.efficiency())],
+        )
+
+    def submit(self, to_number: str, message: str) -> str:
+        """Queue message for approval by to_number and block until its digit (or timeout/error) is known"""
+        item = _Item(message)
+        with self._lock:
+            self._waiting += 1
+            batch = self._open.get(to_number) if self.window > 0 else None
+            leader = batch is None
+            # Only hold while the manager is already on a call; otherwise dial now
+            held = leader and self.window > 0 and bool(self._in_flight.get(to_number))
+            if leader:
+                batch = _Batch()
+                if held:
+                    self._open[to_number] = batch
+                else:
+                    self._in_flight[to_number] = self._in_flight.get(to_number, 0) + 1
+            batch.items.append(item)
+            if len(batch.items) >= self.max_items and self._open.get(to_number) is batch:
+                del self._open[to_number]
+                batch.ready.set()
+
+        if leader:
+            # The first request of a batch waits for the line, then places the call for everyone
+            if held:
+                batch.ready.wait(self.window)
+                with self._lock:
+                    if self._open.get(to_number) is batch:
+                        del self._open[to_number]
+                    self._in_flight[to_number] = self._in_flight.get(to_number, 0) + 1
+            self._dispatch(to_number, batch)
+
+        item.done.wait()
+        return item.result
+
+    def _dispatch(self, to_number: str, batch: _Batch):
+        """Place the call for a batch; the caller has counted it in _in_flight"""
+        items = batch.items
+        approval_calls.inc()
+        approval_items.inc(amount=len(items))
+        batch_size.observe(len(items))
+        try:
+            result = self.place_call(to_number, [item.message for item in items])
+            results = split_digits(result or "", len(items))
+        except Exception as e:
+            results = [f"error: {e}"] * len(items)
+        for item, result in zip(items, results):
+            item.result = result
+            item.done.set()
+        with self._lock:
+            self._waiting -= len(items)
+            self._in_flight[to_number] -= 1
+            if not self._in_flight[to_number]:
+                del self._in_flight[to_number]
+                # The line is free: call the requests that queued up behind this call
+                waiting = self._open.pop(to_number, None)
+                if waiting is not None:
+                    waiting.ready.set()
+
+    def waiting(self) -> int:
+        with self._lock:
+            return self._waiting
+
+    def efficiency(self) -> float:
+        calls = approval_calls.value()
+        return round(approval_items.value() / calls, 3) if calls else 0.0
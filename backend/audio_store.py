@@ -0,0 +1,314 @@
+"""
+Content-addressed store for synthesised TTS audio.
+
+Clips are named by a hash of (normalised text, voice_id, model_id,
+output_format), so repeating a summary returns the existing file instead of
+paying ElevenLabs again. The directory is kept under a byte budget by evicting
+the least recently used clips, and files are written atomically so a reader
+never sees a half-written MP3.
+
+Recently generated clips are also kept in memory (a bounded LRU hot set), so
+the fetch Twilio makes at call start is answered without touching the disk.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+import metrics
+from cache import SingleFlight
+from config import env_int
+
+_SPACE_RE = re.compile(r"\s+")
+_FILENAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}\.[A-Za-z0-9]{1,8}$")
+
+
+class LiveAudio:
+    """Growable in-memory buffer for a clip that is still being synthesised"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self.done = False
+        self.error: Optional[BaseException] = None
+
+    def append(self, chunk: bytes):
+        with self._cond:
+            self._buffer.extend(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def wait_for_data(self, timeout: float) -> bool:
+        """Block until some audio (or the end) is available; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._buffer or self.done, timeout)
+
+    def snapshot(self) -> bytes:
+        with self._cond:
+            return bytes(self._buffer)
+
+    def iter_bytes(self, chunk_timeout: float = 30):
+        """Yield the clip from the start, following the tail until synthesis ends"""
+        offset = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._buffer) > offset or self.done, chunk_timeout)
+                data = bytes(self._buffer[offset:])
+                finished = self.done
+            if not data:
+                # Either synthesis ended or it stalled past chunk_timeout
+                return
+            offset += len(data)
+            yield data
+
+
+def normalise_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share a clip"""
+    return _SPACE_RE.sub(" ", text or "").strip()
+
+
+class AudioStore:
+    def __init__(self, directory: str, max_bytes: int, hot_max_bytes: int = 0, hot_max_clip_bytes: int = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_max_bytes = hot_max_bytes
+        self.hot_max_clip_bytes = hot_max_clip_bytes
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()  # filename -> clip bytes, oldest first
+        self._hot_bytes = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # filename -> size, oldest first
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "hot_hits": 0}
+        self._live: Dict[str, LiveAudio] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def key_for(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+        digest = hashlib.sha256(
+            "\x1f".join([normalise_text(text), voice_id, model_id, output_format]).encode("utf-8")
+        ).hexdigest()
+        return digest[:32]
+
+    @staticmethod
+    def filename_for(key: str, output_format: str) -> str:
+        return f"{key}.{output_format.split('_', 1)[0]}"
+
+    @staticmethod
+    def valid_name(filename: str) -> bool:
+        """Whether filename is a plain clip name (no separators, dots-only or hidden names); no disk access"""
+        return bool(filename) and _FILENAME_RE.match(filename) is not None
+
+    @staticmethod
+    def etag_for(filename: str) -> str:
+        """Clips are content-addressed, so the name itself identifies the bytes"""
+        return filename.rsplit(".", 1)[0]
+
+    def path_for(self, filename: str) -> Optional[str]:
+        """Absolute path for a stored clip, or None if the name is not a plain file name"""
+        if not self.valid_name(filename):
+            return None
+        return os.path.join(self.directory, filename)
+
+    def read_hot(self, filename: str) -> Optional[bytes]:
+        """Clip bytes from the in-memory hot set, or None when only on disk"""
+        with self._lock:
+            data = self._hot.get(filename)
+            if data is None:
+                return None
+            self._hot.move_to_end(filename)
+            if filename in self._index:
+                self._index.move_to_end(filename)
+            self._stats["hot_hits"] += 1
+        return data
+
+    def _keep_hot(self, filename: str, data: bytes):
+        if not self.hot_max_bytes or len(data) > self.hot_max_clip_bytes:
+            return
+        with self._lock:
+            self._hot_bytes += len(data) - len(self._hot.pop(filename, b""))
+            self._hot[filename] = data
+            while self._hot_bytes > self.hot_max_bytes and self._hot:
+                _, evicted = self._hot.popitem(last=False)
+                self._hot_bytes -= len(evicted)
+
+    def get(self, filename: str) -> Optional[str]:
+        """Path of a stored clip (marking it recently used), or None"""
+        path = self.path_for(filename)
+        if path is None:
+            return None
+        with self._lock:
+            indexed = filename in self._index
+            if indexed:
+                self._index.move_to_end(filename)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path) if not indexed else 0
+        except FileNotFoundError:
+            with self._lock:
+                self._bytes -= self._index.pop(filename, 0)
+            return None
+        if not indexed:
+            # Written by another worker process sharing the directory: adopt it
+            with self._lock:
+                if filename not in self._index:
+                    self._index[filename] = size
+                    self._bytes += size
+            self._evict()
+        return path
+
+    def put(self, filename: str, chunks: Iterable[bytes]) -> str:
+        """Write chunks to filename atomically and enforce the byte budget"""
+        path = self.path_for(filename)
+        if path is None:
+            raise ValueError(f"Invalid audio file name: {filename}")
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp_", suffix=".part")
+        parts = []
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    # Keep the chunks for the hot set unless the clip is too big for it
+                    if parts is not None:
+                        parts.append(chunk)
+                        if size > self.hot_max_clip_bytes:
+                            parts = None
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._bytes += size - self._index.pop(filename, 0)
+            self._index[filename] = size
+        metrics.tts_audio_bytes.observe(size)
+        if parts:
+            self._keep_hot(filename, parts[0] if len(parts) == 1 else b"".join(parts))
+        self._evict()
+        return path
+
+    def get_or_create(self, filename: str, produce: Callable[[], Iterable[bytes]]) -> str:
+        """Return the stored clip, producing it once even under concurrent requests"""
+        path = self.get(filename)
+        if path is not None:
+            self._count("hits")
+            return path
+
+        def create():
+            existing = self.get(filename)
+            return existing if existing is not None else self.put(filename, produce())
+
+        path, shared = self._flight.do(filename, create)
+        self._count("hits" if shared else "misses")
+        return path
+
+    def live(self, filename: str) -> Optional[LiveAudio]:
+        """The in-progress buffer for filename, if it is still being synthesised"""
+        with self._lock:
+            return self._live.get(filename)
+
+    def stream(self, filename: str, produce: Callable[[], Iterable[bytes]], first_chunk_timeout: float = 30) -> str:
+        """
+        Start producing a clip in the background and return its path right away.
+
+        Until synthesis finishes, the clip can be read from `live(filename)`; the
+        completed bytes are then persisted to the store.
+        """
+        path = self.get(filename)
+        if path is not None:
+            self._count("hits")
+            return path
+
+        with self._lock:
+            live = self._live.get(filename)
+            started = live is None
+            if started:
+                live = self._live[filename] = LiveAudio()
+        self._count("misses" if started else "hits")
+
+        if started:
+            def pump():
+                try:
+                    for chunk in produce():
+                        live.append(chunk)
+                    self.put(filename, [live.snapshot()])
+                    live.finish()
+                except BaseException as e:
+                    live.finish(e)
+                    print(f"Streaming synthesis failed for {filename}: {e}")
+                finally:
+                    with self._lock:
+                        self._live.pop(filename, None)
+
+            threading.Thread(target=pump, daemon=True, name=f"tts-{filename}").start()
+
+        # Fail fast on vendor errors instead of handing out a path that never fills
+        live.wait_for_data(first_chunk_timeout)
+        if live.error is not None:
+            raise live.error
+        return self.path_for(filename)
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._bytes <= self.max_bytes or len(self._index) <= 1:
+                    return
+                filename, size = self._index.popitem(last=False)
+                self._bytes -= size
+                self._hot_bytes -= len(self._hot.pop(filename, b""))
+                self._stats["evictions"] += 1
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["files"] = len(self._index)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+            stats["hot_files"] = len(self._hot)
+            stats["hot_bytes"] = self._hot_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+audio_store = AudioStore(
+    directory=os.getenv("AUDIO_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_generations")),
+    max_bytes=env_int("AUDIO_STORE_MAX_BYTES", 200 * 1024 * 1024),
+    hot_max_bytes=env_int("AUDIO_HOT_MAX_BYTES", 32 * 1024 * 1024),
+    hot_max_clip_bytes=env_int("AUDIO_HOT_MAX_CLIP_BYTES", 2 * 1024 * 1024),
+)
@@ -0,0 +1,76 @@
+"""
+Wake-up latency between the /gather webhook and `call_and_collect` returning.
+
+A fake Twilio client stands in for the real one: placing a call starts a
+thread that "presses" a key by POSTing /gather through the Flask test client.
+We measure how long after that POST the waiting call_and_collect returns.
+
+Usage (from backend/):
+    python -m benchmarks.bench_call_wakeup [--calls 20] [--press-after 0.2]
+"""
+import argparse
+import statistics
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import server
+
+
+class FakeCalls:
+    def __init__(self, press_after: float, digit: str = "1"):
+        self.press_after = press_after
+        self.digit = digit
+        self.pressed_at = {}
+
+    def create(self, to, from_, url):
+        request_id = parse_qs(urlsplit(url).query)["request_id"][0]
+
+        def press():
+            time.sleep(self.press_after)
+            self.pressed_at[request_id] = time.perf_counter()
+            with server.app.test_client() as http:
+                http.post(f"/gather?request_id={request_id}", data={"Digits": self.digit})
+
+        threading.Thread(target=press, daemon=True).start()
+        return type("FakeCall", (), {"sid": f"CA{request_id.replace('-', '')}"})()
+
+
+class FakeTwilioClient:
+    def __init__(self, press_after: float):
+        self.calls = FakeCalls(press_after)
+
+
+def run_call(fake: FakeTwilioClient, latencies: list):
+    digit = server.call_and_collect("+15550000000", "Benchmark message", timeout_sec=10)
+    returned_at = time.perf_counter()
+    if digit != fake.calls.digit:
+        print(f"unexpected result: {digit}")
+        return
+    # The newest press that happened before we returned belongs to this call
+    pressed = max(t for t in fake.calls.pressed_at.values() if t <= returned_at)
+    latencies.append(returned_at - pressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--press-after", type=float, default=0.2)
+    args = parser.parse_args()
+
+    fake = FakeTwilioClient(args.press_after)
+    server.client = fake
+
+    latencies = []
+    for _ in range(args.calls):
+        run_call(fake, latencies)
+
+    if latencies:
+        latencies_ms = sorted(x * 1000 for x in latencies)
+        print(f"mode={server.call_waiters.CALL_WAIT_MODE} calls={len(latencies_ms)}")
+        print(f"wake-up latency ms: p50={statistics.median(latencies_ms):.2f} "
+              f"max={latencies_ms[-1]:.2f} mean={statistics.mean(latencies_ms):.2f}")
+
+
+if __name__ == "__main__":
+    main()
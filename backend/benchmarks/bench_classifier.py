@@ -0,0 +1,100 @@
+"""
+Micro-benchmark: compiled classifier vs the original substring scan.
+
+Usage (from backend/):
+    python -m benchmarks.bench_classifier [--rounds 20000] [--log queries.txt]
+
+With --log, every line of the file is classified through `classify_many` and
+the queries where the two classifiers disagree are printed for tuning.
+"""
+import argparse
+import time
+
+from classifier import classify, classify_many
+
+# Original implementation from main.py, kept verbatim for comparison
+LEGACY_KEYWORDS = [
+    'stock', 'stocks', 'share', 'shares', 'investment', 'invest', 'trading', 'trade',
+    'market', 'portfolio', 'dividend', 'equity', 'securities', 'ticker', 'buy', 'sell',
+    'price', 'valuation', 'finance', 'financial', 'nasdaq', 'dow', 'sp500', 's&p',
+    'bull', 'bear', 'earnings', 'profit', 'revenue', 'company', 'corporation', 'fund',
+    'etf', 'mutual fund', 'bond', 'commodity', 'crypto', 'cryptocurrency', 'bitcoin',
+    'analysis', 'recommendation', 'forecast', 'trend', 'volatility', 'return', 'roi'
+]
+
+
+def legacy_is_finance_related(query: str) -> bool:
+    query_lower = query.lower()
+    for keyword in LEGACY_KEYWORDS:
+        if keyword in query_lower:
+            return True
+    finance_patterns = [
+        'should i buy', 'should i sell', 'which stock', 'what stock',
+        'best investment', 'good investment', 'market outlook', 'stock recommendation',
+        'financial advice', 'investment advice', 'portfolio advice'
+    ]
+    for pattern in finance_patterns:
+        if pattern in query_lower:
+            return True
+    return False
+
+
+SAMPLE_QUERIES = [
+    "Hi there, how are you today?",
+    "What can you do?",
+    "Tell me a joke about cats",
+    "Can you help me return my library book?",
+    "Ideas for a company picnic this weekend",
+    "What stocks should I buy today?",
+    "Is the S&P 500 overvalued right now?",
+    "Should I sell my bitcoin before earnings season?",
+    "Give me a summary of the history of the Roman empire in three paragraphs",
+    "Which ETF has the best dividend yield?",
+    "Show me the top market movers",
+    "How's the market doing today?",
+    "Is AAPL a good buy?",
+    "what should i buy my mom for her birthday",
+]
+
+
+def time_it(fn, queries, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            fn(query)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--log", help="file with one query per line to replay")
+    args = parser.parse_args()
+
+    queries = SAMPLE_QUERIES
+    if args.log:
+        with open(args.log) as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    # The legacy scan stops at its first keyword, so finance and generic queries cost differently
+    finance = [query for query in queries if legacy_is_finance_related(query)]
+    generic = [query for query in queries if not legacy_is_finance_related(query)]
+    print(f"queries classified: {args.rounds * len(queries)}")
+    print(f"{'us/query':<10} {'legacy':>8} {'compiled':>9}")
+    for label, group in (("finance", finance), ("generic", generic), ("all", queries)):
+        if not group:
+            continue
+        total = args.rounds * len(group)
+        legacy = time_it(legacy_is_finance_related, group, args.rounds)
+        compiled = time_it(lambda q: classify(q).is_finance, group, args.rounds)
+        print(f"{label:<10} {legacy / total * 1e6:>8.2f} {compiled / total * 1e6:>9.2f}")
+
+    print("\nDisagreements (legacy -> compiled):")
+    for query, result in zip(queries, classify_many(queries)):
+        if legacy_is_finance_related(query) != result.is_finance:
+            print(f"  {legacy_is_finance_related(query)!s:5} -> {result.is_finance!s:5} "
+                  f"score={result.score} matched={list(result.matched)} | {query}")
+
+
+if __name__ == "__main__":
+    main()
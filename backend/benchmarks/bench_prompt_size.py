@@ -0,0 +1,64 @@
+"""
+Prompt size of a market snapshot tool result: the dict the tool used to return
+(as str() and as JSON) against the compact table, unbudgeted and within
+LLM_TOKEN_BUDGET.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_size [--sizes 30,120,500] [--budget 2000]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.fakes import market_snapshot
+from prompt_budget import encode_quotes, estimate_tokens
+
+
+def parsed_snapshot(count: int) -> dict:
+    """The snapshot _request_market_snapshot builds from a DataForSEO response"""
+    result = market_snapshot(count)["tasks"][0]["result"][0]
+    stocks = [
+        {
+            "symbol": item["ticker"],
+            "name": item["displayed_name"],
+            "price": item["price"],
+            "price_change": item["price_delta"],
+            "percentage_change": item["percentage_delta"],
+            "trend": item["trend"],
+        }
+        for item in result["items"][0]["items"]
+    ]
+    return {"status": "success", "timestamp": result["datetime"], "trending_stocks": stocks,
+            "total_stocks_found": len(stocks)}
+
+
+def timed(fn, repeat: int = 50):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="30,120,500")
+    parser.add_argument("--budget", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'quotes':>6} {'encoding':<16} {'chars':>8} {'~tokens':>8} {'rows':>5} {'ms':>7}")
+    for size in (int(v) for v in args.sizes.split(",")):
+        snapshot = parsed_snapshot(size)
+        encodings = [
+            ("dict repr", lambda: str(snapshot)),
+            ("json", lambda: json.dumps(snapshot)),
+            ("table", lambda: encode_quotes(snapshot)),
+            (f"table @{args.budget}", lambda: encode_quotes(snapshot, args.budget)),
+        ]
+        for name, encode in encodings:
+            text, ms = timed(encode)
+            rows = text.count("\n") - 1 if name.startswith("table") else size
+            print(f"{size:>6} {name:<16} {len(text):>8} {estimate_tokens(text):>8} {rows:>5} {ms:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
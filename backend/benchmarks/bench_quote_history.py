@@ -0,0 +1,55 @@
+"""
+Momentum lookups over a synthetic quote history.
+
+Appends --snapshots snapshots of --tickers quotes to a temporary history file,
+then times QuoteHistory.momentum for the ranking step's candidate set.
+
+Usage (from backend/):
+    python -m benchmarks.bench_quote_history [--snapshots 5000] [--tickers 30] [--window 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from quote_history import RECORD_DTYPE, QuoteHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshots", type=int, default=5000)
+    parser.add_argument("--tickers", type=int, default=30)
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = QuoteHistory(os.path.join(directory, "quote_history.bin"))
+        symbols = [f"TK{i:03d}:NASDAQ" for i in range(args.tickers)]
+        records = np.zeros(args.snapshots * args.tickers, dtype=RECORD_DTYPE)
+        records["ts"] = np.repeat(np.arange(args.snapshots) * 60, args.tickers)
+        records["ticker"] = np.tile(np.array(symbols, dtype="S24"), args.snapshots)
+        records["change"] = np.random.normal(0, 1.5, len(records))
+        records["price"] = 100 * np.exp(np.cumsum(records["change"].reshape(-1, args.tickers) / 100, axis=0)).ravel()
+
+        start = time.perf_counter()
+        history.append(records)
+        append_ms = (time.perf_counter() - start) * 1000
+        size_mb = os.path.getsize(history.path) / 1e6
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            history.momentum(symbols, window=args.window)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        print(f"{len(records)} records ({size_mb:.1f} MB, {RECORD_DTYPE.itemsize} bytes each), appended in {append_ms:.1f} ms")
+        print(f"momentum for {args.tickers} tickers, window {args.window}: "
+              f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
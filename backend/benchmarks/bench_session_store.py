@@ -0,0 +1,90 @@
+"""
+Workflow session write latency by SESSION_STORE_MODE at 1, 10 and 50 concurrent runs.
+
+Each simulated run reads its session (a miss, as for a new run id) and then
+saves it --saves times with a growing payload, the way the workflow saves
+after its steps. We time every save as the run sees it; for buffered mode the
+time to drain the queue afterwards is reported separately.
+
+Usage (from backend/):
+    python -m benchmarks.bench_session_store [--runs-per-thread 20] [--saves 4] [--modes plain,wal,buffered]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+from agno.session import WorkflowSession
+
+from session_store import SESSION_TABLE, build_session_db
+
+
+def simulate_run(db, saves: int, latencies: list, lock: threading.Lock):
+    session_id = str(uuid.uuid4())
+    db.get_session(session_id=session_id)
+    session = WorkflowSession(session_id=session_id, workflow_id="bench", session_data={"steps": []},
+                              created_at=int(time.time()))
+    for step in range(saves):
+        session.session_data["steps"].append({"step": step, "content": "x" * 1500})
+        session.updated_at = int(time.time())
+        start = time.perf_counter()
+        db.upsert_session(session)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+
+def run_level(mode: str, concurrency: int, runs_per_thread: int, saves: int, directory: str):
+    db = build_session_db(mode=mode, db_file=os.path.join(directory, f"{mode}-{concurrency}.db"), table=SESSION_TABLE)
+    # Create the table outside the timed section
+    simulate_run(db, 1, [], threading.Lock())
+    if hasattr(db, "flush"):
+        db.flush()
+
+    latencies, lock = [], threading.Lock()
+
+    def worker():
+        for _ in range(runs_per_thread):
+            simulate_run(db, saves, latencies, lock)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    drain = 0.0
+    if hasattr(db, "flush"):
+        drain_start = time.perf_counter()
+        db.flush()
+        drain = time.perf_counter() - drain_start
+
+    latencies.sort()
+    pick = lambda pct: latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))] * 1000
+    print(f"{mode:<9} {concurrency:>4} {len(latencies):>6} {statistics.mean(latencies) * 1000:>8.2f} "
+          f"{pick(50):>8.2f} {pick(95):>8.2f} {pick(99):>8.2f} {len(latencies) / elapsed:>9.0f} {drain * 1000:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs-per-thread", type=int, default=20)
+    parser.add_argument("--saves", type=int, default=4)
+    parser.add_argument("--modes", default="plain,wal,buffered")
+    parser.add_argument("--levels", default="1,10,50")
+    args = parser.parse_args()
+
+    print(f"{'mode':<9} {'runs':>4} {'writes':>6} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'writes/s':>9} {'drain ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in args.modes.split(","):
+            for level in (int(v) for v in args.levels.split(",")):
+                run_level(mode, level, args.runs_per_thread, args.saves, directory)
+
+
+if __name__ == "__main__":
+    main()
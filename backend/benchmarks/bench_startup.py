@@ -0,0 +1,61 @@
+"""
+Import time and first-request latency, cold vs warmed up.
+
+Each scenario runs in a fresh interpreter. The generic agent's model call is
+stubbed out so the numbers only cover importing, building and connecting,
+not Claude's generation time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 3]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SCENARIO = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import server
+t_server = time.perf_counter() - t0
+
+from agno.agent import Agent
+Agent.run = lambda self, *args, **kwargs: type("Reply", (), {"content": "hi"})()
+
+warm = sys.argv[1] == "warm"
+t_warm = 0.0
+if warm:
+    t1 = time.perf_counter()
+    server.warm_up()
+    t_warm = time.perf_counter() - t1
+
+client = server.app.test_client()
+t2 = time.perf_counter()
+client.post("/api/chat", json={"message": "hello there"})
+t_first = time.perf_counter() - t2
+t3 = time.perf_counter()
+client.post("/api/chat", json={"message": "hello again"})
+t_second = time.perf_counter() - t3
+print(json.dumps({"import_server": t_server, "warm_up": t_warm, "first_request": t_first, "second_request": t_second}))
+"""
+
+
+def run(mode: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", SCENARIO, mode], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for mode in ("cold", "warm"):
+        results = [run(mode) for _ in range(args.runs)]
+        summary = {key: statistics.median(r[key]) * 1000 for key in results[0]}
+        print(f"{mode:5}: " + "  ".join(f"{key}={value:.1f}ms" for key, value in summary.items()))
+
+
+if __name__ == "__main__":
+    main()
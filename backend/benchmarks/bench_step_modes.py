@@ -0,0 +1,121 @@
+"""
+Per-request latency and Claude token use of the approval workflow in direct vs
+agent WORKFLOW_STEP_MODE.
+
+Each mode runs in its own process (the mode is read when main.py is imported)
+against the vendor stand-ins in benchmarks/fakes.py: finance requests go
+through the same `answer_chat` path as /api/chat, the fake Anthropic API calls
+the agents' tools, and the fake Twilio client answers the approval call
+through the app's webhooks. Latency is measured per request; tokens and Claude
+calls are what the fake API billed, as recorded by the workflow's token metrics.
+
+Usage (from backend/):
+    python -m benchmarks.bench_step_modes [--requests 5] [--anthropic-latency fixed:1.0]
+        [--elevenlabs-latency fixed:0.2] [--twilio-latency fixed:0.5] [--think-latency fixed:0.5]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.fakes import FakeTwilioClient, FakeVendorServer, Latency, VendorBehaviour
+from benchmarks.loadtest import FINANCE_QUERIES, configure_env, percentile
+
+MODES = ("direct", "agent")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_mode(args) -> dict:
+    """Serve the app against the fakes and time --requests finance requests in this process's mode"""
+    behaviours = {
+        vendor: VendorBehaviour(Latency.parse(getattr(args, f"{vendor}_latency")))
+        for vendor in ("dataforseo", "anthropic", "elevenlabs", "twilio")
+    }
+    vendors = FakeVendorServer(behaviours).start()
+    port = free_port()
+    configure_env(vendors.url, f"http://127.0.0.1:{port}")
+
+    from werkzeug.serving import make_server
+    import main
+    import metrics
+    import server
+
+    server.client = FakeTwilioClient(behaviours["twilio"], Latency.parse(args.think_latency))
+    httpd = make_server("127.0.0.1", port, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True, name="app").start()
+
+    agent_steps = [agent.name.lower().replace(" ", "_") for agent in
+                   (main.wording_agent, main.summarizer_agent, main.tts_agent, main.phone_agent)]
+    seconds, failures = [], 0
+    for i in range(args.requests):
+        start = time.perf_counter()
+        envelope = server.answer_chat(FINANCE_QUERIES[i % len(FINANCE_QUERIES)])
+        seconds.append(time.perf_counter() - start)
+        failures += not (envelope.get("ok") and envelope.get("approval"))
+
+    httpd.shutdown()
+    vendors.stop()
+    tokens = {
+        kind: sum(metrics.llm_tokens.value(step, kind) for step in agent_steps)
+        for kind in ("input", "output")
+    }
+    return {
+        "mode": main.WORKFLOW_STEP_MODE,
+        "requests": args.requests,
+        "failures": failures,
+        "p50": percentile(seconds, 50),
+        "mean": sum(seconds) / len(seconds),
+        "claude_calls": behaviours["anthropic"].calls / args.requests,
+        "input_tokens": tokens["input"] / args.requests,
+        "output_tokens": tokens["output"] / args.requests,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--dataforseo-latency", default="fixed:0.5")
+    parser.add_argument("--anthropic-latency", default="fixed:1.0")
+    parser.add_argument("--elevenlabs-latency", default="fixed:0.2")
+    parser.add_argument("--twilio-latency", default="fixed:0.5", help="Time until the callee picks up")
+    parser.add_argument("--think-latency", default="fixed:0.5", help="Time the callee takes to press a key")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: the parent set WORKFLOW_STEP_MODE; report on the last stdout line
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = {}
+    for mode in MODES:
+        env = dict(os.environ, WORKFLOW_STEP_MODE=mode)
+        child = subprocess.run([sys.executable, "-m", "benchmarks.bench_step_modes", *sys.argv[1:], "--mode", mode],
+                               env=env, capture_output=True, text=True)
+        if child.returncode != 0:
+            sys.exit(f"{mode} mode failed:\n{child.stderr}")
+        results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"{'mode':<8} {'requests':>8} {'failed':>6} {'p50 s':>7} {'mean s':>7} "
+          f"{'Claude calls':>12} {'input tok':>9} {'output tok':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8} {r['requests']:>8} {r['failures']:>6} {r['p50']:>7.2f} {r['mean']:>7.2f} "
+              f"{r['claude_calls']:>12.1f} {r['input_tokens']:>9.0f} {r['output_tokens']:>10.0f}")
+    direct, agent = results["direct"], results["agent"]
+    print(f"direct saves {agent['mean'] - direct['mean']:.2f} s, "
+          f"{agent['claude_calls'] - direct['claude_calls']:.1f} Claude calls and "
+          f"{agent['input_tokens'] + agent['output_tokens'] - direct['input_tokens'] - direct['output_tokens']:.0f} "
+          f"tokens per request (all per-request figures are means)")
+
+
+if __name__ == "__main__":
+    main_cli()
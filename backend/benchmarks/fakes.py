@@ -0,0 +1,304 @@
+"""
+Local stand-ins for the paid vendors, for offline load testing.
+
+- DataForSEO finance_markets/live/advanced (POST /v3/serp/google/finance_markets/live/advanced)
+- Anthropic Messages API, plain and streaming (POST /v1/messages); when tools
+  are offered the reply calls the first one, then echoes its result
+- ElevenLabs text-to-speech as a chunked MP3 stream (POST /v1/text-to-speech/<voice_id>)
+- Twilio: an in-process client whose calls fetch /voice and the audio from our
+  app (following hold redirects), then POST /gather with a digit, like the real
+  webhook would
+
+Every fake takes a latency distribution and an error rate, e.g.
+"fixed:0.2", "uniform:0.1,0.4" or "lognormal:0.8,0.5" (median seconds, sigma).
+"""
+import html
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.request import Request, urlopen
+
+
+@dataclass
+class Latency:
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v] or [0.0]
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self) -> float:
+        if self.kind == "uniform":
+            return random.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return random.lognormvariate(0, self.b) * self.a
+        return self.a
+
+
+@dataclass
+class VendorBehaviour:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+
+    def delay_or_fail(self) -> bool:
+        """Sleep for one latency sample; returns True when this call should fail"""
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+
+def market_snapshot(count: int = 30) -> dict:
+    """A DataForSEO finance_markets response with `count` instruments"""
+    instruments = []
+    for i in range(count):
+        delta = round(random.uniform(0.1, 6.0), 2)
+        price = round(random.uniform(5, 900), 2)
+        instruments.append({
+            "type": "google_finance_market_instrument_element",
+            "ticker": f"TK{i:02d}:NASDAQ",
+            "displayed_name": f"Test Company {i}",
+            "price": price,
+            "price_delta": round(price * delta / 100, 2),
+            "percentage_delta": delta,
+            "trend": random.choice(["up", "up", "down"]),
+        })
+    return {
+        "status_code": 20000,
+        "tasks": [{
+            "status_code": 20000,
+            "result": [{
+                "datetime": time.strftime("%Y-%m-%d %H:%M:%S +00:00"),
+                "items": [{"type": "google_finance_interested", "items": instruments}],
+            }],
+        }],
+    }
+
+
+FAKE_MP3_CHUNK = b"ID3\x03\x00\x00\x00\x00\x00\x00" + bytes(4086)
+
+
+class FakeVendorServer:
+    """One local HTTP server answering for DataForSEO, Anthropic and ElevenLabs"""
+
+    def __init__(self, behaviours: Dict[str, VendorBehaviour], audio_chunks: int = 8,
+                 chunk_interval: float = 0.05, reply_words: int = 40):
+        self.behaviours = behaviours
+        self.audio_chunks = audio_chunks
+        self.chunk_interval = chunk_interval
+        self.reply_words = reply_words
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path.startswith("/v3/serp/google/finance_markets"):
+                    server._dataforseo(self)
+                elif self.path.startswith("/v1/messages"):
+                    server._anthropic(self, json.loads(body or b"{}"))
+                elif self.path.startswith("/v1/text-to-speech/"):
+                    server._elevenlabs(self)
+                else:
+                    self._send(404, {"error": "unknown path"})
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name="fake-vendors").start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def _dataforseo(self, handler):
+        if self.behaviours["dataforseo"].delay_or_fail():
+            handler._send(500, {"status_code": 50000, "status_message": "Internal error"})
+            return
+        handler._send(200, market_snapshot())
+
+    def _reply_text(self) -> str:
+        return " ".join(random.choice(["Markets", "look", "strong", "today", "with", "tech", "leading", "gains"])
+                        for _ in range(self.reply_words)) + "."
+
+    @staticmethod
+    def _last_message_blocks(request: dict) -> list:
+        messages = request.get("messages") or [{}]
+        content = messages[-1].get("content")
+        return content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+
+    def _tool_use(self, request: dict):
+        """Call the first offered tool, like the agents' prompts ask, unless its result is already in"""
+        tools = request.get("tools") or []
+        blocks = self._last_message_blocks(request)
+        if not tools or any(block.get("type") == "tool_result" for block in blocks):
+            return None
+        prompt = " ".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+        quoted = re.search(r'"([^"]+)"', prompt)
+        arguments = {}
+        for name in (tools[0].get("input_schema") or {}).get("properties", {}):
+            # Prompts name their arguments as "- name: value" lines or quote the text to use
+            listed = re.search(rf"^\s*-\s*{re.escape(name)}:\s*(.+)$", prompt, re.MULTILINE)
+            arguments[name] = listed.group(1).strip() if listed else quoted.group(1) if quoted else prompt
+        return {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tools[0]["name"],
+                "input": arguments}
+
+    def _tool_result(self, request: dict) -> str:
+        """After a tool call, answer with its result (the agents are told to return it as-is)"""
+        for block in self._last_message_blocks(request):
+            if block.get("type") == "tool_result":
+                content = block.get("content")
+                if isinstance(content, list):
+                    content = " ".join(part.get("text", "") for part in content)
+                return str(content or "")
+        return ""
+
+    def _anthropic(self, handler, request: dict):
+        if self.behaviours["anthropic"].delay_or_fail():
+            handler._send(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+            return
+
+        # The whole prompt is billed: system prompt, tool definitions and conversation
+        prompt = {key: request.get(key) for key in ("system", "tools", "messages")}
+        input_tokens = max(1, len(json.dumps(prompt)) // 4)
+        tool_use = self._tool_use(request)
+        if tool_use:
+            content = [tool_use]
+            output_tokens = max(1, len(json.dumps(tool_use["input"])) // 4)
+        else:
+            text = self._tool_result(request) or self._reply_text()
+            content = [{"type": "text", "text": text}]
+            output_tokens = len(text.split())
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant",
+            "model": request.get("model", "claude-sonnet-4-0"),
+            "content": content,
+            "stop_reason": "tool_use" if tool_use else "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+        if tool_use and request.get("stream"):
+            handler._send(400, {"type": "error", "error": {"type": "invalid_request_error",
+                                                           "message": "fake tool use is not streamed"}})
+            return
+        if not request.get("stream"):
+            handler._send(200, message)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def event(name: str, data: dict):
+            handler._chunk(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+
+        start = dict(message, content=[], stop_reason=None, usage={"input_tokens": input_tokens, "output_tokens": 1})
+        event("message_start", {"type": "message_start", "message": start})
+        event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for word in re.findall(r"\S+\s*", text):
+            time.sleep(0.01)
+            event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": word}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": output_tokens}})
+        event("message_stop", {"type": "message_stop"})
+        handler._chunk(b"")
+
+    def _elevenlabs(self, handler):
+        if self.behaviours["elevenlabs"].delay_or_fail():
+            handler._send(500, {"detail": {"status": "internal_error"}})
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "audio/mpeg")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        for _ in range(self.audio_chunks):
+            handler._chunk(FAKE_MP3_CHUNK)
+            time.sleep(self.chunk_interval)
+        handler._chunk(b"")
+
+
+class FakeTwilioClient:
+    """
+    Drop-in for `server.client`: a placed call fetches /voice and the audio from
+    the app after the ring delay, then POSTs /gather with `digit` after the
+    think delay.
+    """
+
+    def __init__(self, behaviour: VendorBehaviour, think: Latency, digit: str = "1"):
+        self.behaviour = behaviour
+        self.think = think
+        self.digit = digit
+        self.calls = self
+        self.hung_up = set()
+
+    def create(self, to, from_, url):
+        if random.random() < self.behaviour.error_rate:
+            self.behaviour.errors += 1
+            raise RuntimeError("Fake Twilio call failed")
+        self.behaviour.calls += 1
+        sid = f"CA{uuid.uuid4().hex}"
+        threading.Thread(target=self._answer, args=(sid, url), daemon=True).start()
+        return type("FakeCall", (), {"sid": sid})()
+
+    def __call__(self, sid: str):
+        """client.calls(sid): only update(status=...) is supported, which hangs the call up"""
+        client = self
+        return type("FakeCallContext", (), {"update": lambda _, status=None: client.hung_up.add(sid)})()
+
+    def _answer(self, sid: str, voice_url: str):
+        time.sleep(self.behaviour.latency.sample())
+        url, method = voice_url, "GET"
+        # Follow hold loops (<Pause/><Redirect>) until the call gathers a key or ends
+        while sid not in self.hung_up:
+            twiml = urlopen(Request(url, method=method), timeout=30).read().decode()
+            for audio_url in re.findall(r"<Play>(.*?)</Play>", twiml):
+                urlopen(html.unescape(audio_url), timeout=60).read()
+            action = re.search(r'<Gather[^>]*action="([^"]+)"', twiml)
+            if action:
+                break
+            redirect = re.search(r"<Redirect[^>]*>(.*?)</Redirect>", twiml)
+            if not redirect:
+                return
+            pause = re.search(r'<Pause[^>]*length="(\d+)"', twiml)
+            time.sleep(int(pause.group(1)) if pause else 1)
+            url, method = html.unescape(redirect.group(1)), "POST"
+        else:
+            return
+        time.sleep(self.think.sample())
+        request = Request(html.unescape(action.group(1)), data=f"Digits={self.digit}".encode(), method="POST")
+        request.add_header("Content-Type", "application/x-www-form-urlencoded")
+        urlopen(request, timeout=30).read()
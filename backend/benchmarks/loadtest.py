@@ -0,0 +1,183 @@
+"""
+Offline end-to-end load test.
+
+Starts local stand-ins for DataForSEO, Anthropic, ElevenLabs and Twilio
+(benchmarks/fakes.py), points the app at them through its env settings, serves
+the Flask app on a local port and drives it with concurrent simulated users
+posting to /api/chat. Nothing leaves the machine and no vendor is billed.
+
+Reports throughput, p50/p95/p99 per route, workflow step and vendor tool, the
+fakes' call/error counts, and process resource use.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest [--users 10] [--duration 30] [--finance-ratio 0.5]
+        [--anthropic-latency lognormal:0.8,0.4] [--anthropic-errors 0.0] ...
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import threading
+import time
+from collections import defaultdict
+from urllib.request import Request, urlopen
+
+import dotenv
+
+from benchmarks.fakes import FakeTwilioClient, FakeVendorServer, Latency, VendorBehaviour
+
+FINANCE_QUERIES = [
+    "Which stocks should I buy today?",
+    "Show me the top market movers",
+    "What are the best performing tech stocks right now?",
+    "Find me high momentum shares on the NASDAQ",
+]
+GENERIC_QUERIES = [
+    "What is the capital of France?",
+    "Give me a recipe for pancakes",
+    "How do airplanes stay in the air?",
+    "Recommend a good science fiction book",
+    "Explain how rainbows form",
+]
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def collect_samples():
+    """Keep every histogram observation so we can report exact percentiles"""
+    import metrics
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    original = metrics.Histogram.observe
+
+    def observe(self, value, *label_values):
+        original(self, value, *label_values)
+        with lock:
+            samples[(self.name,) + tuple(str(v) for v in label_values)].append(value)
+
+    metrics.Histogram.observe = observe
+    return samples
+
+
+def configure_env(vendor_url: str, app_url: str):
+    """Point every vendor at the fakes; must run before main/server are imported"""
+    # main.py reloads .env with override=True, which would point us back at the real vendors
+    dotenv.load_dotenv = lambda *args, **kwargs: False
+    os.environ.update({
+        "FINANCE_API_URL": f"{vendor_url}/v3/serp/google/finance_markets/live/advanced",
+        "FINANCE_API_BASE64": "bG9hZHRlc3Q6bG9hZHRlc3Q=",
+        "ANTHROPIC_BASE_URL": vendor_url,
+        "ANTHROPIC_API_KEY": "sk-ant-loadtest",
+        "ELEVENLABS_BASE_URL": vendor_url,
+        "ELEVENLABS_API_KEY": "sk_loadtest",
+        "BASE_URL": app_url,
+        "account_sid": "AC" + "0" * 32,
+        "auth_token": "loadtest",
+        "TWILIO_PHONE_NUMBER": "+15550000001",
+        "TARGET_PHONE_NUMBER": "+15550000002",
+        "WARM_UP": "false",
+    })
+
+
+def user_loop(app_url: str, finance_ratio: float, stop_at: float, results: list, lock: threading.Lock):
+    while time.time() < stop_at:
+        finance = random.random() < finance_ratio
+        query = random.choice(FINANCE_QUERIES if finance else GENERIC_QUERIES)
+        request = Request(f"{app_url}/api/chat", data=json.dumps({"message": query}).encode(), method="POST")
+        request.add_header("Content-Type", "application/json")
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=300) as response:
+                ok = json.loads(response.read()).get("ok", False)
+        except Exception as e:
+            print(f"Request failed: {e}")
+            ok = False
+        with lock:
+            results.append(("finance" if finance else "generic", ok, time.perf_counter() - start))
+
+
+def report(results, samples, elapsed: float, behaviours, usage_before, usage_after, peak_threads: int):
+    print(f"\n{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.2f} req/s)")
+    print(f"{'series':<58} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+
+    rows = defaultdict(list)
+    for kind, ok, seconds in results:
+        rows[f"client /api/chat {kind}{'' if ok else ' (failed)'}"].append(seconds)
+    wanted = {"http_request_duration_seconds", "workflow_step_duration_seconds", "tool_duration_seconds"}
+    for key, values in samples.items():
+        if key[0] in wanted:
+            rows[" ".join(key)].extend(values)
+    for name in sorted(rows):
+        values = rows[name]
+        print(f"{name:<58} {len(values):>5} {percentile(values, 50):>8.3f} "
+              f"{percentile(values, 95):>8.3f} {percentile(values, 99):>8.3f}")
+
+    print("\nvendor stand-ins:")
+    for name, behaviour in behaviours.items():
+        print(f"  {name:<11} calls={behaviour.calls} errors={behaviour.errors}")
+
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    print(f"\nCPU {cpu:.2f}s ({cpu / elapsed * 100:.0f}% of one core), "
+          f"max RSS {usage_after.ru_maxrss / 1024:.0f} MB, peak threads {peak_threads}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--finance-ratio", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=8765)
+    for vendor, latency in (("dataforseo", "uniform:0.3,0.8"), ("anthropic", "lognormal:0.8,0.4"),
+                            ("elevenlabs", "uniform:0.2,0.5"), ("twilio", "uniform:1,3")):
+        parser.add_argument(f"--{vendor}-latency", default=latency)
+        parser.add_argument(f"--{vendor}-errors", type=float, default=0.0)
+    parser.add_argument("--think-latency", default="uniform:0.5,2", help="Time the callee takes to press a key")
+    args = parser.parse_args()
+
+    behaviours = {
+        vendor: VendorBehaviour(Latency.parse(getattr(args, f"{vendor}_latency")), getattr(args, f"{vendor}_errors"))
+        for vendor in ("dataforseo", "anthropic", "elevenlabs", "twilio")
+    }
+    vendors = FakeVendorServer(behaviours).start()
+    app_url = f"http://127.0.0.1:{args.port}"
+    configure_env(vendors.url, app_url)
+    samples = collect_samples()
+
+    from werkzeug.serving import make_server
+    import server
+    import main as workflow  # noqa: F401 - import the workflow before the clock starts
+
+    server.client = FakeTwilioClient(behaviours["twilio"], Latency.parse(args.think_latency))
+    httpd = make_server("127.0.0.1", args.port, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True, name="app").start()
+
+    results, lock = [], threading.Lock()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.time()
+    stop_at = start + args.duration
+    users = [threading.Thread(target=user_loop, args=(app_url, args.finance_ratio, stop_at, results, lock), daemon=True)
+             for _ in range(args.users)]
+    for user in users:
+        user.start()
+
+    peak_threads = 0
+    while any(user.is_alive() for user in users):
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(0.2)
+    elapsed = time.time() - start
+
+    report(results, samples, elapsed, behaviours, usage_before, resource.getrusage(resource.RUSAGE_SELF), peak_threads)
+    httpd.shutdown()
+    vendors.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Caching helpers shared by the workflow tools.
+
+- SingleFlight: concurrent callers for the same key share one in-flight load
+- MemoryStore / SqliteStore: where cached values live (in-process or shared
+  between server workers through a local SQLite file)
+- SnapshotCache: TTL cache with stale-while-revalidate on top of a store
+- ResponseCache: bounded LRU + TTL cache for generated answers, optionally
+  persisted to a local file
+"""
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution"""
+
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn once per key at a time; returns (result, shared) where shared means we waited on another caller"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+class MemoryStore:
+    """Per-process store; fastest, but every worker keeps its own copy"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[Any, float]] = {}
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key: str, value: Any, stored_at: float):
+        with self._lock:
+            self._data[key] = (value, stored_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SqliteStore:
+    """Store backed by a local SQLite file so several workers share one copy (values must be JSON)"""
+
+    def __init__(self, path: str, table: str = "cache_entries"):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._conn().execute(
+            f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, stored_at: float):
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), stored_at),
+        )
+        conn.commit()
+
+    def delete(self, key: str):
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        conn.commit()
+
+
+def make_store(backend: str = "memory", path: str = "tmp/cache.db", table: str = "cache_entries"):
+    """Build a store by name: "memory" (default) or "sqlite" """
+    if backend == "sqlite":
+        return SqliteStore(path, table=table)
+    return MemoryStore()
+
+
+class SnapshotCache:
+    """
+    TTL cache with stale-while-revalidate and single-flight loading.
+
+    Fresh entries (age < ttl) are returned directly. Entries up to ttl + stale_ttl
+    old are returned immediately while one background refresh runs. Anything
+    older is a miss; concurrent misses for a key share one load.
+    """
+
+    def __init__(self, store=None, ttl: float = 60, stale_ttl: float = 0,
+                 should_cache: Callable[[Any], bool] = lambda value: True):
+        self.store = store or MemoryStore()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.should_cache = should_cache
+        self._flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                       "refreshes": 0, "load_errors": 0}
+        self._last_age = 0.0
+
+    def _count(self, name: str, age: Optional[float] = None):
+        with self._stats_lock:
+            self._stats[name] += 1
+            if age is not None:
+                self._last_age = age
+
+    def _load(self, key: str, loader: Callable[[], Any]):
+        try:
+            value = loader()
+        except Exception:
+            self._count("load_errors")
+            raise
+        if self.should_cache(value):
+            self.store.set(key, value, time.time())
+        return value
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Any]):
+        if self._flight.in_flight(key):
+            return
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._load(key, loader))
+                self._count("refreshes")
+            except Exception as e:
+                print(f"Background cache refresh failed for {key}: {e}")
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]):
+        """Return the cached value for key, loading it with loader() when missing or expired"""
+        if self.ttl > 0:
+            entry = self.store.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                age = time.time() - stored_at
+                if age < self.ttl:
+                    self._count("hits", age)
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._count("stale_hits", age)
+                    self._refresh_in_background(key, loader)
+                    return value
+
+        self._count("misses", 0.0)
+        value, shared = self._flight.do(key, lambda: self._load(key, loader))
+        if shared:
+            self._count("coalesced")
+        return value
+
+    def age(self, key: str) -> Optional[float]:
+        """Seconds since the entry for key was stored, or None when absent"""
+        entry = self.store.get(key)
+        return None if entry is None else time.time() - entry[1]
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["last_age_seconds"] = round(self._last_age, 3)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalise_query(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different queries share an entry"""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", (text or "").lower())).strip()
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with per-entry TTL and single-flight misses.
+
+    With a `path`, entries are written to a JSON file (atomically, at most every
+    `save_interval` seconds and at exit) and reloaded on start.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, path: Optional[str] = None,
+                 save_interval: float = 30, key_fn: Callable[[str], str] = normalise_query):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self.key_fn = key_fn
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()  # key -> (value, expires_at)
+        self._flight = SingleFlight()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        self._dirty = False
+        self._last_save = 0.0
+        if path:
+            self._load()
+            atexit.register(self.save)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, value, expires_at in entries:
+            if expires_at > now:
+                self._entries[key] = (value, expires_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Write live entries to the cache file"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            entries = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items() if expires_at > now]
+            self._dirty = False
+            self._last_save = now
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save response cache: {e}")
+
+    def get(self, text: str):
+        """Cached value for text, or None when missing or expired"""
+        key = self.key_fn(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, text: str, value: Any):
+        key = self.key_fn(text)
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._dirty = True
+            save_due = self.path and time.time() - self._last_save >= self.save_interval
+        if save_due:
+            self.save()
+
+    def get_or_compute(self, text: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, cache_hit); concurrent misses for the same query share one compute()"""
+        value = self.get(text)
+        if value is not None:
+            self._count("hits")
+            return value, True
+
+        def load():
+            value = compute()
+            if value is not None:
+                self.put(text, value)
+            return value
+
+        value, shared = self._flight.do(self.key_fn(text), load)
+        self._count("coalesced" if shared else "misses")
+        return value, shared
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 4) if lookups else 0.0
+        return stats
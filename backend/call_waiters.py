@@ -0,0 +1,192 @@
+"""
+Registry of requests waiting for a DTMF result.
+
+`call_and_collect` registers a waiter before dialing and blocks on it; the
+`/gather` webhook delivers the digit by request_id and wakes the waiter
+immediately instead of it polling the disk.
+
+Modes (CALL_WAIT_MODE):
+- local:  in-process condition, for a single server process
+- socket: each waiter also listens on a Unix datagram socket, so a webhook
+          handled by a different worker process can still wake it
+
+A call can also be dialled before its message exists (speculative dialing):
+the message is attached later with `set_message`, and `/voice` holds the line
+until `message_for` returns it. In socket mode messages are small JSON files
+next to the sockets so every worker sees them.
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from config import env_float
+
+CALL_WAIT_MODE = os.getenv("CALL_WAIT_MODE", "local")
+CALL_SOCKET_DIR = os.getenv("CALL_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "finance-agent-calls"))
+
+# In local mode a webhook handled by another process can't wake us, so waiters
+# still look at the disk fallback this often
+FALLBACK_CHECK_SECONDS = env_float("CALL_WAIT_FALLBACK_CHECK", 5.0)
+
+
+class Waiter:
+    """One pending call result"""
+
+    def __init__(self, request_id: str, listen: bool = False):
+        self.request_id = request_id
+        self.digit: Optional[str] = None
+        self._done = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        if listen:
+            os.makedirs(CALL_SOCKET_DIR, exist_ok=True)
+            path = socket_path(request_id)
+            if os.path.exists(path):
+                os.remove(path)
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.bind(path)
+
+    def set(self, digit: str):
+        self.digit = digit
+        self._done.set()
+
+    def notify(self, digit: str):
+        """Deliver a digit from this process, also waking a wait() blocked on the socket"""
+        self.set(digit)
+        if self._sock is not None:
+            _send(socket_path(self.request_id), digit)
+
+    def wait(self, timeout: float) -> Optional[str]:
+        """Block until a digit arrives or timeout; returns None on timeout"""
+        if self._done.is_set():
+            return self.digit
+        if self._sock is None:
+            self._done.wait(timeout)
+            return self.digit
+
+        if timeout > 0:
+            self._sock.settimeout(timeout)
+        else:
+            # A zero wait is a poll: recv on the non-blocking socket raises BlockingIOError
+            self._sock.setblocking(False)
+        try:
+            data = self._sock.recv(64)
+            self.set(data.decode("utf-8"))
+        except (socket.timeout, BlockingIOError):
+            pass
+        return self.digit
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.remove(socket_path(self.request_id))
+            except OSError:
+                pass
+
+
+def socket_path(request_id: str) -> str:
+    return os.path.join(CALL_SOCKET_DIR, f"{request_id}.sock")
+
+
+_lock = threading.Lock()
+_waiters: Dict[str, Waiter] = {}
+
+
+def register(request_id: str) -> Waiter:
+    """Create the waiter for a call before it is placed"""
+    waiter = Waiter(request_id, listen=CALL_WAIT_MODE == "socket")
+    with _lock:
+        _waiters[request_id] = waiter
+    return waiter
+
+
+def waiter_for(request_id: str) -> Optional[Waiter]:
+    with _lock:
+        return _waiters.get(request_id)
+
+
+def unregister(request_id: str):
+    with _lock:
+        waiter = _waiters.pop(request_id, None)
+    if waiter is not None:
+        waiter.close()
+
+
+def deliver(request_id: str, digit: str) -> bool:
+    """Wake the waiter for request_id; returns False when nobody could be reached"""
+    with _lock:
+        waiter = _waiters.get(request_id)
+    if waiter is not None:
+        waiter.notify(digit)
+        return True
+
+    if CALL_WAIT_MODE == "socket":
+        return _send(socket_path(request_id), digit)
+
+    return False
+
+
+def _send(path: str, digit: str) -> bool:
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sender.sendto(digit.encode("utf-8"), path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sender.close()
+
+
+def pending() -> int:
+    """Number of calls currently waiting for a result in this process"""
+    with _lock:
+        return len(_waiters)
+
+
+_messages: Dict[str, dict] = {}
+
+
+def _message_path(request_id: str) -> str:
+    return os.path.join(CALL_SOCKET_DIR, f"{request_id}.msg.json")
+
+
+def set_message(request_id: str, messages: List[str], cancelled: bool = False):
+    """Attach the message(s) a dialled call should play; cancelled calls are told goodbye instead"""
+    entry = {"messages": list(messages), "cancelled": cancelled}
+    if CALL_WAIT_MODE != "socket":
+        with _lock:
+            _messages[request_id] = entry
+        return
+    os.makedirs(CALL_SOCKET_DIR, exist_ok=True)
+    path = _message_path(request_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, path)
+
+
+def message_for(request_id: str) -> Optional[dict]:
+    """{"messages": [...], "cancelled": bool} once attached, else None"""
+    if CALL_WAIT_MODE != "socket":
+        with _lock:
+            return _messages.get(request_id)
+    try:
+        with open(_message_path(request_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_message(request_id: str):
+    if CALL_WAIT_MODE != "socket":
+        with _lock:
+            _messages.pop(request_id, None)
+        return
+    try:
+        os.remove(_message_path(request_id))
+    except OSError:
+        pass
@@ -0,0 +1,25 @@
+import os
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean switch from the environment (1/true/yes/on)"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back on bad values"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment, falling back on bad values"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
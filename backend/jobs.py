@@ -0,0 +1,122 @@
+"""
+Background jobs for long-running chat requests.
+
+A job runs on a bounded thread pool and records the progress events its
+workflow reports, so clients can follow along via long-poll or SSE while the
+approval call is still in progress.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import progress
+from config import env_int
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting for a worker"""
+
+
+class Job:
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def add_event(self, event: str, data: Optional[dict] = None):
+        with self._cond:
+            self.events.append({"seq": len(self.events), "event": event, "data": data or {}, "at": time.time()})
+            self._cond.notify_all()
+
+    def finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        with self._cond:
+            self.finished_at = time.time()
+            self.result = result
+            self.error = error
+            self.status = status
+            self.events.append({"seq": len(self.events), "event": "done", "data": {"status": status}, "at": self.finished_at})
+            self._cond.notify_all()
+
+    def events_after(self, after: int, timeout: float = 0) -> List[Dict[str, Any]]:
+        """Events with seq >= after, waiting up to timeout for new ones"""
+        with self._cond:
+            if len(self.events) <= after and not self.done and timeout > 0:
+                self._cond.wait(timeout)
+            return self.events[after:]
+
+    def to_dict(self, after: int = 0) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "events": self.events[after:],
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, retention_seconds: int = 900):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Queue fn(*args, **kwargs); progress it reports is recorded on the job"""
+        with self._lock:
+            self._prune()
+            queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if queued >= self.max_pending:
+                raise JobQueueFull(f"{queued} jobs already waiting")
+            job = Job(str(uuid.uuid4()))
+            self._jobs[job.id] = job
+
+        def run():
+            job.status = "running"
+            job.add_event("started")
+            try:
+                with progress.reporting_to(job.add_event):
+                    result = fn(*args, **kwargs)
+                job.finish("succeeded", result=result)
+            except Exception as e:
+                job.finish("failed", error=str(e))
+
+        self._executor.submit(run)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+job_manager = JobManager(
+    max_workers=env_int("JOB_WORKERS", 4),
+    max_pending=env_int("JOB_MAX_PENDING", 32),
+    retention_seconds=env_int("JOB_RETENTION_SECONDS", 900),
+)
@@ -1,72 +1,151 @@
+import functools
 import os
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
 import elevenlabs
 
 from agno.agent import Agent
 from agno.tools import tool
-from agno.db.sqlite import SqliteDb
 from agno.models.anthropic import Claude
 from agno.workflow.types import StepInput, StepOutput
 from agno.workflow.workflow import Workflow
-from server import call_and_collect
+from server import attach_message, call_and_collect, cancel_call, start_call, wait_for_result
+from classifier import classify
+from agent_pool import AgentPool
+from approval_batcher import ApprovalBatcher
+from audio_store import audio_store
+from cache import ResponseCache, SnapshotCache, make_store
+from config import env_flag, env_float, env_int
+from markets import DEFAULT_SLICES, merge_snapshots, parse_slices, slices_for_query
+from prompt_budget import budget_input
+from quote_history import quote_history
+from ranking import format_top_picks, rank_snapshot
+from session_store import build_session_db
+import metrics
+import progress
+import responses
+import run_context
+import transport
 
 load_dotenv(override=True)
 
-# Finance-related keywords and patterns
-FINANCE_KEYWORDS = [
-    'stock', 'stocks', 'share', 'shares', 'investment', 'invest', 'trading', 'trade',
-    'market', 'portfolio', 'dividend', 'equity', 'securities', 'ticker', 'buy', 'sell',
-    'price', 'valuation', 'finance', 'financial', 'nasdaq', 'dow', 'sp500', 's&p',
-    'bull', 'bear', 'earnings', 'profit', 'revenue', 'company', 'corporation', 'fund',
-    'etf', 'mutual fund', 'bond', 'commodity', 'crypto', 'cryptocurrency', 'bitcoin',
-    'analysis', 'recommendation', 'forecast', 'trend', 'volatility', 'return', 'roi'
-]
+# Number of stocks to recommend and whether an LLM rewords the ranked list
+TOP_PICKS = env_int("TOP_PICKS", 3)
+RANKING_LLM_WORDING = env_flag("RANKING_LLM_WORDING")
+
+# How much each symbol's return over its last MOMENTUM_WINDOW recorded snapshots adds to today's move (0 = off)
+RANKING_MOMENTUM_WEIGHT = env_float("RANKING_MOMENTUM_WEIGHT", 0.0)
+MOMENTUM_WINDOW = env_int("MOMENTUM_WINDOW", 20)
+
+TTS_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+TTS_MODEL_ID = "eleven_multilingual_v2"
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+TTS_STREAMING = env_flag("TTS_STREAMING")
+
+# "direct" calls the TTS and phone tools from plain steps; "agent" routes them through Claude agents
+WORKFLOW_STEP_MODE = os.getenv("WORKFLOW_STEP_MODE", "direct")
+
+# Dial the manager as soon as ranking succeeds so ringing overlaps summarisation and TTS
+SPECULATIVE_DIAL = env_flag("SPECULATIVE_DIAL")
+
+FINANCE_API_URL = os.getenv(
+    "FINANCE_API_URL", "https://api.dataforseo.com/v3/serp/google/finance_markets/live/advanced"
+)
+
+# Market slices fetched in parallel for each snapshot (location_code:market_type, comma separated)
+MARKET_SLICES = parse_slices(os.getenv("MARKET_SLICES", DEFAULT_SLICES))
+MARKET_SLICE_TIMEOUT = env_float("MARKET_SLICE_TIMEOUT", 15)
+market_fetch_pool = ThreadPoolExecutor(max_workers=env_int("MARKET_FETCH_WORKERS", 4), thread_name_prefix="market-fetch")
+
+# Identical snapshot requests within the TTL share one paid API call
+market_snapshot_cache = SnapshotCache(
+    store=make_store(
+        os.getenv("MARKET_CACHE_BACKEND", "memory"),
+        path=os.getenv("MARKET_CACHE_PATH", "tmp/market_cache.db"),
+        table="market_snapshots",
+    ),
+    ttl=env_float("MARKET_CACHE_TTL", 60),
+    stale_ttl=env_float("MARKET_CACHE_STALE_TTL", 240),
+    should_cache=lambda snapshot: isinstance(snapshot, dict) and snapshot.get("status") == "success",
+)
 
 def is_finance_related(query: str) -> bool:
     """Determine if a query is finance-related based on keywords"""
-    query_lower = query.lower()
-    
-    # Check for direct finance keywords
-    for keyword in FINANCE_KEYWORDS:
-        if keyword in query_lower:
-            return True
-    
-    # Check for common finance question patterns
-    finance_patterns = [
-        'should i buy', 'should i sell', 'which stock', 'what stock',
-        'best investment', 'good investment', 'market outlook', 'stock recommendation',
-        'financial advice', 'investment advice', 'portfolio advice'
-    ]
-    
-    for pattern in finance_patterns:
-        if pattern in query_lower:
-            return True
-    
-    return False
+    return classify(query).is_finance
+
+def build_generic_agent() -> Agent:
+    """Agent used for non-finance queries"""
+    return Agent(
+        name="Generic Assistant",
+        model=Claude(id="claude-sonnet-4-0"),
+        role="You are a helpful AI assistant. Provide concise and helpful responses to user queries.",
+        instructions=[
+            "Be friendly and conversational",
+            "Keep responses concise but informative",
+            "If the user asks about finance or stocks, politely redirect them to use finance-specific commands"
+        ]
+    )
+
+
+# Pre-built generic agents reused across requests (and their HTTP clients)
+generic_agent_pool = AgentPool(build_generic_agent, size=env_int("GENERIC_AGENT_POOL_SIZE", 4))
+
+
+# Greetings and "what can you do" questions repeat a lot; answer them from cache
+generic_response_cache = ResponseCache(
+    max_entries=env_int("GENERIC_CACHE_MAX_ENTRIES", 512),
+    ttl=env_float("GENERIC_CACHE_TTL", 3600),
+    path=os.getenv("GENERIC_CACHE_PATH", "tmp/generic_responses.json") or None,
+)
 
-def get_generic_response(query: str) -> str:
-    """Generate a generic response for non-finance queries using Claude"""
-    try:
-        from agno.models.anthropic import Claude
-        
-        generic_agent = Agent(
-            name="Generic Assistant",
-            model=Claude(id="claude-sonnet-4-0"),
-            role="You are a helpful AI assistant. Provide concise and helpful responses to user queries.",
-            instructions=[
-                "Be friendly and conversational",
-                "Keep responses concise but informative",
-                "If the user asks about finance or stocks, politely redirect them to use finance-specific commands"
-            ]
-        )
-        
+
+def _generate_generic_response(query: str) -> str:
+    with generic_agent_pool.acquire() as generic_agent:
         response = generic_agent.run(query)
-        return response.content if hasattr(response, 'content') else str(response)
+    metrics.record_tokens("generic_chat", response)
+    return response.content if hasattr(response, 'content') else str(response)
+
+
+def answer_generic(query: str):
+    """Generic answer for a non-finance query and whether it came from the cache"""
+    try:
+        return generic_response_cache.get_or_compute(query, lambda: _generate_generic_response(query))
         
     except Exception as e:
-        return "Hello! I'm here to help. For stock and financial advice, try asking me about specific stocks or investments!"
+        return "Hello! I'm here to help. For stock and financial advice, try asking me about specific stocks or investments!", False
+
+
+def stream_generic_response(query: str):
+    """Generic answer as (chunks, cached): chunks yields text as the model produces it"""
+    cached = generic_response_cache.get(query)
+    if cached is not None:
+        return iter([cached]), True
+    
+    def generate():
+        parts = []
+        try:
+            with generic_agent_pool.acquire() as generic_agent:
+                for event in generic_agent.run(query, stream=True):
+                    text = getattr(event, "content", None)
+                    # Only relay model output, not tool or lifecycle events
+                    if getattr(event, "event", "RunContent") == "RunContent" and isinstance(text, str) and text:
+                        parts.append(text)
+                        yield text
+        except Exception as e:
+            if not parts:
+                yield "Hello! I'm here to help. For stock and financial advice, try asking me about specific stocks or investments!"
+            return
+        
+        if parts:
+            generic_response_cache.put(query, "".join(parts))
+    
+    return generate(), False
+
+
+def get_generic_response(query: str) -> str:
+    """Generate a generic response for non-finance queries using Claude"""
+    return answer_generic(query)[0]
 
 
 def read_manager_phone_from_json(json_path: str = "senior_manager.json") -> str:
@@ -74,61 +153,78 @@ def read_manager_phone_from_json(json_path: str = "senior_manager.json") -> str:
     return "+16473236920"
 
 
+@progress.tracked
 def get_user_input(step_input: StepInput) -> StepOutput:
-    """Step 1: Get user input from API parameters (stored in step_input context)"""
-    # Get user query from the step input context (passed from API)
-    user_query = getattr(step_input, 'user_query', None)
+    """Step 1: Get the user's query, passed as the workflow run's input"""
+    user_query = step_input.input if isinstance(step_input.input, str) else None
     if not user_query:
         user_query = "What stocks should I buy today?"  # fallback
     return StepOutput(content=user_query)
 
 
-def prepare_api_input(step_input: StepInput) -> StepOutput:
-    """Step 2: Prepare input for API agent"""
-    user_query = step_input.previous_step_content
-    
-    prompt = f"""
-    You are a precise market analyst. Call the tool `custom_api_function` exactly once with this query:
-    "{user_query}"
+@progress.tracked
+def rank_stocks(step_input: StepInput) -> StepOutput:
+    """Step 2: Fetch the market snapshot and rank the top movers locally"""
+    user_query = step_input.previous_step_content or ""
 
-       After the call, do the following:
+    snapshot = fetch_market_snapshot(user_query)
+    if not isinstance(snapshot, dict) or snapshot.get("status") != "success":
+        message = snapshot.get("message") if isinstance(snapshot, dict) else snapshot
+        return StepOutput(content=f"I could not load market data right now: {message}")
 
-       1) Parse the API response and build a list of candidates with fields:
-            - symbol (ticker)
-            - name
-            - last_price (if available)
-            - change_percent (preferred: changePercent, percent_change, pct_change; 
-            otherwise compute as (last_price - previous_close) / previous_close * 100 if those fields exist)
+    picks = rank_snapshot(snapshot, limit=TOP_PICKS, boost=momentum_boost(snapshot))
+    ranked_text = format_top_picks(picks)
+    run_context.put("ranking", {"text": ranked_text, "picks": [pick._asdict() for pick in picks]})
+    progress.report("ranking_ready", text=ranked_text)
+    if SPECULATIVE_DIAL:
+        dial_ahead()
+    return StepOutput(content=ranked_text)
 
-       2) Definition of positive performance:
-            - change_percent > 0.
 
-       3) Pick the TOP 3 by highest change_percent.
-            - Tie-breakers in order: higher volume, then higher market cap, then alphabetical by symbol.
-            - Only use symbols that actually appear in the API response. Do not invent anything.
+def dial_ahead():
+    """Start the approval call now; /voice holds the line until the message is attached"""
+    phone_number = read_manager_phone_from_json("senior_manager.json")
+    try:
+        run_context.put("speculative_call", start_call(phone_number))
+        progress.report("calling")
+    except Exception as e:
+        print(f"Speculative dial failed, calling after TTS instead: {e}")
 
-       4) Output format:
-            
-                I have found { '{' }COUNT{ '}' } stocks with the most potential:
-                    1 - <NAME_1> (<SYMBOL_1>)
-                    2 - <NAME_2> (<SYMBOL_2>)
-                    3 - <NAME_3> (<SYMBOL_3>)
 
-      Rules:
-    
-        - If fewer than 3 positive stocks exist, set COUNT accordingly and list only that many lines.
-        - Round change_percent to one decimal place when shown.
-        - Be concise. No JSON. No code fences. No extra commentary beyond the table and the final line.
+def report_calling():
+    """Report the approval call, unless dial_ahead already reported it ringing"""
+    if not run_context.get("speculative_call"):
+        progress.report("calling")
+
+
+def release_speculative_call():
+    """Hang up a speculatively dialled call the run never used (e.g. a later step failed)"""
+    call_id = run_context.get("speculative_call")
+    if call_id and run_context.get("call_result") is None:
+        cancel_call(call_id)
+
+
+@progress.tracked
+def prepare_wording_input(step_input: StepInput) -> StepOutput:
+    """Step 2.1 (optional): Ask the wording agent to polish the ranked list"""
+    ranked_text = step_input.previous_step_content
+
+    prompt = f"""
+    Rewrite the stock list below so it reads naturally for an investor.
+
+    "{ranked_text}"
+
+    Rules:
+        - Keep every company name, ticker symbol and the order exactly as given.
+        - Do not add or remove stocks and do not invent numbers.
+        - Be concise. No JSON. No code fences.
     """
 
-    return StepOutput(content=prompt)
-    
+    return StepOutput(content=prompt.strip())
 
-@tool
-def custom_api_function(query: str = "") -> str:
-    """Call Google finance market API via DataForSEO"""
-    url = "https://api.dataforseo.com/v3/serp/google/finance_markets/live/advanced"
-    payload = '[{"location_code":2124, "language_code":"en", "market_type":"indexes/americas"}]'
+
+def _request_market_snapshot(url: str, payload: str):
+    """Call Google finance market API via DataForSEO and parse the trending stocks"""
     finance_api_base64 = os.getenv('FINANCE_API_BASE64')
 
     headers = {
@@ -137,7 +233,7 @@ def custom_api_function(query: str = "") -> str:
     }
     
     try:
-        response = requests.request("POST", url, headers=headers, data=payload)
+        response = transport.request("dataforseo", "POST", url, headers=headers, data=payload)
         response_json = response.json()
         
         # Navigate to the correct data structure
@@ -163,18 +259,99 @@ def custom_api_function(query: str = "") -> str:
                                 }
                                 trending_stocks.append(stock_info)
                 
-                return {
+                snapshot = {
                     "status": "success",
                     "timestamp": first_result.get('datetime', ''),
                     "trending_stocks": trending_stocks,
                     "total_stocks_found": len(trending_stocks)
                 }
+                return snapshot
         
         return {"status": "error", "message": "No data found"}
     except Exception as e:
         return f"API call failed: {str(e)}"
 
 
+def record_quote_history(snapshot: dict):
+    """Append a freshly fetched snapshot to the quote history (cache hits are not re-recorded)"""
+    if quote_history is None:
+        return
+    try:
+        quote_history.append_snapshot(snapshot)
+    except Exception as e:
+        print(f"Failed to record quote history: {e}")
+
+
+def momentum_boost(snapshot: dict) -> dict:
+    """Ranking boost per symbol from its recent trend: weight x return over the last MOMENTUM_WINDOW snapshots"""
+    if quote_history is None or RANKING_MOMENTUM_WEIGHT <= 0:
+        return {}
+    symbols = [row.get("symbol") for row in snapshot.get("trending_stocks", []) if row.get("symbol")]
+    try:
+        trends = quote_history.momentum(symbols, window=MOMENTUM_WINDOW)
+    except Exception as e:
+        print(f"Momentum lookup failed: {e}")
+        return {}
+    # A single sample has no trend yet
+    return {
+        symbol: RANKING_MOMENTUM_WEIGHT * trend.return_percent
+        for symbol, trend in trends.items() if trend.samples > 1
+    }
+
+
+@metrics.timed_tool(
+    "custom_api_function",
+    is_error=lambda snapshot: not (isinstance(snapshot, dict) and snapshot.get("status") == "success"),
+)
+def fetch_market_snapshot(query: str = ""):
+    """
+    Fetch the market slices the query asks about (all configured slices by
+    default) in parallel and merge them into one snapshot. Each slice is cached
+    on its own; slices that fail or miss MARKET_SLICE_TIMEOUT are left out.
+    """
+    url = FINANCE_API_URL
+    slices = slices_for_query(query, MARKET_SLICES)
+    futures = {}
+    fetched = set()  # slices loaded from the API by this call rather than the cache
+
+    def load(label: str, payload: str):
+        fetched.add(label)
+        return _request_market_snapshot(url, payload)
+
+    for market_slice in slices:
+        payload = market_slice.payload()
+        futures[market_slice.label] = market_fetch_pool.submit(
+            market_snapshot_cache.get_or_load,
+            f"{url}|{payload}",
+            lambda label=market_slice.label, payload=payload: load(label, payload),
+        )
+
+    results, failed = {}, {}
+    deadline = time.monotonic() + MARKET_SLICE_TIMEOUT
+    for label, future in futures.items():
+        try:
+            snapshot = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            failed[label] = "timed out"
+            continue
+        except Exception as e:
+            failed[label] = str(e)
+            continue
+        if isinstance(snapshot, dict) and snapshot.get("status") == "success":
+            results[label] = snapshot
+        else:
+            failed[label] = snapshot.get("message") if isinstance(snapshot, dict) else str(snapshot)
+
+    if failed:
+        print(f"Market slices unavailable: {failed}")
+    # One history record per ticker for everything this call fetched
+    fresh = {label: snapshot for label, snapshot in results.items() if label in fetched}
+    if fresh:
+        record_quote_history(merge_snapshots(fresh, {}, futures))
+    return merge_snapshots(results, failed, futures)
+
+
+@progress.tracked
 def summarize_tts_input(step_input: StepInput) -> StepOutput:
     """Step 3.1: Prepare summarized input for ElevenLabs TTS tool"""
     api_results = step_input.previous_step_content
@@ -190,6 +367,7 @@ def summarize_tts_input(step_input: StepInput) -> StepOutput:
     return StepOutput(content=prompt.strip())
     
        
+@progress.tracked
 def prepare_tts_input(step_input: StepInput) -> StepOutput:
     """Step 4: Prepare input for ElevenLabs TTS tool"""
     summary_results = step_input.previous_step_content
@@ -205,44 +383,55 @@ def prepare_tts_input(step_input: StepInput) -> StepOutput:
     return StepOutput(content=prompt.strip())
     
 
-@tool
-def custom_elevenlabs_tts(text: str = "") -> str:
+@metrics.timed_tool("custom_elevenlabs_tts", is_error=lambda path: str(path).startswith("Error"))
+def synthesize_speech(text: str = "") -> str:
     """Generate audio using ElevenLabs client directly"""
-    api_key = os.getenv("ELEVENLABS_API_KEY")
-    
     # Clean text for TTS (remove markdown formatting)
     clean_text = text.replace("**", "").replace("|", "").replace("\n", " ").strip()
     
     try:
-        from elevenlabs import ElevenLabs
-        client = ElevenLabs(api_key=api_key)
-        
-        audio_generator = client.text_to_speech.convert(
-            text=clean_text,
-            voice_id="JBFqnCBsd6RMkjVDRZzb",
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128"
+        filename = audio_store.filename_for(
+            audio_store.key_for(clean_text, TTS_VOICE_ID, TTS_MODEL_ID, TTS_OUTPUT_FORMAT),
+            TTS_OUTPUT_FORMAT,
         )
         
-        # Create filename with timestamp
-        timestamp = int(time.time())
-        filename = f"audio_generations/tts_{timestamp}.mp3"
-        
-        # Save audio file
-        os.makedirs("audio_generations", exist_ok=True)
-        
-        with open(filename, "wb") as f:
-            for chunk in audio_generator:
-                f.write(chunk)
+        def synthesize():
+            client = transport.elevenlabs_client()
+            # The audio streams in while we iterate, so hold the vendor slot until done
+            with transport.host_slot("elevenlabs", "api.elevenlabs.io"):
+                yield from client.text_to_speech.convert(
+                    text=clean_text,
+                    voice_id=TTS_VOICE_ID,
+                    model_id=TTS_MODEL_ID,
+                    output_format=TTS_OUTPUT_FORMAT
+                )
         
-        # Return absolute path
-        abs_path = os.path.abspath(filename)
-        return abs_path
+        # Identical text is served from the audio store without calling ElevenLabs
+        if TTS_STREAMING:
+            # Return as soon as audio starts arriving; /audio streams the rest
+            return audio_store.stream(filename, synthesize)
+        return audio_store.get_or_create(filename, synthesize)
         
     except Exception as e:
         return f"Error: Failed to generate audio: {str(e)}"
+
+
+@tool
+def custom_elevenlabs_tts(text: str = "") -> str:
+    """Generate audio using ElevenLabs client directly"""
+    return synthesize_speech(text)
+
+
+@progress.tracked
+def synthesize_speech_step(step_input: StepInput) -> StepOutput:
+    """Step 4-5 (direct mode): Convert the summary to speech without an agent hop"""
+    audio_path = synthesize_speech(step_input.previous_step_content or "")
+    run_context.put("audio_path", audio_path)
+    progress.report("audio_ready", audio_path=audio_path)
+    return StepOutput(content=audio_path)
         
 
+@progress.tracked
 def prepare_phone_input(step_input: StepInput) -> StepOutput:
     """Step 6: Prepare input for phone agent using TTS result as the message"""
     phone_number = read_manager_phone_from_json("senior_manager.json") 
@@ -250,6 +439,9 @@ def prepare_phone_input(step_input: StepInput) -> StepOutput:
         phone_number = "+16473236920"
 
     tts_result = step_input.previous_step_content
+    run_context.put("audio_path", tts_result)
+    progress.report("audio_ready", audio_path=tts_result)
+    report_calling()
 
     prompt = f"""
     Make a phone call to {phone_number} using the twilio_function.
@@ -267,73 +459,97 @@ def prepare_phone_input(step_input: StepInput) -> StepOutput:
     return step_output
 
 
-@tool
-def twilio_function(message: str = "") -> str:
+# Approval requests that queue behind a call in flight share the next one, gathering one digit per recommendation
+approval_batcher = ApprovalBatcher(
+    lambda to_number, messages: call_and_collect(to_number, messages, timeout_sec=45 + 20 * (len(messages) - 1)),
+    window=env_float("APPROVAL_BATCH_WINDOW", 0.0),
+    max_items=env_int("APPROVAL_BATCH_MAX_ITEMS", 5),
+)
+
+
+@metrics.timed_tool(
+    "twilio_function",
+    is_error=lambda result: result["call_status"] != "completed" or result["digit_pressed"].startswith("error"),
+)
+def place_approval_call(message: str = "") -> dict:
     """Make a phone call using Twilio API and collect user input"""
     receiver_number = read_manager_phone_from_json("senior_manager.json")
     if not receiver_number:
         receiver_number = "+16473236920"
 
     try:
-        digit = call_and_collect(
-            receiver_number,  
-            message,
-            timeout_sec=45
-        )
-        # Return both the message and the pressed digit in JSON format
-        import json
+        call_id = run_context.get("speculative_call")
+        if call_id:
+            # Already ringing (or answered and holding): hand it the message
+            attach_message(call_id, message)
+            digit = wait_for_result(call_id, timeout_sec=45)
+        else:
+            # Requests arriving together share one call to the manager
+            digit = approval_batcher.submit(receiver_number, message)
+        # Return both the message and the pressed digit
         result = {
             "message_sent": message,
             "digit_pressed": digit,
             "call_status": "completed"
         }
-        return json.dumps(result)
     except Exception as e:
-        import json
         result = {
             "message_sent": message,
             "digit_pressed": "",
             "call_status": "failed",
             "error": str(e)
         }
-        return json.dumps(result)
+    run_context.put("call_result", result)
+    return result
+
+
+@tool
+def twilio_function(message: str = "") -> str:
+    """Make a phone call using Twilio API and collect user input"""
+    import json
+    return json.dumps(place_approval_call(message))
+
+
+@progress.tracked
+def approval_call_step(step_input: StepInput) -> StepOutput:
+    """Step 6-7 (direct mode): Call the manager with the audio and collect the keypress"""
+    message = step_input.previous_step_content or ""
+    report_calling()
+    return StepOutput(content=place_approval_call(message))
         
 
+@progress.tracked
 def capture_summary_for_final(step_input: StepInput) -> StepOutput:
     """Step 3.2: Capture summary results and store for final step"""
     summary_results = step_input.previous_step_content
     
-    # Store summary in a temporary file that can be accessed by final step
-    import json
-    
-    # Create a unique identifier for this workflow run
-    workflow_id = str(int(time.time() * 1000))  # Use milliseconds for uniqueness
+    # Keep the summary with this run so the final step returns the right one
+    run_context.put("summary", summary_results)
     
-    # Store summary in temporary file
-    temp_dir = "tmp"
-    os.makedirs(temp_dir, exist_ok=True)
-    summary_file = os.path.join(temp_dir, f"summary_{workflow_id}.json")
-    
-    with open(summary_file, 'w') as f:
-        json.dump({
-            'summary': summary_results,
-            'timestamp': time.time(),
-            'workflow_id': workflow_id
-        }, f)
+    progress.report("summary_ready", summary=summary_results)
     
     # Pass the summary forward while preparing for TTS
     step_output = StepOutput(content=summary_results)
     return step_output
 
+APPROVAL_MESSAGES = {
+    "approved": "Even the senior manager thinks this is a great idea!",
+    "declined": "Sorry, I can't help them today",
+    "no_answer": "The senior manager didn't answer, so I can't approve this today",
+    "failed": "I couldn't reach the senior manager to approve this today",
+}
+
+
+@progress.tracked
 def handle_approval_step(step_input: StepInput) -> StepOutput:
     """Step 8: Handle approval response and return final result with summary and audio"""
     twilio_result = step_input.previous_step_content
     
-    # Parse Twilio result (now in JSON format)
+    # Parse Twilio result (a dict in direct mode, JSON from the phone agent)
     import json
     twilio_data = {}
     try:
-        twilio_data = json.loads(twilio_result)
+        twilio_data = twilio_result if isinstance(twilio_result, dict) else json.loads(twilio_result)
     except:
         # Fallback for old format
         twilio_data = {
@@ -342,52 +558,28 @@ def handle_approval_step(step_input: StepInput) -> StepOutput:
             "call_status": "completed"
         }
     
-    # Try to get the summary from stored file
-    summary_results = "Stock analysis completed."  # Default fallback
+    # Get the summary recorded earlier in this run
+    summary_results = run_context.get("summary") or "Stock analysis completed."
     
-    try:
-        # Look for recent summary files
-        temp_dir = "tmp"
-        if os.path.exists(temp_dir):
-            summary_files = [f for f in os.listdir(temp_dir) if f.startswith('summary_') and f.endswith('.json')]
-            if summary_files:
-                # Get the most recent summary file
-                latest_file = max(summary_files, key=lambda x: os.path.getctime(os.path.join(temp_dir, x)))
-                summary_path = os.path.join(temp_dir, latest_file)
-                
-                with open(summary_path, 'r') as f:
-                    data = json.load(f)
-                    summary_results = data.get('summary', summary_results)
-                
-                # Clean up the temp file after reading
-                try:
-                    os.remove(summary_path)
-                except:
-                    pass
-    except Exception as e:
-        print(f"Error reading summary: {e}")
-    
-    digit_pressed = twilio_data.get('digit_pressed', '')
+    # Same decision as the response envelope's approval.status
+    approval = responses.approval_for(twilio_data, "") or {"status": "failed", "digit": ""}
+    approval_message = APPROVAL_MESSAGES[approval["status"]]
+    progress.report(approval["status"], digit=approval["digit"])
     
-    if "1" in digit_pressed:
-        approval_message = "Even the senior manager thinks this is a great idea!"
-    else:
-        approval_message = "Sorry, I can't help them today"
-    
-    # Return only summary_result and final_response to frontend
+    # Return summary_result, final_response and the audio path to frontend
     final_content = {
         'summary_result': summary_results,
-        'final_response': approval_message
+        'final_response': approval_message,
+        'audio_path': run_context.get("audio_path")
     }
     
     return StepOutput(content=final_content)
 
 # Define agents
-api_agent = Agent(
-    name="API Agent",
+wording_agent = Agent(
+    name="Wording Agent",
     model=Claude(id="claude-sonnet-4-0"),
-    tools=[custom_api_function],
-    role="Fetch data from external APIs based on user queries",
+    role="Reword ranked stock lists without changing their content",
 )
 
 summarizer_agent = Agent(
@@ -423,29 +615,98 @@ approval_agent = Agent(
 )
 
 
+# Ranking is computed locally; the LLM hop only rewords it when enabled
+ranking_steps = [rank_stocks]  # Step 2: Fetch market data and rank top movers
+if RANKING_LLM_WORDING:
+    ranking_steps += [
+        prepare_wording_input,  # Step 2.1: Prepare wording prompt
+        wording_agent,          # Step 2.2: Reword the ranked list
+    ]
+
+def agent_step(agent: Agent):
+    """Run an agent as a workflow step within its token budget, recording its latency and token usage"""
+    step_name = agent.name.lower().replace(" ", "_")
+    
+    def run_agent(step_input: StepInput) -> StepOutput:
+        response = agent.run(budget_input(step_name, step_input.previous_step_content))
+        metrics.record_tokens(step_name, response)
+        return StepOutput(content=response.content)
+    
+    run_agent.__name__ = step_name
+    return run_agent
+
+
+def timed_in_run(step):
+    """Keep the step's duration with the run, for the timings in the chat response"""
+    @functools.wraps(step)
+    def wrapper(step_input):
+        start = time.perf_counter()
+        try:
+            return step(step_input)
+        finally:
+            timings = run_context.get("timings") or {}
+            timings[step.__name__] = round((time.perf_counter() - start) * 1000, 1)
+            run_context.put("timings", timings)
+    return wrapper
+
+
+def instrumented(step):
+    """Wrap a workflow step (function or agent) with latency/error metrics and per-run timings"""
+    if isinstance(step, Agent):
+        step = agent_step(step)
+    return metrics.timed_step(timed_in_run(step))
+
+
+# Direct mode runs the tool-only steps as plain Python; agent mode keeps the
+# original prompt + agent handoffs
+if WORKFLOW_STEP_MODE == "agent":
+    speech_and_call_steps = [
+        prepare_tts_input,      # Step 4: Prepare TTS input
+        tts_agent,              # Step 5: Convert to speech
+        prepare_phone_input,    # Step 6: Prepare phone input
+        phone_agent,            # Step 7: Make phone call
+    ]
+else:
+    speech_and_call_steps = [
+        synthesize_speech_step,  # Step 4-5: Convert to speech
+        approval_call_step,      # Step 6-7: Make phone call
+    ]
+
 # Create workflow (available for import)
 approval_workflow = Workflow(
     name="AI stocks picker Workflow",
     description="Get user input, call API, create speech, make phone call, and handle approval",
-    db=SqliteDb(
-        session_table="approval_workflow_session",
-        db_file="tmp/approval_workflow.db",
-    ),
-    steps=[
+    db=build_session_db(),
+    steps=[instrumented(step) for step in [
         get_user_input,         # Step 1: Get API input from user
-        prepare_api_input,      # Step 2: Prepare API input
-        api_agent,              # Step 3: Call API using custom tool
+        *ranking_steps,         # Step 2-3: Fetch and rank market data
         summarizer_agent,       # Step 3.1: Summarize text
         capture_summary_for_final,  # Step 3.2: Capture summary for final step
-        prepare_tts_input,      # Step 4: Prepare TTS input
-        tts_agent,              # Step 5: Convert to speech
-        prepare_phone_input,    # Step 6: Prepare phone input
-        phone_agent,            # Step 7: Make phone call
+        *speech_and_call_steps, # Step 4-7: Convert to speech and make phone call
         handle_approval_step    # Step 8: Handle approval and return result
+    ]],
+)
+
+
+# Cache effectiveness for the /metrics endpoint
+metrics.gauge_callback(
+    "cache_stat", "Hit/miss counters and sizes of the workflow caches", ["cache", "stat"],
+    lambda: [
+        ((name, stat), value)
+        for name, stats in (
+            ("market_snapshot", market_snapshot_cache.stats()),
+            ("generic_response", generic_response_cache.stats()),
+            ("tts_audio", audio_store.stats()),
+        )
+        for stat, value in stats.items()
     ],
 )
 
 if __name__ == "__main__":
-    result = approval_workflow.run()
+    with run_context.bind() as run_id:
+        try:
+            result = approval_workflow.run(session_id=run_id)
+        finally:
+            release_speculative_call()
     print("\n=== Workflow Result ===")
     print(result)
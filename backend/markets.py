@@ -0,0 +1,106 @@
+"""
+Market slices for the DataForSEO finance_markets endpoint and merging their results.
+
+A slice is one (location_code, market_type) request, e.g. 2840:gainers or
+2124:indexes/americas. MARKET_SLICES lists the slices to fetch; a query that
+names a market type or region (crypto, gainers, europe, ...) narrows the fetch
+to the matching slices.
+"""
+import json
+import re
+from typing import Dict, Iterable, List, NamedTuple
+
+# One paid request per cold query by default; list more slices to fan out
+DEFAULT_SLICES = "2124:indexes/americas"
+
+# Words in a user query that point at a market type or region
+SLICE_KEYWORDS = {
+    "cryptocurrencies": ("crypto", "cryptocurrency", "cryptocurrencies", "bitcoin", "ethereum"),
+    "gainers": ("gainer", "gainers", "mover", "movers", "momentum", "rising"),
+    "losers": ("loser", "losers", "falling"),
+    "most-active": ("active", "volume", "traded", "popular"),
+    "indexes": ("index", "indexes", "indices"),
+    "americas": ("america", "americas", "usa", "canada", "nasdaq", "nyse"),
+    "europe-middle-east-africa": ("europe", "european", "uk", "ftse", "dax"),
+    "asia-pacific": ("asia", "asian", "japan", "china", "nikkei", "pacific"),
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+class MarketSlice(NamedTuple):
+    location_code: int
+    market_type: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.location_code}:{self.market_type}"
+
+    def payload(self, language_code: str = "en") -> str:
+        return json.dumps([{
+            "location_code": self.location_code,
+            "language_code": language_code,
+            "market_type": self.market_type,
+        }])
+
+
+def parse_slices(spec: str) -> List[MarketSlice]:
+    """ "2840:gainers,2124:indexes/americas" -> slices; malformed entries are skipped"""
+    slices = []
+    for entry in (spec or "").split(","):
+        code, _, market_type = entry.strip().partition(":")
+        if code.strip().isdigit() and market_type.strip():
+            slices.append(MarketSlice(int(code), market_type.strip()))
+    return slices
+
+
+def slices_for_query(query: str, slices: List[MarketSlice]) -> List[MarketSlice]:
+    """The slices a query asks about, or all of them when it names none"""
+    words = set(_WORD_RE.findall((query or "").lower()))
+    if not words:
+        return slices
+    wanted = {part for part, keywords in SLICE_KEYWORDS.items() if words.intersection(keywords)}
+    matching = [s for s in slices if wanted.intersection(s.market_type.split("/"))]
+    return matching or slices
+
+
+def merge_snapshots(results: Dict[str, dict], failed: Dict[str, str], order: Iterable[str]) -> dict:
+    """
+    Merge per-slice snapshots into one, de-duplicated by ticker.
+
+    The first slice (in `order`) to list a ticker wins; later slices only fill
+    in fields it left empty. Succeeds when any slice did.
+    """
+    merged: Dict[str, dict] = {}
+    timestamps = []
+    for label in order:
+        snapshot = results.get(label)
+        if snapshot is None:
+            continue
+        if snapshot.get("timestamp"):
+            timestamps.append(snapshot["timestamp"])
+        for stock in snapshot.get("trending_stocks", []):
+            symbol = stock.get("symbol") or stock.get("name")
+            if not symbol:
+                continue
+            existing = merged.get(symbol)
+            if existing is None:
+                merged[symbol] = dict(stock)
+            else:
+                for key, value in stock.items():
+                    if existing.get(key) is None:
+                        existing[key] = value
+
+    if not results:
+        return {"status": "error", "message": "No data found", "failed_slices": failed}
+
+    stocks = list(merged.values())
+    return {
+        "status": "success",
+        "timestamp": max(timestamps) if timestamps else "",
+        "trending_stocks": stocks,
+        "total_stocks_found": len(stocks),
+        "slices": list(results),
+        "failed_slices": failed,
+        "partial": bool(failed),
+    }
@@ -0,0 +1,210 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain dicts keyed by label values behind one lock,
+so recording costs a dict lookup and a few additions. Gauges are read from
+callbacks (cache stats, pool stats, queue depths) only when /metrics is scraped.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+_lock = threading.Lock()
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        key = tuple(str(v) for v in label_values)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values) -> float:
+        with _lock:
+            return self._values.get(tuple(str(v) for v in label_values), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values):
+        key = tuple(str(v) for v in label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, *label_values) -> Optional[Tuple[List[float], float, int]]:
+        """(per-bucket counts, sum, count) for one label set"""
+        with _lock:
+            series = self._values.get(tuple(str(v) for v in label_values))
+            if series is None:
+                return None
+            counts = list(series[:-1])
+        return counts, series[-1], int(sum(counts))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labels, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose samples come from a callback at scrape time"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            for label_values, value in self.collect():
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        except Exception as e:
+            print(f"Metrics collection failed for {self.name}: {e}")
+        return lines
+
+
+_registry: Dict[str, object] = {}
+
+
+def _register(metric):
+    with _lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help_text, labels, buckets))
+
+
+def gauge_callback(name: str, help_text: str, labels: Sequence[str], collect) -> GaugeCallback:
+    return _register(GaugeCallback(name, help_text, labels, collect))
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format"""
+    with _lock:
+        metrics = list(_registry.values())
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Shared metrics used across the workflow, tools and routes
+step_seconds = histogram("workflow_step_duration_seconds", "Latency of each approval workflow step", ["step"])
+step_errors = counter("workflow_step_errors_total", "Workflow steps that raised", ["step"])
+tool_seconds = histogram("tool_duration_seconds", "Latency of each vendor tool call", ["tool"])
+tool_errors = counter("tool_errors_total", "Vendor tool calls that failed", ["tool"])
+http_seconds = histogram("http_request_duration_seconds", "Flask route latency", ["route", "method", "status"])
+llm_tokens = counter("llm_tokens_total", "LLM tokens used", ["step", "kind"])
+tts_audio_bytes = histogram("tts_audio_bytes", "Size of synthesised TTS clips", [], buckets=BYTES_BUCKETS)
+
+
+def timed_step(fn):
+    """Record latency and errors for a workflow function step"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            step_errors.inc(fn.__name__)
+            raise
+        finally:
+            step_seconds.observe(time.perf_counter() - start, fn.__name__)
+    return wrapper
+
+
+def timed_tool(name: str, is_error: Callable[[object], bool] = lambda result: False):
+    """Record latency and failures for a vendor tool; is_error flags failures returned as values"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                tool_errors.inc(name)
+                raise
+            finally:
+                tool_seconds.observe(time.perf_counter() - start, name)
+            if is_error(result):
+                tool_errors.inc(name)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_tokens(step: str, run_output):
+    """Add the token usage reported on an agent run output"""
+    usage = getattr(run_output, "metrics", None)
+    if usage is None:
+        return
+    for kind in ("input_tokens", "output_tokens"):
+        value = getattr(usage, kind, None)
+        if isinstance(value, list):  # older agno versions report one entry per model call
+            value = sum(value)
+        if value:
+            llm_tokens.inc(step, kind.replace("_tokens", ""), amount=value)
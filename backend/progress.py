@@ -0,0 +1,44 @@
+"""
+Workflow progress reporting.
+
+Steps call `report(event, **data)`; whoever runs the workflow decides where the
+events go by wrapping the run in `reporting_to(callback)`. Outside of that
+context reporting is a no-op, so plain `approval_workflow.run()` is unaffected.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+_reporter: ContextVar[Optional[Callable[[str, dict], None]]] = ContextVar("progress_reporter", default=None)
+
+
+def report(event: str, **data):
+    """Emit a progress event to the current run's reporter, if any"""
+    reporter = _reporter.get()
+    if reporter is None:
+        return
+    try:
+        reporter(event, data)
+    except Exception as e:
+        print(f"Progress reporter failed for {event}: {e}")
+
+
+@contextmanager
+def reporting_to(callback: Callable[[str, dict], None]):
+    """Send progress events emitted in this context to callback(event, data)"""
+    token = _reporter.set(callback)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+def tracked(fn):
+    """Report `step_completed` after a workflow function step returns"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        report("step_completed", step=fn.__name__)
+        return result
+    return wrapper
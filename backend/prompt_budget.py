@@ -0,0 +1,119 @@
+"""
+Compact prompt inputs and per-step token budgets for the Claude hops.
+
+Market snapshots are encoded for a prompt as a pipe-separated table (one
+header line, then one line per quote with only the columns ranking uses and
+rounded numbers) instead of a dict repr that repeats every key name on every
+row.
+Each LLM step has a token budget (LLM_TOKEN_BUDGET, or
+LLM_TOKEN_BUDGET_<STEP> for one step); inputs over it lose their last
+rows/lines before the prompt is built.
+
+Token counts are estimated locally at ~4 characters per token, which is close
+enough for budgeting English and tickers without a round trip to the API; the
+exact usage each run reports is still recorded in llm_tokens_total.
+"""
+from typing import Optional
+
+import metrics
+from config import env_int
+from ranking import QuoteTable
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 2000
+
+prompt_tokens = metrics.histogram(
+    "llm_prompt_tokens", "Estimated prompt tokens per LLM step, before (raw) and after (sent) compaction",
+    ["step", "stage"], buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000),
+)
+prompt_truncations = metrics.counter(
+    "llm_prompt_truncations_total", "LLM inputs cut to fit their step's token budget", ["step"]
+)
+
+
+def estimate_tokens(text) -> int:
+    if not isinstance(text, str):
+        text = str(text)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def budget_for(step: str) -> int:
+    """Token budget for a step (0 = unlimited)"""
+    return env_int(f"LLM_TOKEN_BUDGET_{step.upper()}", env_int("LLM_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+def record_prompt(step: str, raw, sent: str):
+    prompt_tokens.observe(estimate_tokens(raw), step, "raw")
+    prompt_tokens.observe(estimate_tokens(sent), step, "sent")
+
+
+def _cell(value: str) -> str:
+    return value.replace("|", "/").replace("\n", " ")
+
+
+def encode_quotes(snapshot, max_tokens: int = 0, step: Optional[str] = None) -> str:
+    """
+    A snapshot as "symbol|name|price|chg%" rows, strongest movers first (the
+    order ranking reads them in), so rows cut to fit max_tokens are the ones
+    ranking would have skipped anyway
+    """
+    table = QuoteTable.from_snapshot(snapshot)
+    order = sorted(range(len(table)), key=lambda i: (-table.change_percents[i], table.symbols[i]))
+
+    unique, seen = [], set()
+    for i in order:
+        if table.symbols[i] not in seen:
+            seen.add(table.symbols[i])
+            unique.append(i)
+
+    header = "symbol|name|price|chg%"
+    used = estimate_tokens(header) + 16  # room for the summary line
+    rows = []
+    for i in unique:
+        price = table.prices[i]
+        row = "|".join((
+            _cell(table.symbols[i]),
+            _cell(table.names[i]),
+            "" if price != price else f"{price:.2f}",
+            f"{table.change_percents[i]:+.1f}",
+        ))
+        cost = estimate_tokens(row) + 1
+        if max_tokens and used + cost > max_tokens:
+            if step:
+                prompt_truncations.inc(step)
+            break
+        rows.append(row)
+        used += cost
+
+    summary = f"quotes: {len(rows)} of {len(unique)}"
+    if isinstance(snapshot, dict) and snapshot.get("timestamp"):
+        summary += f" at {snapshot['timestamp']}"
+    return "\n".join([summary, header, *rows])
+
+
+def fit_to_budget(text: str, max_tokens: int, step: Optional[str] = None) -> str:
+    """Keep whole lines of text up to max_tokens, noting how many were dropped"""
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens - 8:
+            break
+        kept.append(line)
+        used += cost
+    if not kept and lines:
+        # One oversized line: cut it instead of sending nothing
+        kept = [lines[0][:max(max_tokens - 8, 1) * CHARS_PER_TOKEN]]
+    if step:
+        prompt_truncations.inc(step)
+    return "\n".join(kept + [f"... ({len(lines) - len(kept)} more lines omitted)"])
+
+
+def budget_input(step: str, text) -> str:
+    """An agent step's input cut to the step's budget, recording its size before and after"""
+    raw = text if isinstance(text, str) else str(text)
+    sent = fit_to_budget(raw, budget_for(step), step)
+    record_prompt(step, raw, sent)
+    return sent
@@ -0,0 +1,184 @@
+"""
+Append-only history of market snapshot quotes.
+
+Every fetched snapshot is appended as fixed-width records (timestamp, ticker,
+price, signed percent change) to one flat file. Reads memory-map the file as a
+NumPy structured array, so trend statistics over thousands of snapshots are a
+few vectorised passes and no per-row Python objects.
+"""
+import os
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from ranking import change_percent_for, to_float
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),        # unix seconds when the snapshot was fetched
+    ("ticker", "S24"),
+    ("price", "<f8"),     # NaN when the API gave none
+    ("change", "<f8"),    # percent move, negative for downtrends
+])
+
+
+class Momentum(NamedTuple):
+    return_percent: float  # price change across the window
+    volatility: float      # std of snapshot-to-snapshot log returns, in percent
+    streak: int            # consecutive latest snapshots with a positive move
+    samples: int
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+    else:
+        # Lock the first byte; appends still go to the end of the file
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class QuoteHistory:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: Optional[np.memmap] = None
+        self._mapped_bytes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def append_snapshot(self, snapshot, timestamp: Optional[int] = None) -> int:
+        """Append the quotes of a parsed snapshot, once per ticker; returns the number of records written"""
+        if not isinstance(snapshot, dict):
+            return 0
+        rows = [row for row in snapshot.get("trending_stocks", []) if isinstance(row, dict)]
+        records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        ts = int(timestamp if timestamp is not None else time.time())
+        count = 0
+        seen = set()
+        for row in rows:
+            symbol = row.get("symbol") or row.get("ticker")
+            change = change_percent_for(row)
+            if not symbol or change is None or symbol in seen:
+                continue
+            seen.add(symbol)
+            price = to_float(row.get("price"))
+            records[count] = (ts, str(symbol).encode("utf-8")[:24], np.nan if price is None else price, change)
+            count += 1
+        if count:
+            self.append(records[:count])
+        return count
+
+    def append(self, records: np.ndarray):
+        """Append whole records; the file lock keeps writers in other workers from interleaving"""
+        data = np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes()
+        with self._lock, open(self.path, "ab") as f:
+            _lock_file(f)
+            try:
+                # A crash mid-write can leave a partial record; drop it so later records stay aligned
+                size = os.fstat(f.fileno()).st_size
+                partial = size % RECORD_DTYPE.itemsize
+                if partial:
+                    f.truncate(size - partial)
+                f.write(data)
+            finally:
+                _unlock_file(f)
+
+    def records(self) -> np.ndarray:
+        """Read-only memory-mapped view of every complete record"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        count = size // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        with self._lock:
+            # Remap only when the file has grown
+            if self._map is None or self._mapped_bytes != count * RECORD_DTYPE.itemsize:
+                self._map = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+                self._mapped_bytes = count * RECORD_DTYPE.itemsize
+            return self._map
+
+    def _recent_rows(self, wanted: np.ndarray, window: int, max_records: int) -> np.ndarray:
+        """
+        Rows for the wanted tickers from the end of the file. Records are in
+        append (time) order, so we scan a growing tail until every ticker has
+        `window` rows, instead of the whole history.
+        """
+        data = self.records()
+        limit = min(len(data), max_records)
+        tail = min(limit, max(4096, window * len(wanted) * 8))
+        while True:
+            chunk = data[len(data) - tail:]
+            rows = chunk[np.isin(chunk["ticker"], wanted)]
+            if tail >= limit:
+                return rows
+            found, counts = np.unique(rows["ticker"], return_counts=True)
+            if len(found) == len(wanted) and counts.min() >= window:
+                return rows
+            tail = min(limit, tail * 4)
+
+    def momentum(self, tickers: Iterable[str], window: int = 20, max_records: int = 250_000) -> Dict[str, Momentum]:
+        """Rolling return, volatility and streak over each ticker's last `window` snapshots"""
+        wanted = np.unique(np.array([str(t).encode("utf-8")[:24] for t in tickers], dtype="S24"))
+        if not len(wanted) or not len(self.records()):
+            return {}
+
+        rows = self._recent_rows(wanted, window, max_records)
+        rows = rows[~np.isnan(rows["price"])]
+        if not len(rows):
+            return {}
+
+        # Group by ticker in time order, then keep each group's last `window` rows
+        rows = rows[np.lexsort((rows["ts"], rows["ticker"]))]
+        names, starts, counts = np.unique(rows["ticker"], return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(names)), counts)
+        position = np.arange(len(rows)) - starts[group]
+        keep = position >= counts[group] - window
+        rows, group, position = rows[keep], group[keep], position[keep]
+        counts = np.bincount(group, minlength=len(names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        position = np.arange(len(rows)) - starts[group]
+        ends = starts + counts - 1
+
+        prices = rows["price"]
+        first, last = prices[starts], prices[ends]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.where(first > 0, (last / first - 1) * 100, 0.0)
+
+            # Log returns between consecutive snapshots of the same ticker
+            steps = np.diff(np.log(np.where(prices > 0, prices, np.nan)))
+            same = group[1:] == group[:-1]
+            steps = np.where(same & np.isfinite(steps), steps, 0.0)
+            step_counts = np.bincount(group[1:], weights=same, minlength=len(names))
+            mean = np.bincount(group[1:], weights=steps, minlength=len(names)) / np.maximum(step_counts, 1)
+            mean_sq = np.bincount(group[1:], weights=steps ** 2, minlength=len(names)) / np.maximum(step_counts, 1)
+            volatility = np.sqrt(np.maximum(mean_sq - mean ** 2, 0)) * 100
+
+        # Streak: rows after the last non-positive move in each group
+        last_down = np.maximum.reduceat(np.where(rows["change"] > 0, -1, position), starts)
+        streaks = counts - 1 - last_down
+
+        return {
+            name.decode("utf-8"): Momentum(float(returns[i]), float(volatility[i]), int(streaks[i]), int(counts[i]))
+            for i, name in enumerate(names)
+        }
+
+
+_path = os.getenv("QUOTE_HISTORY_PATH", "tmp/quote_history.bin")
+quote_history = QuoteHistory(_path) if _path else None
@@ -0,0 +1,149 @@
+"""
+Deterministic top-N ranking of market snapshot quotes.
+
+Replaces the LLM-side parse/filter/sort with a local, columnar pass over the
+`trending_stocks` rows returned by `fetch_market_snapshot`.
+"""
+from array import array
+from typing import Dict, List, NamedTuple, Optional
+
+
+class Quote(NamedTuple):
+    symbol: str
+    name: str
+    price: Optional[float]
+    change_percent: float
+    volume: float
+    market_cap: float
+
+
+def to_float(value) -> Optional[float]:
+    """Coerce API numerics (float, int, "1,234.5", "2.3%") to float"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").replace("%", "").strip())
+    except ValueError:
+        return None
+
+
+def change_percent_for(row: dict) -> Optional[float]:
+    """Get the percent move for a row, computing it from prices when missing"""
+    pct = None
+    for key in ("percentage_change", "change_percent", "changePercent", "percent_change", "pct_change"):
+        pct = to_float(row.get(key))
+        if pct is not None:
+            break
+
+    if pct is None:
+        price = to_float(row.get("price") or row.get("last_price"))
+        previous_close = to_float(row.get("previous_close"))
+        if previous_close is None and price is not None:
+            price_change = to_float(row.get("price_change"))
+            if price_change is not None:
+                previous_close = price - price_change
+        if price is None or not previous_close:
+            return None
+        pct = (price - previous_close) / previous_close * 100
+
+    # DataForSEO reports the delta unsigned and carries the direction in `trend`
+    if row.get("trend") == "down" and pct > 0:
+        pct = -pct
+    return pct
+
+
+class QuoteTable:
+    """Typed, column-oriented view over the snapshot rows"""
+
+    __slots__ = ("symbols", "names", "prices", "change_percents", "volumes", "market_caps")
+
+    def __init__(self):
+        self.symbols: List[str] = []
+        self.names: List[str] = []
+        self.prices = array("d")
+        self.change_percents = array("d")
+        self.volumes = array("d")
+        self.market_caps = array("d")
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def append(self, row: dict) -> bool:
+        """Add one API row; rows without a symbol or a usable percent are dropped"""
+        symbol = row.get("symbol") or row.get("ticker")
+        pct = change_percent_for(row)
+        if not symbol or pct is None:
+            return False
+
+        price = to_float(row.get("price") or row.get("last_price"))
+        self.symbols.append(str(symbol))
+        self.names.append(str(row.get("name") or symbol))
+        self.prices.append(price if price is not None else float("nan"))
+        self.change_percents.append(pct)
+        self.volumes.append(to_float(row.get("volume")) or 0.0)
+        self.market_caps.append(to_float(row.get("market_cap")) or 0.0)
+        return True
+
+    @classmethod
+    def from_rows(cls, rows) -> "QuoteTable":
+        table = cls()
+        for row in rows or []:
+            if isinstance(row, dict):
+                table.append(row)
+        return table
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "QuoteTable":
+        """Build a table from a `fetch_market_snapshot` result"""
+        if not isinstance(snapshot, dict):
+            return cls()
+        return cls.from_rows(snapshot.get("trending_stocks", []))
+
+    def quote(self, i: int) -> Quote:
+        price = self.prices[i]
+        return Quote(
+            symbol=self.symbols[i],
+            name=self.names[i],
+            price=None if price != price else price,
+            change_percent=self.change_percents[i],
+            volume=self.volumes[i],
+            market_cap=self.market_caps[i],
+        )
+
+    def top_movers(self, limit: int = 3, boost: Optional[Dict[str, float]] = None) -> List[Quote]:
+        """
+        Positive movers by change percent (plus any per-symbol boost, e.g. from
+        trend history); ties go to volume, market cap, then symbol. A symbol
+        listed more than once is ranked by its best row.
+        """
+        pct, vol, cap, sym = self.change_percents, self.volumes, self.market_caps, self.symbols
+        boost = boost or {}
+        candidates = [i for i in range(len(sym)) if pct[i] > 0]
+        candidates.sort(key=lambda i: (-(pct[i] + boost.get(sym[i], 0.0)), -vol[i], -cap[i], sym[i]))
+        seen = set()
+        picks = []
+        for i in candidates:
+            if len(picks) >= limit:
+                break
+            if sym[i] not in seen:
+                seen.add(sym[i])
+                picks.append(self.quote(i))
+        return picks
+
+
+def rank_snapshot(snapshot, limit: int = 3, boost: Optional[Dict[str, float]] = None) -> List[Quote]:
+    """Top `limit` positive movers from a market snapshot"""
+    return QuoteTable.from_snapshot(snapshot).top_movers(limit, boost)
+
+
+def format_top_picks(picks: List[Quote]) -> str:
+    """Render picks in the format the summarizer and frontend expect"""
+    if not picks:
+        return "I have found 0 stocks with positive performance right now."
+
+    lines = [f"I have found {len(picks)} stocks with the most potential:"]
+    for position, quote in enumerate(picks, start=1):
+        lines.append(f"    {position} - {quote.name} ({quote.symbol}) {quote.change_percent:+.1f}%")
+    return "\n".join(lines)
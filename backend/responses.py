@@ -0,0 +1,142 @@
+"""
+The JSON contract for chat answers, and the app's JSON encoder.
+
+/api/chat, finished chat jobs and the finance `done` event of /api/chat/stream
+all carry one envelope (streamed generic answers arrive as `token` events):
+
+    {
+      "ok": bool, "is_finance": bool,
+      "response": str,                 # display text (markdown), always present
+      "picks": [{"rank", "symbol", "name", "price", "change_percent"}],
+      "summary": str | null,
+      "approval": {"status", "digit", "message"} | null,
+      "audio_url": str | null,         # relative, e.g. /audio/<clip>.mp3
+      "timings": {"total_ms": float, "steps": {step: ms}},
+      "cached": bool, "error": str     # generic answers / failures only
+    }
+
+approval.status is approved, declined, no_answer (timeout) or failed.
+Responses are encoded once with orjson.
+"""
+import os
+from typing import Dict, List, Optional
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from audio_store import audio_store
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; falls back to Flask's defaults for types orjson doesn't know"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dump_bytes(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def dump_bytes(self, obj, indent: bool = False) -> bytes:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dump_bytes(obj, indent) + b"\n", mimetype=self.mimetype
+        )
+
+
+def approval_for(call_result: Optional[dict], message: str) -> Optional[dict]:
+    """The manager's decision from place_approval_call's result"""
+    if not isinstance(call_result, dict):
+        return None
+    digit = str(call_result.get("digit_pressed") or "")
+    if call_result.get("call_status") != "completed" or digit.startswith("error"):
+        status = "failed"
+    elif digit == "timeout":
+        status = "no_answer"
+    elif "1" in digit:
+        status = "approved"
+    else:
+        status = "declined"
+    return {"status": status, "digit": digit, "message": message}
+
+
+def audio_url_for(audio_path: Optional[str]) -> Optional[str]:
+    """/audio URL of a synthesised clip, or None when TTS failed"""
+    filename = os.path.basename(audio_path or "")
+    return f"/audio/{filename}" if audio_store.valid_name(filename) else None
+
+
+def picks_from(ranking: Optional[dict]) -> List[dict]:
+    picks = (ranking or {}).get("picks") or []
+    return [
+        {
+            "rank": position,
+            "symbol": pick.get("symbol"),
+            "name": pick.get("name"),
+            "price": pick.get("price"),
+            "change_percent": round(pick.get("change_percent") or 0.0, 2),
+        }
+        for position, pick in enumerate(picks, start=1)
+    ]
+
+
+def display_text(summary: Optional[str], final_response: Optional[str]) -> str:
+    if summary and final_response:
+        return f"**Summary:**\n{summary}\n\n**Recommendation:**\n{final_response}"
+    return final_response or summary or ""
+
+
+def finance_response(content, run_state: Dict, total_seconds: float) -> dict:
+    """Envelope for a finished approval workflow run; run_state is its run_context snapshot"""
+    text = "" if isinstance(content, dict) else str(content or "")
+    content = content if isinstance(content, dict) else {}
+    summary = content.get("summary_result") or run_state.get("summary")
+    final_response = content.get("final_response")
+    ranking = run_state.get("ranking")
+    return {
+        "ok": True,
+        "is_finance": True,
+        "response": display_text(summary, final_response) or text or (ranking or {}).get("text", ""),
+        "picks": picks_from(ranking),
+        "summary": summary,
+        "approval": approval_for(run_state.get("call_result"), final_response or ""),
+        "audio_url": audio_url_for(content.get("audio_path") or run_state.get("audio_path")),
+        "timings": {
+            "total_ms": round(total_seconds * 1000, 1),
+            "steps": run_state.get("timings") or {},
+        },
+    }
+
+
+def generic_response(text: str, cached: bool, total_seconds: float) -> dict:
+    return {
+        "ok": True,
+        "is_finance": False,
+        "response": text,
+        "picks": [],
+        "summary": None,
+        "approval": None,
+        "audio_url": None,
+        "timings": {"total_ms": round(total_seconds * 1000, 1), "steps": {}},
+        "cached": cached,
+    }
+
+
+def error_response(message: str, is_finance: bool, total_seconds: float = 0.0) -> dict:
+    return {
+        "ok": False,
+        "is_finance": is_finance,
+        "response": message,
+        "picks": [],
+        "summary": None,
+        "approval": None,
+        "audio_url": None,
+        "timings": {"total_ms": round(total_seconds * 1000, 1), "steps": {}},
+        "error": message,
+    }
@@ -0,0 +1,143 @@
+"""
+Run-scoped state shared between workflow steps.
+
+The caller binds a run id (the workflow session id) around
+`approval_workflow.run`, and steps read and write structured results for that
+run only, so concurrent requests never see each other's data.
+
+Backends (RUN_CONTEXT_BACKEND):
+- memory: in-process dict, no disk round trips (default)
+- sqlite: rows in the workflow's SQLite database, so any worker can read them
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+_current_run: ContextVar[Optional[str]] = ContextVar("workflow_run_id", default=None)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, Any]] = {}
+
+    def put(self, run_id: str, key: str, value: Any):
+        with self._lock:
+            self._runs.setdefault(run_id, {})[key] = value
+
+    def get(self, run_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._runs.get(run_id, {}).get(key, default)
+
+    def snapshot(self, run_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._runs.get(run_id, {}))
+
+    def release(self, run_id: str):
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+class SqliteBackend:
+    """Stores each value as JSON next to the workflow session table"""
+
+    def __init__(self, db_file: str, table: str = "approval_workflow_run_context"):
+        self.db_file = db_file
+        self.table = table
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "run_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (run_id, key))"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file, timeout=10)
+        return conn
+
+    def put(self, run_id: str, key: str, value: Any):
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (run_id, key, value, updated_at) VALUES (?, ?, ?, ?)",
+            (run_id, key, json.dumps(value), time.time()),
+        )
+        conn.commit()
+
+    def get(self, run_id: str, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            f"SELECT value FROM {self.table} WHERE run_id = ? AND key = ?", (run_id, key)
+        ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def snapshot(self, run_id: str) -> Dict[str, Any]:
+        rows = self._conn().execute(
+            f"SELECT key, value FROM {self.table} WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def release(self, run_id: str):
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE run_id = ?", (run_id,))
+        conn.commit()
+
+
+def _make_backend():
+    if os.getenv("RUN_CONTEXT_BACKEND", "memory") == "sqlite":
+        return SqliteBackend(os.getenv("RUN_CONTEXT_DB", "tmp/approval_workflow.db"))
+    return MemoryBackend()
+
+
+backend = _make_backend()
+
+
+def new_run_id() -> str:
+    return str(uuid.uuid4())
+
+
+@contextmanager
+def bind(run_id: Optional[str] = None, release: bool = True):
+    """Make run_id the current run for the steps executed in this context"""
+    run_id = run_id or new_run_id()
+    token = _current_run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run.reset(token)
+        if release:
+            backend.release(run_id)
+
+
+def current_run_id() -> Optional[str]:
+    return _current_run.get()
+
+
+def put(key: str, value: Any):
+    """Record a step result for the current run (ignored when no run is bound)"""
+    run_id = _current_run.get()
+    if run_id is not None:
+        backend.put(run_id, key, value)
+
+
+def get(key: str, default: Any = None) -> Any:
+    """Read a step result recorded earlier in the current run"""
+    run_id = _current_run.get()
+    if run_id is None:
+        return default
+    return backend.get(run_id, key, default)
+
+
+def snapshot() -> Dict[str, Any]:
+    """All results recorded so far in the current run"""
+    run_id = _current_run.get()
+    return {} if run_id is None else backend.snapshot(run_id)
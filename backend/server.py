@@ -1,32 +1,79 @@
 import os
 import json
+import threading
 import time
 import uuid
+from typing import Dict, List, Optional, Union
 from urllib.parse import quote_plus
 
-from flask import Flask, request, jsonify, Response, send_file
+from flask import Flask, request, jsonify, Response, g, send_file, stream_with_context
 from flask_cors import CORS
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse, Gather
 from dotenv import load_dotenv
 
+# Load .env before the modules below read their settings at import time
 load_dotenv()
 
-# File-based storage for call results - no in-memory data
-CALL_RESULTS_DIR = "call_results"
+SERVER_MODE = os.getenv("SERVER_MODE", "development")
+if SERVER_MODE == "production":
+    # Workers are separate processes: any of them may take a Twilio webhook or
+    # a chat request, so call results and run state go through shared stores
+    for name, value in (("CALL_WAIT_MODE", "socket"), ("RUN_CONTEXT_BACKEND", "sqlite"), ("MARKET_CACHE_BACKEND", "sqlite")):
+        os.environ.setdefault(name, value)
+
+import call_waiters
+import metrics
+import responses
+import run_context
+import transport
+from admission import AdmissionRejected, workflow_admission
+from audio_store import audio_store
+from config import env_flag, env_int
+from jobs import JobQueueFull, job_manager
+
+# File-based fallback for call results that no in-process waiter picked up
+CALL_RESULTS_DIR = os.getenv("CALL_RESULTS_DIR", "call_results")
 
 # Ensure results directory exists
 os.makedirs(CALL_RESULTS_DIR, exist_ok=True)
 
 # Initialize Twilio client and constants
-client = Client(os.getenv("account_sid"), os.getenv("auth_token"))
+client = Client(os.getenv("account_sid"), os.getenv("auth_token"), http_client=transport.twilio_http_client())
 TWILIO_FROM = os.getenv("TWILIO_PHONE_NUMBER")
 BASE_URL = os.getenv("BASE_URL", "https://217fc92e7298.ngrok-free.app")
 
+# Speculatively dialled calls poll for their message this often, for at most this long
+VOICE_HOLD_PAUSE = env_int("VOICE_HOLD_PAUSE", 2)
+VOICE_HOLD_MAX_SECONDS = env_int("VOICE_HOLD_MAX_SECONDS", 90)
+
 app = Flask(__name__)
+app.json = responses.OrjsonProvider(app)  # every jsonify/SSE payload is encoded once, by orjson
 CORS(app)  # Enable CORS for all routes
 
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.http_seconds.observe(time.perf_counter() - started, route, request.method, response.status_code)
+    return response
+
+
+metrics.gauge_callback(
+    "outbound_pool_stat", "Outbound HTTP requests, retries and connection reuse per vendor", ["vendor", "stat"],
+    lambda: [((vendor, stat), value) for vendor, stats in transport.pool_stats().items() for stat, value in stats.items()],
+)
+metrics.gauge_callback("chat_jobs_queued", "Chat jobs waiting for a worker", [], lambda: [((), job_manager.pending())])
+metrics.gauge_callback("calls_waiting", "Approval calls waiting for a keypress", [], lambda: [((), call_waiters.pending())])
+
+
 def save_call_result(request_id: str, digit: str):
     """Save call result to disk"""
     result_file = os.path.join(CALL_RESULTS_DIR, f"{request_id}.json")
@@ -36,8 +83,11 @@ def save_call_result(request_id: str, digit: str):
         "timestamp": time.time(),
         "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
     }
-    with open(result_file, 'w') as f:
+    # Write then rename so a worker polling for the file never reads it half-written
+    tmp_file = f"{result_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as f:
         json.dump(data, f)
+    os.replace(tmp_file, result_file)
 
 
 def get_call_result(request_id: str) -> str:
@@ -63,12 +113,48 @@ def cleanup_call_result(request_id: str):
             pass
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/transport/stats", methods=["GET"])
+def transport_stats():
+    """Outbound connection pool statistics per vendor"""
+    return jsonify({
+        "ok": True,
+        "pools": transport.pool_stats()
+    })
+
+
+def client_id_for_request() -> str:
+    """Who a request is from, for fair queueing: X-Client-Id, else the (forwarded) client address"""
+    return request.headers.get("X-Client-Id") or (request.access_route[0] if request.access_route else "unknown")
+
+
+def busy_response(rejected: AdmissionRejected):
+    """429 with Retry-After for a request admission control turned away"""
+    message = f"Too many stock requests are in progress right now. Please try again in about {rejected.retry_after} seconds."
+    response = jsonify({**responses.error_response(message, is_finance=True), "reason": rejected.reason, "retry_after": rejected.retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(rejected.retry_after)
+    return response
+
+
 @app.route("/my-api/agent", methods=["GET"])
 def run_workflow():
     """Run the approval workflow via HTTP endpoint"""
     import main
 
-    result = main.approval_workflow.run()
+    try:
+        with workflow_admission.admit(client_id_for_request()), run_context.bind() as run_id:
+            try:
+                result = main.approval_workflow.run(session_id=run_id)
+            finally:
+                main.release_speculative_call()
+    except AdmissionRejected as e:
+        return busy_response(e)
 
     return jsonify({
         "ok": True,
@@ -76,6 +162,50 @@ def run_workflow():
     })
 
 
+def answer_chat(user_message: str, is_finance: Optional[bool] = None) -> dict:
+    """Build a chat message's response envelope (see responses.py), classifying it unless the caller already did"""
+    import main
+    
+    started = time.perf_counter()
+    if is_finance is None:
+        is_finance = main.is_finance_related(user_message)
+    if is_finance:
+        # Finance query - run the approval workflow
+        try:
+            # Run workflow with user input; step results stay scoped to this run
+            with run_context.bind() as run_id:
+                try:
+                    result = main.approval_workflow.run(input=user_message, session_id=run_id)
+                finally:
+                    main.release_speculative_call()
+                run_state = run_context.snapshot()
+            
+            content = result.content if hasattr(result, 'content') else result
+            return responses.finance_response(content, run_state, time.perf_counter() - started)
+            
+        except Exception as workflow_error:
+            # If workflow fails, provide fallback response
+            return responses.error_response(
+                f"I'm having trouble processing your financial request right now: {str(workflow_error)}",
+                is_finance=True,
+                total_seconds=time.perf_counter() - started,
+            )
+    
+    # Non-finance query - use generic LLM response (cached for repeat questions)
+    generic_response, cached = main.answer_generic(user_message)
+    return responses.generic_response(generic_response, cached, time.perf_counter() - started)
+
+
+def workflow_admitted_answer(user_message: str, client_id: str) -> dict:
+    """answer_chat for a finance message once it gets a workflow slot (for background jobs)
+
+    The slot is taken inside the job, never before it is queued: a job waiting
+    for a free worker must not hold a slot that running jobs are waiting for.
+    """
+    with workflow_admission.admit(client_id):
+        return answer_chat(user_message, is_finance=True)
+
+
 @app.route("/api/chat", methods=["POST"])
 def chat():
     """Chat endpoint for frontend - classifies query and responds appropriately"""
@@ -90,69 +220,15 @@ def chat():
             }), 400
         
         import main
+        is_finance = main.is_finance_related(user_message)
+        if is_finance:
+            # Finance runs are expensive: wait for a workflow slot or get a 429
+            with workflow_admission.admit(client_id_for_request()):
+                return jsonify(answer_chat(user_message, is_finance))
+        return jsonify(answer_chat(user_message, is_finance))
         
-        # Check if the query is finance-related
-        if main.is_finance_related(user_message):
-            # Finance query - run the approval workflow
-            try:
-                # Create custom step input with user query
-                class CustomStepInput:
-                    def __init__(self, user_query):
-                        self.user_query = user_query
-                        self.previous_step_content = None
-                
-                # Run workflow with user input
-                initial_input = CustomStepInput(user_message)
-                result = main.approval_workflow.run(step_input=initial_input)
-                
-                # Extract response and handle structured content
-                if hasattr(result, 'content') and isinstance(result.content, dict):
-                    # Check if it's the structured response with summary_result and final_response
-                    if 'summary_result' in result.content and 'final_response' in result.content:
-                        response_data = {
-                            "summary_result": result.content['summary_result'],
-                            "final_response": result.content['final_response'],
-                            "audio_path": result.content.get('audio_path'),
-                            "is_finance": True,
-                            "ok": True
-                        }
-                    else:
-                        # Fallback for other dict formats
-                        response_content = result.content.get('summary', str(result.content))
-                        response_data = {
-                            "response": response_content,
-                            "audio_path": result.content.get('audio_path'),
-                            "is_finance": True,
-                            "ok": True
-                        }
-                else:
-                    # Handle non-dict content
-                    response_content = str(result.content) if hasattr(result, 'content') else str(result)
-                    response_data = {
-                        "response": response_content,
-                        "audio_path": None,
-                        "is_finance": True,
-                        "ok": True
-                    }
-                
-            except Exception as workflow_error:
-                # If workflow fails, provide fallback response
-                response_data = {
-                    "response": f"I'm having trouble processing your financial request right now: {str(workflow_error)}",
-                    "is_finance": True,
-                    "ok": False
-                }
-        else:
-            # Non-finance query - use generic LLM response
-            generic_response = main.get_generic_response(user_message)
-            response_data = {
-                "response": generic_response,
-                "is_finance": False,
-                "ok": True
-            }
-        
-        return jsonify(response_data)
-        
+    except AdmissionRejected as e:
+        return busy_response(e)
     except Exception as e:
         import traceback
         error_msg = f"Chat endpoint failed: {str(e)}"
@@ -163,15 +239,200 @@ def chat():
         }), 500
 
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """Streaming chat: relays model tokens (or workflow progress) as server-sent events"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({
+            "error": "No message provided",
+            "ok": False
+        }), 400
+    
+    import main
+    
+    client_id = client_id_for_request()
+    is_finance = main.is_finance_related(user_message)
+    if is_finance:
+        # Answer 429 before streaming starts when the request could not even queue for a slot
+        try:
+            workflow_admission.check(client_id)
+        except AdmissionRejected as e:
+            return busy_response(e)
+    
+    def relay():
+        if not is_finance:
+            chunks, cached = main.stream_generic_response(user_message)
+            for text in chunks:
+                yield sse_event("token", {"text": text})
+            yield sse_event("done", {"is_finance": False, "ok": True, "cached": cached})
+            return
+        
+        # Finance: run the workflow as a job (which takes the slot) and relay its step progress
+        try:
+            job = job_manager.submit(workflow_admitted_answer, user_message, client_id)
+        except JobQueueFull as e:
+            yield sse_event("done", responses.error_response(f"Too many requests in progress: {str(e)}", is_finance=True))
+            return
+        
+        after = 0
+        while True:
+            events = job.events_after(after, timeout=15)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                after = event["seq"] + 1
+                if event["event"] == "done":
+                    yield sse_event("done", job.result or responses.error_response(str(job.error), is_finance=True))
+                    return
+                yield sse_event("progress", {**event["data"], "event": event["event"]})
+    
+    def generate():
+        try:
+            yield from relay()
+        except Exception as e:
+            # Headers are already sent, so the failure goes out as an event instead of a 500
+            print(f"Chat stream failed: {e}")
+            yield sse_event("error", responses.error_response(
+                f"Sorry, something went wrong while answering: {str(e)}", is_finance=is_finance))
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route("/api/chat/jobs", methods=["POST"])
+def create_chat_job():
+    """Start a chat request in the background and return its job id right away"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    
+    if not user_message:
+        return jsonify({
+            "error": "No message provided",
+            "ok": False
+        }), 400
+    
+    import main
+    
+    client_id = client_id_for_request()
+    if main.is_finance_related(user_message):
+        # Jobs answer right away, so only turn away requests that could not even queue for a slot now
+        try:
+            workflow_admission.check(client_id)
+        except AdmissionRejected as e:
+            return busy_response(e)
+        job_fn, job_args = workflow_admitted_answer, (user_message, client_id)
+    else:
+        job_fn, job_args = answer_chat, (user_message, False)
+    
+    try:
+        job = job_manager.submit(job_fn, *job_args)
+    except JobQueueFull as e:
+        return jsonify({
+            "error": f"Too many requests in progress: {str(e)}",
+            "ok": False
+        }), 503
+    
+    return jsonify({
+        "ok": True,
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "events_url": f"/api/jobs/{job.id}/events"
+    }), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_chat_job(job_id):
+    """Long-poll a job: returns events after ?after=N, waiting up to ?wait=S seconds for new ones"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "ok": False}), 404
+    
+    after = request.args.get("after", 0, type=int)
+    wait = min(request.args.get("wait", 0, type=float), 30)
+    job.events_after(after, timeout=wait)
+    
+    return jsonify({"ok": True, **job.to_dict(after)})
+
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def stream_chat_job(job_id):
+    """Stream a job's progress events as server-sent events until it finishes"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "ok": False}), 404
+    
+    def generate():
+        after = request.args.get("after", 0, type=int)
+        while True:
+            events = job.events_after(after, timeout=15)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                after = event["seq"] + 1
+                payload = dict(event)
+                if event["event"] == "done":
+                    payload["result"] = job.result
+                    payload["error"] = job.error
+                yield f"id: {event['seq']}\n" + sse_event(event["event"], payload)
+                if event["event"] == "done":
+                    return
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Clip names are content hashes, so a given URL always serves the same bytes
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
 @app.route("/audio/<filename>")
 def serve_audio(filename):
-    """Serve audio files to Twilio"""
+    """Serve audio files to Twilio (Range and conditional requests supported)"""
+    # Reject traversal and odd names before touching the filesystem
+    if not audio_store.valid_name(filename):
+        return "Audio file not found", 404
+    
     try:
-        audio_dir = os.path.join(os.path.dirname(__file__), "audio_generations")
-        file_path = os.path.join(audio_dir, filename)
+        # Freshly generated clips are answered from memory
+        clip = audio_store.read_hot(filename)
+        if clip is not None:
+            response = Response(clip, mimetype="audio/mpeg")
+            response.set_etag(audio_store.etag_for(filename))
+            response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+            return response.make_conditional(request, accept_ranges=True, complete_length=len(clip))
         
-        if os.path.exists(file_path):
-            return send_file(file_path, mimetype="audio/mpeg")
+        file_path = audio_store.get(filename)
+        
+        # Still synthesising: relay the clip with chunked transfer as it arrives
+        live = None if file_path else audio_store.live(filename)
+        if live is not None:
+            return Response(
+                stream_with_context(live.iter_bytes()),
+                mimetype="audio/mpeg",
+                headers={"Cache-Control": "no-cache"}
+            )
+        
+        if file_path:
+            # send_file streams through the server's file wrapper (sendfile where available)
+            response = send_file(file_path, mimetype="audio/mpeg", conditional=True, etag=audio_store.etag_for(filename))
+            response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+            return response
         else:
             return "Audio file not found", 404
             
@@ -183,25 +444,55 @@ def serve_audio(filename):
 def voice():
     """Initial call endpoint - plays message and gathers DTMF input"""
     try:
-        message = request.args.get("msg", "Please enter a key.")
+        # A batched approval call carries one msg per recommendation and gathers one digit each
+        messages = request.args.getlist("msg")
         request_id = request.args.get("request_id", "")
 
         vr = VoiceResponse()
+        if not messages and request_id:
+            # Speculatively dialled: hold the line until the workflow attaches the message
+            attached = call_waiters.message_for(request_id)
+            if attached is None:
+                held = int(request.args.get("held", 0))
+                if held * VOICE_HOLD_PAUSE < VOICE_HOLD_MAX_SECONDS:
+                    if held == 0:
+                        vr.say("Please hold while your recommendation is prepared.")
+                    vr.pause(length=VOICE_HOLD_PAUSE)
+                    vr.redirect(f"{BASE_URL}/voice?request_id={quote_plus(request_id)}&held={held + 1}", method="POST")
+                else:
+                    vr.say("Sorry, the recommendation is taking too long. Goodbye.")
+                    vr.hangup()
+                return Response(str(vr), mimetype="text/xml")
+            if attached["cancelled"]:
+                call_waiters.clear_message(request_id)
+                vr.say("Sorry, there is nothing to review right now. Goodbye.")
+                vr.hangup()
+                return Response(str(vr), mimetype="text/xml")
+            messages = attached["messages"]
+        messages = messages or ["Please enter a key."]
+
         g = Gather(
             input="dtmf",
-            num_digits=1,
+            num_digits=len(messages),
             timeout=45,
             action=f"{BASE_URL}/gather?request_id={quote_plus(request_id)}",
             method="POST"
         )
 
-        # Play audio file or speak text
-        if message.endswith('.mp3') and os.path.exists(message):
+        if len(messages) > 1:
+            g.say(f"You have {len(messages)} recommendations to review.")
+        for index, message in enumerate(messages, 1):
+            if len(messages) > 1:
+                g.say(f"Recommendation {index}.")
+            # Play audio file (stored or still streaming) or speak text
             filename = os.path.basename(message)
-            audio_url = f"{BASE_URL}/audio/{filename}"
-            g.play(audio_url)
-        else:
-            g.say(message)
+            if message.endswith('.mp3') and (audio_store.get(filename) or audio_store.live(filename)):
+                audio_url = f"{BASE_URL}/audio/{filename}"
+                g.play(audio_url)
+            else:
+                g.say(message)
+        if len(messages) > 1:
+            g.say(f"Enter {len(messages)} digits, one per recommendation in order. Press 1 to approve, any other key to decline.")
 
         vr.append(g)
         vr.say("No input received. Goodbye.")
@@ -235,7 +526,9 @@ def gather():
         request_id = request.args.get("request_id", "")
         
         if request_id:
-            save_call_result(request_id, digits or "")
+            # Wake the waiting request directly; disk is the fallback when no waiter is reachable
+            if not call_waiters.deliver(request_id, digits or ""):
+                save_call_result(request_id, digits or "")
         
         vr = VoiceResponse()
         if digits:
@@ -255,61 +548,196 @@ def gather():
         return Response(str(vr), mimetype="text/xml")
 
 
-def call_and_collect(to_number: str, message: str, timeout_sec: int = 45) -> str:
+# Twilio SIDs of speculatively dialled calls that have no message yet, so they can be hung up
+_call_sids_lock = threading.Lock()
+_call_sids: Dict[str, str] = {}
+
+
+def start_call(to_number: str, message: Optional[Union[str, List[str]]] = None) -> str:
     """
-    Make a Twilio call, play message, and collect 1 DTMF keypress.
-    Uses disk-based polling to avoid Flask restart issues.
+    Dial to_number and return the call's request_id without waiting for input.
+    
+    Without a message the call is dialled speculatively: /voice holds the line
+    until attach_message supplies what to play.
+    """
+    request_id = str(uuid.uuid4())
+    call_waiters.register(request_id)
+    
+    try:
+        query = ""
+        if message is not None:
+            messages = [message] if isinstance(message, str) else list(message)
+            query = "".join(f"msg={quote_plus(m)}&" for m in messages)
+        call_url = f"{BASE_URL}/voice?{query}request_id={request_id}"
+        with transport.host_slot("twilio", "api.twilio.com"):
+            call = client.calls.create(
+                to=to_number,
+                from_=TWILIO_FROM,
+                url=call_url
+            )
+    except Exception:
+        call_waiters.unregister(request_id)
+        raise
+    if message is None:
+        with _call_sids_lock:
+            _call_sids[request_id] = call.sid
+    return request_id
+
+
+def attach_message(request_id: str, message: Union[str, List[str]]):
+    """Give a speculatively dialled call the message(s) to play"""
+    with _call_sids_lock:
+        _call_sids.pop(request_id, None)
+    call_waiters.set_message(request_id, [message] if isinstance(message, str) else list(message))
+
+
+def cancel_call(request_id: str):
+    """Hang up a speculatively dialled call there is nothing to approve for, and stop waiting for it"""
+    with _call_sids_lock:
+        sid = _call_sids.pop(request_id, None)
+    # Until the hangup succeeds, /voice tells a caller who picks up goodbye (and clears this)
+    call_waiters.set_message(request_id, [], cancelled=True)
+    try:
+        if sid:
+            with transport.host_slot("twilio", "api.twilio.com"):
+                client.calls(sid).update(status="completed")
+            call_waiters.clear_message(request_id)
+    except Exception as e:
+        print(f"Failed to hang up cancelled call {request_id}: {e}")
+    finally:
+        call_waiters.unregister(request_id)
+
+
+def wait_for_result(request_id: str, timeout_sec: int = 45) -> str:
+    """
+    Block until the call's keypress arrives, woken directly by /gather with
+    the disk result as a fallback for webhooks handled by another process.
+    
+    Returns:
+        Pressed digit(s) (str) or "timeout"/"error" on failure
+    """
+    waiter = call_waiters.waiter_for(request_id) or call_waiters.register(request_id)
+    try:
+        deadline = time.time() + timeout_sec
+        while True:
+            remaining = deadline - time.time()
+            digit = waiter.wait(min(max(remaining, 0), call_waiters.FALLBACK_CHECK_SECONDS))
+            if digit is None:
+                digit = get_call_result(request_id) or None
+            if digit is not None or remaining <= 0:
+                break
+        return digit or "timeout"
+    except Exception as e:
+        return f"error: {str(e)}"
+    finally:
+        cleanup_call_result(request_id)
+        call_waiters.clear_message(request_id)
+        call_waiters.unregister(request_id)
+
+
+def call_and_collect(to_number: str, message: Union[str, List[str]], timeout_sec: int = 45) -> str:
+    """
+    Make a Twilio call, play message, and collect 1 DTMF keypress
+    (or, for a list of messages, play each and collect one keypress per message).
     
     Args:
         to_number: Phone number to call (E.164 format)
-        message: Text to speak or path to MP3 file
+        message: Text to speak or path to MP3 file, or a list of them
         timeout_sec: Seconds to wait for input
         
     Returns:
-        Pressed digit (str) or "timeout"/"error" on failure
+        Pressed digit(s) (str) or "timeout"/"error" on failure
     """
-    request_id = str(uuid.uuid4())
-    
     try:
-        # Initiate Twilio call
-        call_url = f"{BASE_URL}/voice?msg={quote_plus(message)}&request_id={request_id}"
-        call = client.calls.create(
-            to=to_number,
-            from_=TWILIO_FROM,
-            url=call_url
-        )
-        
-        # Poll disk for result every second until timeout
-        start_time = time.time()
-        while time.time() - start_time < timeout_sec:
-            digit = get_call_result(request_id)
-            
-            if digit:
-                cleanup_call_result(request_id)
-                return digit
-            
-            time.sleep(1)  # Poll every second
-        
-        # Final check after timeout
-        digit = get_call_result(request_id)
-        if digit:
-            cleanup_call_result(request_id)
-            return digit
-        
-        # No result found
-        cleanup_call_result(request_id)
-        return "timeout"
-            
+        request_id = start_call(to_number, message)
     except Exception as e:
-        cleanup_call_result(request_id)
         return f"error: {str(e)}"
+    return wait_for_result(request_id, timeout_sec)
+
+
+def warm_up():
+    """Import the workflow and build agents and vendor clients before taking traffic"""
+    start = time.time()
+    import main
+    
+    main.generic_agent_pool.warm()
+    for agent in (main.summarizer_agent, main.wording_agent, main.tts_agent, main.phone_agent, main.approval_agent):
+        get_client = getattr(agent.model, "get_client", None)
+        try:
+            if callable(get_client):
+                get_client()
+        except Exception as e:
+            print(f"{agent.name} client warm-up failed: {e}")
+    try:
+        transport.elevenlabs_client()
+    except Exception as e:
+        print(f"ElevenLabs client warm-up failed: {e}")
+    
+    print(f"Warm-up finished in {time.time() - start:.2f}s")
+
+
+def drain(timeout: float):
+    """Let queued chat jobs and approval calls in this worker finish before it exits"""
+    deadline = time.time() + timeout
+    job_manager.shutdown(wait=True)
+    while call_waiters.pending() and time.time() < deadline:
+        time.sleep(0.5)
+    if call_waiters.pending():
+        print(f"Worker exiting with {call_waiters.pending()} approval calls still waiting")
+
+
+def run_production(host: str, port: int):
+    """
+    Serve with a gunicorn pre-fork pool of threaded workers.
+    
+    SIGTERM stops accepting connections and gives in-flight requests, chat jobs
+    and approval calls up to WEB_GRACEFUL_TIMEOUT seconds; SIGHUP replaces the
+    workers one by one, so webhooks for calls placed by an old worker still
+    reach it through the shared call waiter sockets.
+    """
+    from gunicorn.app.base import BaseApplication
+    
+    graceful_timeout = env_int("WEB_GRACEFUL_TIMEOUT", 90)
+    workers = env_int("WEB_WORKERS", os.cpu_count() or 2)
+    if workers > 1 and env_flag("TTS_STREAMING"):
+        # A clip still being synthesised lives in one worker's memory until it is written out
+        print("Warning: TTS_STREAMING with several workers needs sticky routing of /audio to the worker "
+              "that synthesises the clip; otherwise Twilio gets 404 until the file is complete")
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "gthread",
+        # Approval requests block on a phone call, so each worker needs threads to spare
+        "threads": env_int("WEB_THREADS", 16),
+        "timeout": env_int("WEB_TIMEOUT", 180),
+        "graceful_timeout": graceful_timeout,
+        "keepalive": 5,
+        "post_worker_init": lambda worker: warm_up() if env_flag("WARM_UP", default=True) else None,
+        "worker_exit": lambda arbiter, worker: drain(graceful_timeout),
+    }
+    
+    class ServerApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return app
+    
+    ServerApplication().run()
 
 
 def run_server():
-    """Start Flask server"""
+    """Start the development server, or the worker pool when SERVER_MODE=production"""
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", "8000"))
-    app.run(host=host, port="8000", debug=True, threaded=True, use_reloader=False)
+    if SERVER_MODE == "production":
+        run_production(host, port)
+        return
+    
+    if env_flag("WARM_UP", default=True):
+        warm_up()
+    app.run(host=host, port=port, debug=env_flag("FLASK_DEBUG", default=True), threaded=True, use_reloader=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+"""
+Storage for workflow sessions in tmp/approval_workflow.db.
+
+Modes (SESSION_STORE_MODE):
+- plain:    agno's SqliteDb on the file with its default engine
+- wal:      a sized SQLAlchemy connection pool with WAL journaling, so
+            concurrent runs read while one writes instead of locking (default)
+- buffered: wal, plus session and run writes queued for one background writer
+            that applies them in batches; repeated saves of the same session
+            before a flush collapse into one write
+
+With SESSION_RETENTION_DAYS set, a background thread prunes older sessions
+every SESSION_PRUNE_INTERVAL seconds and compacts the file when much of it is
+free pages.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from agno.db.sqlite import SqliteDb
+
+from config import env_float, env_int
+
+
+def make_engine(db_file: str, pool_size: int = 8, busy_timeout: float = 30):
+    """SQLAlchemy engine for db_file with WAL journaling and a pool of pool_size connections"""
+    from sqlalchemy import create_engine, event
+
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    engine = create_engine(
+        f"sqlite:///{os.path.abspath(db_file)}",
+        pool_size=pool_size,
+        max_overflow=pool_size,
+        pool_timeout=busy_timeout,
+        connect_args={"timeout": busy_timeout, "check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def configure(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync only fsyncs at checkpoints; a power loss can drop
+        # the last few commits but never corrupts the file
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        cursor.close()
+
+    return engine
+
+
+class BufferedSqliteDb(SqliteDb):
+    """
+    SqliteDb whose session and run writes return immediately and are applied
+    in order by a background writer every flush_interval seconds (or once
+    max_batch writes are queued). Reads of a session with queued writes flush
+    first, so a run always sees its own saves.
+    """
+
+    def __init__(self, *args, flush_interval: float = 0.5, max_batch: int = 64, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (method, args, kwargs)
+        self._pending_sessions = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self.stats = {"queued": 0, "coalesced": 0, "written": 0, "flushes": 0, "errors": 0}
+        threading.Thread(target=self._writer, daemon=True, name="session-writer").start()
+        atexit.register(self.flush)
+
+    def _enqueue(self, key: tuple, session_id: Optional[str], method: str, *args, **kwargs):
+        with self._lock:
+            self.stats["queued"] += 1
+            if key in self._pending:
+                # Keep the original position so a session row is still written before its runs
+                self.stats["coalesced"] += 1
+            self._pending[key] = (method, args, kwargs)
+            if session_id:
+                self._pending_sessions.add(session_id)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def _writer(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Apply every queued write now"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._pending_sessions.clear()
+            if not batch:
+                return
+            for method, args, kwargs in batch:
+                try:
+                    getattr(super(), method)(*args, **kwargs)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"Session write failed ({method}): {e}")
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def upsert_session(self, session, deserialize: Optional[bool] = True):
+        self._enqueue(("session", session.session_id), session.session_id, "upsert_session", session, deserialize=False)
+        return session if deserialize else session.to_dict()
+
+    def upsert_run(self, run, session_id: str, *args, **kwargs):
+        run_id = run.get("run_id") if isinstance(run, dict) else getattr(run, "run_id", None)
+        self._enqueue(("run", run_id or id(run)), session_id, "upsert_run", run, session_id, *args, **kwargs)
+
+    def _flush_for(self, session_id: Optional[str]):
+        with self._lock:
+            pending = session_id in self._pending_sessions if session_id else bool(self._pending)
+        if pending:
+            self.flush()
+
+    def get_session(self, session_id: str, *args, **kwargs):
+        self._flush_for(session_id)
+        return super().get_session(session_id, *args, **kwargs)
+
+    def get_sessions(self, *args, **kwargs):
+        self._flush_for(None)
+        return super().get_sessions(*args, **kwargs)
+
+    def get_run(self, run_id: str, *args, **kwargs):
+        self._flush_for(None)
+        return super().get_run(run_id, *args, **kwargs)
+
+
+class SessionPruner:
+    """Deletes sessions older than retention_seconds and compacts the file in the background"""
+
+    def __init__(self, engine, table: str, retention_seconds: float, interval: float = 3600,
+                 vacuum_free_ratio: float = 0.25):
+        self.engine = engine
+        self.table = table
+        self.retention_seconds = retention_seconds
+        self.interval = interval
+        self.vacuum_free_ratio = vacuum_free_ratio
+        self.stats = {"runs": 0, "deleted": 0, "vacuums": 0, "last_seconds": 0.0}
+
+    def start(self):
+        def loop():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.prune()
+                except Exception as e:
+                    print(f"Session pruning failed: {e}")
+
+        threading.Thread(target=loop, daemon=True, name="session-pruner").start()
+        return self
+
+    def prune(self) -> int:
+        """Delete expired sessions (their runs go with them via the foreign key); returns rows deleted"""
+        from sqlalchemy import text
+
+        start = time.perf_counter()
+        cutoff = int(time.time() - self.retention_seconds)
+        with self.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": self.table}
+            ).fetchone()
+            if not exists:
+                return 0
+            deleted = conn.execute(
+                text(f"DELETE FROM {self.table} WHERE COALESCE(updated_at, created_at) < :cutoff"),
+                {"cutoff": cutoff},
+            ).rowcount
+
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            pages = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+            free = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+            if pages and free / pages >= self.vacuum_free_ratio:
+                conn.exec_driver_sql("VACUUM")
+                self.stats["vacuums"] += 1
+
+        self.stats["runs"] += 1
+        self.stats["deleted"] += max(deleted, 0)
+        self.stats["last_seconds"] = round(time.perf_counter() - start, 4)
+        return deleted
+
+
+SESSION_TABLE = "approval_workflow_session"
+
+
+def build_session_db(mode: Optional[str] = None, db_file: Optional[str] = None, table: str = SESSION_TABLE):
+    """The workflow's SqliteDb for mode (default: SESSION_STORE_MODE), with a background pruner when retention is configured"""
+    mode = mode or os.getenv("SESSION_STORE_MODE", "wal")
+    db_file = db_file or os.getenv("SESSION_DB_FILE", "tmp/approval_workflow.db")
+    if mode == "plain":
+        return SqliteDb(session_table=table, db_file=db_file)
+
+    engine = make_engine(db_file, pool_size=env_int("SESSION_DB_POOL_SIZE", 8))
+    if mode == "buffered":
+        db = BufferedSqliteDb(
+            session_table=table,
+            db_engine=engine,
+            flush_interval=env_float("SESSION_FLUSH_INTERVAL", 0.5),
+            max_batch=env_int("SESSION_FLUSH_BATCH", 64),
+        )
+    else:
+        db = SqliteDb(session_table=table, db_engine=engine)
+
+    retention_days = env_float("SESSION_RETENTION_DAYS", 0)
+    if retention_days > 0:
+        SessionPruner(
+            engine, table, retention_days * 86400, interval=env_float("SESSION_PRUNE_INTERVAL", 3600)
+        ).start()
+    return db
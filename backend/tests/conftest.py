@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The backend modules are flat, top-level imports (run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# server builds its Twilio client at import time
+os.environ.setdefault("account_sid", "AC" + "0" * 32)
+os.environ.setdefault("auth_token", "test")
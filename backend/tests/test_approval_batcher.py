@@ -0,0 +1,56 @@
+import threading
+import time
+
+from approval_batcher import ApprovalBatcher
+
+
+class SlowCalls:
+    """place_call stand-in: each call takes `seconds` and approves every item"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self, to_number, messages):
+        self.calls.append(list(messages))
+        time.sleep(self.seconds)
+        return "1" * len(messages)
+
+
+def submit_in_thread(batcher, message, results):
+    thread = threading.Thread(target=lambda: results.append((message, batcher.submit("+1555", message))))
+    thread.start()
+    return thread
+
+
+def test_lone_request_is_dialled_at_once():
+    calls = SlowCalls(0.0)
+    batcher = ApprovalBatcher(calls, window=5.0)
+    start = time.perf_counter()
+    assert batcher.submit("+1555", "only") == "1"
+    assert time.perf_counter() - start < 0.5
+    assert calls.calls == [["only"]]
+
+
+def test_requests_behind_a_call_share_the_next_one():
+    calls = SlowCalls(0.3)
+    batcher = ApprovalBatcher(calls, window=5.0)
+    results = []
+    first = submit_in_thread(batcher, "first", results)
+    time.sleep(0.1)
+    others = [submit_in_thread(batcher, name, results) for name in ("second", "third")]
+    for thread in [first] + others:
+        thread.join(5)
+    assert calls.calls == [["first"], ["second", "third"]]
+    assert sorted(results) == [("first", "1"), ("second", "1"), ("third", "1")]
+    assert batcher.waiting() == 0
+
+
+def test_no_window_places_a_call_per_request():
+    calls = SlowCalls(0.2)
+    batcher = ApprovalBatcher(calls)
+    results = []
+    threads = [submit_in_thread(batcher, name, results) for name in ("a", "b")]
+    for thread in threads:
+        thread.join(5)
+    assert sorted(calls.calls) == [["a"], ["b"]]
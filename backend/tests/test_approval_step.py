@@ -0,0 +1,34 @@
+import json
+
+import pytest
+from agno.workflow.types import StepInput
+
+import main
+import progress
+
+
+def run_step(call_result):
+    events = []
+    with progress.reporting_to(lambda event, data: events.append(event)):
+        output = main.handle_approval_step(StepInput(previous_step_content=call_result))
+    return output.content["final_response"], [e for e in events if e != "step_completed"]
+
+
+@pytest.mark.parametrize("digit, status", [
+    ("1", "approved"),
+    ("2", "declined"),
+    ("timeout", "no_answer"),
+    ("error: [Errno 11] Resource temporarily unavailable", "failed"),
+    ("error: HTTP 401", "failed"),
+])
+def test_decision_matches_envelope_status(digit, status):
+    message, events = run_step({"message_sent": "clip.mp3", "digit_pressed": digit, "call_status": "completed"})
+    assert message == main.APPROVAL_MESSAGES[status]
+    assert events == [status]
+
+
+def test_failed_call_is_never_approved():
+    result = json.dumps({"message_sent": "clip.mp3", "digit_pressed": "1", "call_status": "failed"})
+    message, events = run_step(result)
+    assert events == ["failed"]
+    assert message != main.APPROVAL_MESSAGES["approved"]
@@ -0,0 +1,20 @@
+from audio_store import AudioStore
+
+
+def test_clip_written_by_another_process_is_found(tmp_path):
+    # Two stores on one directory, like two gunicorn workers
+    writer = AudioStore(str(tmp_path), max_bytes=1 << 20)
+    reader = AudioStore(str(tmp_path), max_bytes=1 << 20)
+
+    path = writer.put("abc123.mp3", [b"ID3", b"\x00" * 100])
+
+    assert reader.get("abc123.mp3") == path
+    assert reader.stats()["files"] == 1
+    assert reader.stats()["bytes"] == 103
+
+
+def test_missing_and_invalid_names(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=1 << 20)
+    assert store.get("nothere.mp3") is None
+    assert store.get("../etc.mp3") is None
+    assert store.stats()["files"] == 0
@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import MemoryStore, ResponseCache, SingleFlight, SnapshotCache, make_store, normalise_query
+
+
+class Clock:
+    """Stands in for the time module inside cache.py"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", load)))
+    leader.start()
+    while not flight.in_flight("k"):
+        pass
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", load))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("value", False)] + [("value", True)] * 3
+    assert not flight.in_flight("k")
+
+
+def test_single_flight_shares_the_error_and_then_retries():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("vendor down")
+
+    with pytest.raises(RuntimeError, match="vendor down"):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: "ok") == ("ok", False)
+
+
+def test_fresh_entry_is_a_hit_until_ttl(clock):
+    snapshots = SnapshotCache(ttl=60)
+    loads = []
+
+    def loader():
+        loads.append(clock.now)
+        return {"n": len(loads)}
+
+    assert snapshots.get_or_load("k", loader) == {"n": 1}
+    clock.now += 59
+    assert snapshots.get_or_load("k", loader) == {"n": 1}
+    assert snapshots.age("k") == 59
+    clock.now += 1
+    assert snapshots.get_or_load("k", loader) == {"n": 2}
+
+    stats = snapshots.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 0.3333)
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    snapshots = SnapshotCache(ttl=60, stale_ttl=30)
+    snapshots.store.set("k", "old", clock.now - 70)
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return "new"
+
+    assert snapshots.get_or_load("k", loader) == "old"
+    assert started.wait(5)
+    # The refresh is in flight, so this lookup must not start another one
+    assert snapshots.get_or_load("k", loader) == "old"
+    release.set()
+    while snapshots.stats()["refreshes"] < 1:
+        time.sleep(0.01)
+    assert loads == [1]
+    assert snapshots.get_or_load("k", loader) == "new"
+    stats = snapshots.stats()
+    assert (stats["stale_hits"], stats["refreshes"], stats["hits"]) == (2, 1, 1)
+
+
+def test_entry_past_the_stale_window_is_a_miss(clock):
+    snapshots = SnapshotCache(ttl=60, stale_ttl=30)
+    snapshots.store.set("k", "old", clock.now - 90)
+    assert snapshots.get_or_load("k", lambda: "new") == "new"
+    assert snapshots.stats()["misses"] == 1
+
+
+def test_should_cache_and_errors_leave_the_store_alone(clock):
+    snapshots = SnapshotCache(ttl=60, should_cache=lambda value: value is not None)
+    assert snapshots.get_or_load("k", lambda: None) is None
+    assert snapshots.store.get("k") is None
+
+    def fail():
+        raise RuntimeError("vendor down")
+
+    with pytest.raises(RuntimeError):
+        snapshots.get_or_load("k", fail)
+    assert snapshots.stats()["load_errors"] == 1
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = make_store("sqlite", path=path)
+    writer.set("k", {"symbols": ["AAPL"]}, 123.0)
+
+    reader = make_store("sqlite", path=path)
+    assert reader.get("k") == ({"symbols": ["AAPL"]}, 123.0)
+    reader.delete("k")
+    assert writer.get("k") is None
+    assert isinstance(make_store(), MemoryStore)
+
+
+def test_response_cache_keys_ignore_case_punctuation_and_spacing(clock):
+    responses = ResponseCache()
+    responses.put("What is a  Roth IRA?", "answer")
+    assert normalise_query(" what is a roth-IRA ") == "what is a roth ira"
+    assert responses.get("what is a roth ira") == "answer"
+
+
+def test_response_cache_expires_entries_after_ttl(clock):
+    responses = ResponseCache(ttl=60)
+    responses.put("q", "answer")
+    clock.now += 59
+    assert responses.get("q") == "answer"
+    clock.now += 1
+    assert responses.get("q") is None
+    assert responses.stats()["entries"] == 0
+
+
+def test_response_cache_evicts_least_recently_used(clock):
+    responses = ResponseCache(max_entries=2)
+    responses.put("a", 1)
+    responses.put("b", 2)
+    assert responses.get("a") == 1
+    responses.put("c", 3)
+
+    assert responses.get("b") is None
+    assert (responses.get("a"), responses.get("c")) == (1, 3)
+    assert responses.stats()["evictions"] == 1
+
+
+def test_response_cache_get_or_compute_counts_hits_and_skips_none(clock):
+    responses = ResponseCache()
+    assert responses.get_or_compute("q", lambda: None) == (None, False)
+    assert responses.get_or_compute("q", lambda: "answer") == ("answer", False)
+    assert responses.get_or_compute("Q?", lambda: "recomputed") == ("answer", True)
+    stats = responses.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 2, 0.3333)
+
+
+def test_response_cache_persists_live_entries_to_json(clock, tmp_path):
+    path = str(tmp_path / "responses.json")
+    responses = ResponseCache(ttl=60, path=path, save_interval=3600)
+    responses.put("old", "expiring")
+    clock.now += 30
+    responses.put("new", "kept")
+    clock.now += 40
+    responses.save()
+
+    reloaded = ResponseCache(ttl=60, path=path)
+    assert reloaded.get("new") == "kept"
+    assert reloaded.get("old") is None
+    assert reloaded.stats()["entries"] == 1
+
+
+def test_response_cache_load_trims_to_max_entries_and_ignores_bad_files(clock, tmp_path):
+    path = tmp_path / "responses.json"
+    responses = ResponseCache(path=str(path), save_interval=0)
+    for key in "abc":
+        responses.put(key, key.upper())
+
+    trimmed = ResponseCache(max_entries=2, path=str(path))
+    assert (trimmed.get("a"), trimmed.get("b"), trimmed.get("c")) == (None, "B", "C")
+
+    path.write_text("not json")
+    assert ResponseCache(path=str(path)).stats()["entries"] == 0
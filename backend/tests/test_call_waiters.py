@@ -0,0 +1,87 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+import call_waiters
+
+# A delivered digit must wake the waiter well inside the fallback check interval
+WAKE_BOUND_SECONDS = 0.5
+
+
+@pytest.fixture(params=["local", "socket"])
+def mode(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(call_waiters, "CALL_WAIT_MODE", request.param)
+    monkeypatch.setattr(call_waiters, "CALL_SOCKET_DIR", str(tmp_path))
+    return request.param
+
+
+def wait_in_thread(waiter, timeout=5.0):
+    result = {}
+
+    def run():
+        result["digit"] = waiter.wait(timeout)
+        result["at"] = time.perf_counter()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.05)  # let it block in wait()
+    return thread, result
+
+
+def test_deliver_in_process_wakes_waiter_promptly(mode):
+    request_id = str(uuid.uuid4())
+    waiter = call_waiters.register(request_id)
+    try:
+        thread, result = wait_in_thread(waiter)
+        delivered_at = time.perf_counter()
+        assert call_waiters.deliver(request_id, "1")
+        thread.join(5)
+        assert result["digit"] == "1"
+        assert result["at"] - delivered_at < WAKE_BOUND_SECONDS
+    finally:
+        call_waiters.unregister(request_id)
+
+
+def test_deliver_from_another_process_wakes_socket_waiter(monkeypatch, tmp_path):
+    monkeypatch.setattr(call_waiters, "CALL_WAIT_MODE", "socket")
+    monkeypatch.setattr(call_waiters, "CALL_SOCKET_DIR", str(tmp_path))
+    request_id = str(uuid.uuid4())
+    waiter = call_waiters.Waiter(request_id, listen=True)  # registered in "another worker"
+    try:
+        thread, result = wait_in_thread(waiter)
+        delivered_at = time.perf_counter()
+        assert call_waiters.deliver(request_id, "2")
+        thread.join(5)
+        assert result["digit"] == "2"
+        assert result["at"] - delivered_at < WAKE_BOUND_SECONDS
+    finally:
+        waiter.close()
+
+
+def test_deliver_without_waiter_fails_in_local_mode(monkeypatch):
+    monkeypatch.setattr(call_waiters, "CALL_WAIT_MODE", "local")
+    assert not call_waiters.deliver(str(uuid.uuid4()), "1")
+
+
+def test_wait_times_out_without_digit(mode):
+    request_id = str(uuid.uuid4())
+    waiter = call_waiters.register(request_id)
+    try:
+        assert waiter.wait(0.05) is None
+        # A zero wait at the deadline is a poll, not an error
+        assert waiter.wait(0) is None
+        assert waiter.wait(-1) is None
+    finally:
+        call_waiters.unregister(request_id)
+
+
+def test_wait_for_result_reports_timeout_in_socket_mode(monkeypatch, tmp_path):
+    import server
+
+    monkeypatch.setattr(call_waiters, "CALL_WAIT_MODE", "socket")
+    monkeypatch.setattr(call_waiters, "CALL_SOCKET_DIR", str(tmp_path))
+    request_id = str(uuid.uuid4())
+    call_waiters.register(request_id)
+    assert server.wait_for_result(request_id, timeout_sec=0.1) == "timeout"
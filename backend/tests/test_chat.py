@@ -0,0 +1,43 @@
+import pytest
+
+import main
+import server
+from admission import AdmissionController
+
+
+class FakeRun:
+    content = {"summary_result": "Apple leads.", "final_response": "Approved."}
+
+
+@pytest.fixture
+def classifications(monkeypatch):
+    """Count classifier calls; messages mentioning "stock" are finance"""
+    calls = []
+
+    def is_finance_related(message):
+        calls.append(message)
+        return "stock" in message
+    monkeypatch.setattr(main, "is_finance_related", is_finance_related)
+    monkeypatch.setattr(main, "answer_generic", lambda message: ("Hello!", False))
+    monkeypatch.setattr(main.approval_workflow, "run", lambda **kwargs: FakeRun())
+    monkeypatch.setattr(main, "release_speculative_call", lambda: None)
+    monkeypatch.setattr(server, "workflow_admission", AdmissionController(max_concurrent=1))
+    return calls
+
+
+@pytest.mark.parametrize("message, is_finance, response", [
+    ("hi there", False, "Hello!"),
+    ("best stock today?", True, "**Summary:**\nApple leads.\n\n**Recommendation:**\nApproved."),
+])
+def test_chat_classifies_each_message_once(classifications, message, is_finance, response):
+    reply = server.app.test_client().post("/api/chat", json={"message": message})
+
+    assert reply.status_code == 200
+    assert (reply.get_json()["is_finance"], reply.get_json()["response"]) == (is_finance, response)
+    assert classifications == [message]
+
+
+def test_answer_chat_classifies_when_not_told(classifications):
+    assert server.answer_chat("hi there")["response"] == "Hello!"
+    assert server.answer_chat("hi there", is_finance=True)["is_finance"] is True
+    assert classifications == ["hi there"]
@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+import main
+import responses
+import server
+from admission import AdmissionController
+from jobs import JobManager
+
+
+@pytest.fixture
+def one_worker_one_slot(monkeypatch):
+    """A single job worker and a single workflow slot, with finance answers that take a moment"""
+    manager = JobManager(max_workers=1)
+    monkeypatch.setattr(server, "job_manager", manager)
+    monkeypatch.setattr(server, "workflow_admission", AdmissionController(max_concurrent=1, max_wait=1))
+    monkeypatch.setattr(main, "is_finance_related", lambda message: True)
+
+    def answer_chat(message, is_finance=None):
+        time.sleep(0.2)
+        return responses.finance_response(message, {}, 0.2)
+    monkeypatch.setattr(server, "answer_chat", answer_chat)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+def sse_done(body: str) -> dict:
+    for block in body.split("\n\n"):
+        if block.startswith("event: done"):
+            return json.loads(block.split("data: ", 1)[1])
+    raise AssertionError(f"no done event in {body!r}")
+
+
+def test_stream_and_background_job_share_workers_without_starving(one_worker_one_slot):
+    # Build the stream response without starting it, as a WSGI server does before sending the body
+    with server.app.test_request_context("/api/chat/stream", method="POST", json={"message": "tesla stock"}):
+        stream = server.chat_stream()
+    assert server.workflow_admission.active() == 0
+
+    # A background job queued before the stream starts must not wait on a slot the stream holds
+    created = server.app.test_client().post("/api/chat/jobs", json={"message": "apple stock"})
+    assert created.status_code == 202
+
+    body = "".join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in stream.response)
+    assert sse_done(body)["ok"] is True
+    job = one_worker_one_slot.get(created.get_json()["job_id"])
+    while not job.done:
+        job.events_after(len(job.events), timeout=5)
+    assert job.status == "succeeded", job.error
+
+
+def test_stream_failure_is_sent_as_an_error_event(monkeypatch):
+    monkeypatch.setattr(main, "is_finance_related", lambda message: False)
+
+    def chunks():
+        yield "Hel"
+        raise RuntimeError("model overloaded")
+    monkeypatch.setattr(main, "stream_generic_response", lambda message: (chunks(), False))
+
+    body = server.app.test_client().post("/api/chat/stream", json={"message": "hi"}).get_data(as_text=True)
+
+    blocks = body.strip().split("\n\n")
+    assert blocks[0] == 'event: token\ndata: {"text":"Hel"}'
+    assert blocks[-1].startswith("event: error\n")
+    error = json.loads(blocks[-1].split("data: ", 1)[1])
+    assert (error["ok"], error["is_finance"]) == (False, False)
+    assert "model overloaded" in error["response"]
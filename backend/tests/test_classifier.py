@@ -0,0 +1,54 @@
+import pytest
+
+from classifier import classify
+
+FINANCE = [
+    "Which stocks should I buy today?",
+    "Show me the top market movers",
+    "What are the best performing tech stocks right now?",
+    "Find me high momentum shares on the NASDAQ",
+    "How's the market doing today?",
+    "Is AAPL a good buy?",
+    "S&P500 outlook",
+    "Is the S&P 500 overvalued right now?",
+    "what's the dow at",
+    "Should I sell my bitcoin before earnings season?",
+    "Which ETF has the best dividend yield?",
+    "Any good investment ideas?",
+    "Should I buy $TSLA?",
+    "biggest gainers and losers this week",
+]
+
+GENERIC = [
+    "Hi there, how are you today?",
+    "What can you do?",
+    "Tell me a joke about cats",
+    "what should i buy my mom for her birthday",
+    "Can you help me return my library book?",
+    "Ideas for a company picnic this weekend",
+    "Where is the nearest farmers market?",
+    "Is it OK to email the CEO directly?",
+    "WHAT IS THE WEATHER LIKE",
+    "What is the capital of France?",
+    "Give me a recipe for pancakes",
+    "Recommend a good science fiction book",
+    "",
+]
+
+
+@pytest.mark.parametrize("query", FINANCE)
+def test_finance_queries(query):
+    result = classify(query)
+    assert result.is_finance, result
+
+
+@pytest.mark.parametrize("query", GENERIC)
+def test_generic_queries(query):
+    result = classify(query)
+    assert not result.is_finance, result
+
+
+def test_longest_phrase_wins():
+    assert classify("should I buy now").matched == ("should i buy",)
+    assert classify("S&P500 outlook").matched == ("s&p500", "outlook")
+
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+import progress
+from jobs import JobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=2)
+    yield manager
+    manager.shutdown(wait=True)
+
+
+def wait_done(job, timeout: float = 5):
+    while not job.done:
+        assert job.events_after(len(job.events), timeout=timeout), "job made no progress"
+    return job
+
+
+def test_submit_runs_job_and_records_result(manager):
+    job = wait_done(manager.submit(lambda a, b: a + b, 2, b=3))
+
+    assert manager.get(job.id) is job
+    assert job.to_dict() == {
+        "job_id": job.id,
+        "status": "succeeded",
+        "events": job.events,
+        "result": 5,
+        "error": None,
+    }
+    assert [event["event"] for event in job.events] == ["started", "done"]
+    assert job.events[-1]["data"] == {"status": "succeeded"}
+
+
+def test_progress_reports_become_replayable_events(manager):
+    def work():
+        progress.report("ranking_ready", text="AAPL, MSFT")
+        progress.report("step_completed", step="rank_stocks")
+        return "ok"
+
+    job = wait_done(manager.submit(work))
+
+    assert [event["seq"] for event in job.events] == list(range(len(job.events)))
+    assert [event["event"] for event in job.events] == ["started", "ranking_ready", "step_completed", "done"]
+    assert job.events[1]["data"] == {"text": "AAPL, MSFT"}
+    # A client reconnecting after seq 2 only gets what it missed
+    assert [event["event"] for event in job.events_after(2)] == ["step_completed", "done"]
+    assert job.to_dict(after=3)["events"] == job.events[3:]
+
+
+def test_failed_job_records_error(manager):
+    def work():
+        raise RuntimeError("vendor down")
+
+    job = wait_done(manager.submit(work))
+
+    assert job.status == "failed"
+    assert job.result is None
+    assert job.error == "vendor down"
+    assert job.events[-1]["event"] == "done"
+    assert job.events[-1]["data"] == {"status": "failed"}
+
+
+def test_jobs_beyond_the_workers_queue_until_max_pending(manager):
+    release = threading.Event()
+    running = manager.submit(release.wait, 5)
+    running.events_after(0, timeout=5)
+
+    queued = [manager.submit(lambda: "queued") for _ in range(2)]
+    assert running.status == "running"
+    assert manager.pending() == 2
+    assert all(job.status == "queued" for job in queued)
+    with pytest.raises(JobQueueFull):
+        manager.submit(lambda: "one too many")
+
+    release.set()
+    assert [wait_done(job).result for job in queued] == ["queued", "queued"]
+    assert manager.pending() == 0
+
+
+def test_waiting_job_holds_a_worker_from_jobs_queued_behind_it(manager):
+    # Workers are shared by every caller: a job blocked on something a queued job would provide stalls both
+    provided = threading.Event()
+    waiter = manager.submit(provided.wait, 0.2)
+    provider = manager.submit(provided.set)
+
+    assert wait_done(waiter).result is False
+    wait_done(provider)
+    assert waiter.finished_at <= provider.events[0]["at"]
+
+
+def test_shutdown_waits_for_queued_jobs():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    jobs = [manager.submit(release.wait, 5), manager.submit(lambda: "drained")]
+
+    threading.Timer(0.1, release.set).start()
+    manager.shutdown(wait=True)
+
+    assert [job.status for job in jobs] == ["succeeded", "succeeded"]
+    assert jobs[1].result == "drained"
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    manager = JobManager(max_workers=1, retention_seconds=0)
+    try:
+        old = wait_done(manager.submit(lambda: None))
+        old.finished_at -= 1
+        manager.submit(lambda: None)
+        assert manager.get(old.id) is None
+    finally:
+        manager.shutdown(wait=True)
@@ -0,0 +1,30 @@
+from markets import DEFAULT_SLICES, merge_snapshots, parse_slices, slices_for_query
+
+SLICES = parse_slices("2124:indexes/americas,2840:most-active,2840:gainers,2840:cryptocurrencies")
+
+
+def labels(slices):
+    return [s.label for s in slices]
+
+
+def test_default_is_a_single_slice():
+    assert len(parse_slices(DEFAULT_SLICES)) == 1
+
+
+def test_query_narrows_to_named_slices():
+    assert labels(slices_for_query("Show me the top market movers", SLICES)) == ["2840:gainers"]
+    assert labels(slices_for_query("Is bitcoin a buy?", SLICES)) == ["2840:cryptocurrencies"]
+
+
+def test_query_naming_nothing_fetches_every_slice():
+    assert slices_for_query("What stocks should I buy today?", SLICES) == SLICES
+
+
+def test_merge_keeps_first_listing_of_a_ticker():
+    results = {
+        "a": {"timestamp": "1", "trending_stocks": [{"symbol": "AAPL", "price": None}]},
+        "b": {"timestamp": "2", "trending_stocks": [{"symbol": "AAPL", "price": 10}, {"symbol": "MSFT"}]},
+    }
+    merged = merge_snapshots(results, {}, ["a", "b"])
+    assert merged["trending_stocks"] == [{"symbol": "AAPL", "price": 10}, {"symbol": "MSFT"}]
+    assert merged["timestamp"] == "2"
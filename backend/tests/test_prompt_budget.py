@@ -0,0 +1,81 @@
+import prompt_budget
+from prompt_budget import budget_for, budget_input, encode_quotes, estimate_tokens, fit_to_budget
+
+
+def snapshot(rows, timestamp="2026-01-02 10:00"):
+    return {"status": "success", "timestamp": timestamp, "trending_stocks": rows}
+
+
+def test_estimate_tokens_rounds_up_characters():
+    assert [estimate_tokens(text) for text in ("", "abcd", "abcde")] == [0, 1, 2]
+    assert estimate_tokens(12345) == 2
+
+
+def test_encode_quotes_is_a_compact_table_strongest_first():
+    table = encode_quotes(snapshot([
+        {"symbol": "MSFT", "name": "Microsoft", "price": 410.123, "percentage_change": 1.26},
+        {"symbol": "AAPL", "name": "Apple | Inc\nCommon", "price": "189.5", "percentage_change": 3},
+        {"symbol": "AAPL", "name": "Apple", "price": 189.0, "percentage_change": 1},
+        {"symbol": "TSLA", "name": "Tesla", "percentage_change": 2, "trend": "down"},
+        {"symbol": "NOPE"},
+    ]))
+    assert table.splitlines() == [
+        "quotes: 3 of 3 at 2026-01-02 10:00",
+        "symbol|name|price|chg%",
+        "AAPL|Apple / Inc Common|189.50|+3.0",
+        "MSFT|Microsoft|410.12|+1.3",
+        "TSLA|Tesla||-2.0",
+    ]
+
+
+def test_encode_quotes_drops_weakest_rows_to_fit_budget():
+    rows = [{"symbol": f"S{i:02}", "percentage_change": i} for i in range(40)]
+    before = prompt_budget.prompt_truncations.value("rank")
+    table = encode_quotes(snapshot(rows, timestamp=None), max_tokens=60, step="rank")
+
+    lines = table.splitlines()
+    assert estimate_tokens(table) <= 60
+    assert lines[0] == f"quotes: {len(lines) - 2} of 40"
+    assert lines[2].startswith("S39|")
+    assert [line.split("|")[0] for line in lines[2:]] == [f"S{i:02}" for i in range(39, 39 - len(lines) + 2, -1)]
+    assert prompt_budget.prompt_truncations.value("rank") == before + 1
+
+
+def test_encode_quotes_of_a_failed_snapshot_is_an_empty_table():
+    assert encode_quotes({"status": "error", "message": "down"}) == "quotes: 0 of 0\nsymbol|name|price|chg%"
+    assert encode_quotes(None) == "quotes: 0 of 0\nsymbol|name|price|chg%"
+
+
+def test_fit_to_budget_keeps_whole_leading_lines():
+    text = "\n".join(f"line {i:03} " + "x" * 30 for i in range(50))
+    assert fit_to_budget(text, 0) == text
+    assert fit_to_budget("short", 100) == "short"
+
+    fitted = fit_to_budget(text, 100)
+    kept = fitted.splitlines()[:-1]
+    assert estimate_tokens(fitted) <= 100
+    assert kept == text.splitlines()[:len(kept)]
+    assert fitted.splitlines()[-1] == f"... ({50 - len(kept)} more lines omitted)"
+
+
+def test_fit_to_budget_cuts_a_single_oversized_line():
+    fitted = fit_to_budget("y" * 1000, 20)
+    assert fitted == "y" * 48 + "\n... (0 more lines omitted)"
+
+
+def test_step_budget_overrides_default(monkeypatch):
+    monkeypatch.delenv("LLM_TOKEN_BUDGET", raising=False)
+    monkeypatch.delenv("LLM_TOKEN_BUDGET_SUMMARY_AGENT", raising=False)
+    assert budget_for("summary_agent") == prompt_budget.DEFAULT_TOKEN_BUDGET
+    monkeypatch.setenv("LLM_TOKEN_BUDGET", "500")
+    assert budget_for("summary_agent") == 500
+    monkeypatch.setenv("LLM_TOKEN_BUDGET_SUMMARY_AGENT", "0")
+    assert budget_for("summary_agent") == 0
+
+
+def test_budget_input_trims_to_the_step_budget(monkeypatch):
+    monkeypatch.setenv("LLM_TOKEN_BUDGET_TTS_AGENT", "10")
+    sent = budget_input("tts_agent", "\n".join(["word " * 4] * 10))
+    assert estimate_tokens(sent) <= 10
+    assert sent.endswith("more lines omitted)")
+    assert budget_input("tts_agent", ["AAPL"]) == "['AAPL']"
@@ -0,0 +1,25 @@
+from quote_history import QuoteHistory
+
+
+def snapshot(*rows):
+    return {"trending_stocks": [
+        {"symbol": symbol, "price": price, "percentage_change": change, "trend": "up"}
+        for symbol, price, change in rows
+    ]}
+
+
+def test_ticker_listed_twice_is_recorded_once(tmp_path):
+    history = QuoteHistory(str(tmp_path / "quotes.bin"))
+    written = history.append_snapshot(snapshot(("AAPL", 100, 1.0), ("MSFT", 50, 2.0), ("AAPL", 100, 1.0)), timestamp=10)
+    assert written == 2
+    assert sorted(history.records()["ticker"].tolist()) == [b"AAPL", b"MSFT"]
+
+
+def test_momentum_over_snapshots(tmp_path):
+    history = QuoteHistory(str(tmp_path / "quotes.bin"))
+    for ts, price in enumerate([100, 105, 110]):
+        history.append_snapshot(snapshot(("AAPL", price, 1.0)), timestamp=ts)
+    trend = history.momentum(["AAPL"])["AAPL"]
+    assert trend.samples == 3
+    assert round(trend.return_percent, 6) == 10.0
+    assert trend.streak == 3
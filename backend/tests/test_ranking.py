@@ -0,0 +1,65 @@
+from ranking import QuoteTable, change_percent_for, format_top_picks, rank_snapshot
+
+
+def row(symbol, pct, volume=0, market_cap=0, **extra):
+    return {"symbol": symbol, "name": symbol.title(), "price": 10, "percentage_change": pct,
+            "volume": volume, "market_cap": market_cap, **extra}
+
+
+def symbols(picks):
+    return [quote.symbol for quote in picks]
+
+
+def test_top_movers_orders_positive_moves_descending():
+    table = QuoteTable.from_rows([row("AAA", 1.5), row("BBB", -4), row("CCC", 3), row("DDD", 0), row("EEE", 2)])
+    assert symbols(table.top_movers(limit=3)) == ["CCC", "EEE", "AAA"]
+
+
+def test_ties_go_to_volume_then_market_cap_then_symbol():
+    table = QuoteTable.from_rows([
+        row("ZZZ", 2, volume=10, market_cap=5),
+        row("YYY", 2, volume=10, market_cap=9),
+        row("BBB", 2, volume=20),
+        row("AAA", 2, volume=10, market_cap=5),
+    ])
+    assert symbols(table.top_movers(limit=4)) == ["BBB", "YYY", "AAA", "ZZZ"]
+
+
+def test_duplicate_symbol_is_ranked_by_its_best_row():
+    table = QuoteTable.from_rows([row("AAPL", 0.5), row("MSFT", 2), row("AAPL", 5), row("AAPL", -1)])
+    picks = table.top_movers(limit=3)
+    assert symbols(picks) == ["AAPL", "MSFT"]
+    assert picks[0].change_percent == 5
+
+
+def test_duplicates_do_not_take_up_the_limit():
+    table = QuoteTable.from_rows([row("AAPL", 5), row("AAPL", 4), row("MSFT", 3), row("NVDA", 2)])
+    assert symbols(table.top_movers(limit=2)) == ["AAPL", "MSFT"]
+
+
+def test_boost_reorders_and_zero_limit_picks_nothing():
+    table = QuoteTable.from_rows([row("AAA", 3), row("BBB", 2)])
+    assert symbols(table.top_movers(limit=2, boost={"BBB": 1.5})) == ["BBB", "AAA"]
+    assert table.top_movers(limit=0) == []
+
+
+def test_rows_are_coerced_and_unusable_rows_dropped():
+    snapshot = {"trending_stocks": [
+        {"ticker": "AAA", "price": "1,000.5", "change_percent": "2.5%"},
+        {"symbol": "BBB", "price": 11, "previous_close": 10},
+        {"symbol": "CCC", "percentage_change": 4, "trend": "down"},
+        {"symbol": "DDD"},
+        {"percentage_change": 9},
+        "not a row",
+    ]}
+    picks = rank_snapshot(snapshot, limit=5)
+    assert symbols(picks) == ["BBB", "AAA"]
+    assert round(picks[0].change_percent, 6) == 10
+    assert picks[1].price == 1000.5
+    assert change_percent_for({"percentage_change": 4, "trend": "down"}) == -4
+
+
+def test_format_top_picks():
+    picks = rank_snapshot({"trending_stocks": [row("AAPL", 1.5)]})
+    assert format_top_picks(picks) == "I have found 1 stocks with the most potential:\n    1 - Aapl (AAPL) +1.5%"
+    assert format_top_picks([]) == "I have found 0 stocks with positive performance right now."
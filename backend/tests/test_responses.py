@@ -0,0 +1,99 @@
+import pytest
+
+import responses
+import server
+from responses import approval_for, error_response, finance_response, generic_response
+
+ENVELOPE_KEYS = {"ok", "is_finance", "response", "picks", "summary", "approval", "audio_url", "timings"}
+
+
+def call(digit, call_status="completed"):
+    return {"message_sent": "clip.mp3", "digit_pressed": digit, "call_status": call_status}
+
+
+@pytest.mark.parametrize("result, status", [
+    (call("1"), "approved"),
+    (call("2"), "declined"),
+    (call("21"), "approved"),  # a batched call approves when any recommendation got a 1
+    (call(""), "declined"),
+    (call("timeout"), "no_answer"),
+    (call("error: [Errno 11] Resource temporarily unavailable"), "failed"),
+    (call("error: HTTP 401"), "failed"),
+    (call("1", call_status="failed"), "failed"),
+    (call(None), "declined"),
+])
+def test_approval_status(result, status):
+    assert approval_for(result, "msg") == {"status": status, "digit": result["digit_pressed"] or "", "message": "msg"}
+
+
+def test_no_call_result_means_no_approval():
+    assert approval_for(None, "msg") is None
+    assert approval_for("User pressed: 1", "msg") is None
+
+
+def test_finance_response_from_workflow_content_and_run_state():
+    run_state = {
+        "ranking": {"text": "ranked", "picks": [
+            {"symbol": "AAPL", "name": "Apple", "price": 189.5, "change_percent": 3.14159},
+            {"symbol": "MSFT", "name": "Microsoft", "price": None, "change_percent": None},
+        ]},
+        "call_result": call("1"),
+        "timings": {"rank_stocks": 12.5},
+    }
+    content = {"summary_result": "Apple leads.", "final_response": "Approved.", "audio_path": "/x/y/clip.mp3"}
+
+    envelope = finance_response(content, run_state, 1.23456)
+
+    assert set(envelope) == ENVELOPE_KEYS
+    assert envelope["ok"] and envelope["is_finance"]
+    assert envelope["response"] == "**Summary:**\nApple leads.\n\n**Recommendation:**\nApproved."
+    assert envelope["picks"] == [
+        {"rank": 1, "symbol": "AAPL", "name": "Apple", "price": 189.5, "change_percent": 3.14},
+        {"rank": 2, "symbol": "MSFT", "name": "Microsoft", "price": None, "change_percent": 0.0},
+    ]
+    assert envelope["summary"] == "Apple leads."
+    assert envelope["approval"] == {"status": "approved", "digit": "1", "message": "Approved."}
+    assert envelope["audio_url"] == "/audio/clip.mp3"
+    assert envelope["timings"] == {"total_ms": 1234.6, "steps": {"rank_stocks": 12.5}}
+
+
+def test_finance_response_falls_back_to_text_and_ranking():
+    assert finance_response("plain result", {}, 0)["response"] == "plain result"
+
+    envelope = finance_response(None, {"ranking": {"text": "ranked"}, "summary": "From run"}, 0)
+    assert envelope["response"] == "From run"
+    assert envelope["approval"] is None
+    assert envelope["audio_url"] is None
+    assert finance_response(None, {"ranking": {"text": "ranked"}}, 0)["response"] == "ranked"
+
+
+@pytest.mark.parametrize("audio_path, url", [
+    ("audio_generations/clip-1.mp3", "/audio/clip-1.mp3"),
+    ("", None),
+    (None, None),
+    ("../", None),
+    ("/tmp/.hidden", None),
+])
+def test_audio_url_only_for_plain_clip_names(audio_path, url):
+    assert responses.audio_url_for(audio_path) == url
+
+
+def test_generic_and_error_envelopes():
+    generic = generic_response("Hi there", cached=True, total_seconds=0.01)
+    assert set(generic) == ENVELOPE_KEYS | {"cached"}
+    assert (generic["ok"], generic["is_finance"], generic["response"], generic["cached"]) == (True, False, "Hi there", True)
+    assert generic["timings"] == {"total_ms": 10.0, "steps": {}}
+
+    error = error_response("Workflow timed out", is_finance=True, total_seconds=2)
+    assert set(error) == ENVELOPE_KEYS | {"error"}
+    assert (error["ok"], error["is_finance"], error["response"], error["error"]) == (False, True, "Workflow timed out", "Workflow timed out")
+    assert error["picks"] == [] and error["approval"] is None
+    assert error["timings"]["total_ms"] == 2000.0
+
+
+def test_app_encodes_envelopes_with_orjson():
+    provider = server.app.json
+    assert isinstance(provider, responses.OrjsonProvider)
+    envelope = finance_response({"final_response": "ok"}, {"timings": {"rank_stocks": 1.5}}, 0)
+    assert provider.loads(provider.dumps(envelope)) == envelope
+    assert provider.loads(provider.dumps({1: "x"})) == {"1": "x"}
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import run_context
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, monkeypatch, tmp_path):
+    if request.param == "sqlite":
+        backend = run_context.SqliteBackend(str(tmp_path / "runs.db"))
+    else:
+        backend = run_context.MemoryBackend()
+    monkeypatch.setattr(run_context, "backend", backend)
+    return backend
+
+
+def test_concurrent_runs_only_see_their_own_state(backend):
+    both_written = threading.Barrier(2, timeout=5)
+    seen = {}
+    errors = []
+
+    def run(name):
+        try:
+            with run_context.bind() as run_id:
+                run_context.put("ranking", {"by": name})
+                run_context.put("timings", {name: 1.0})
+                # Both runs have written before either reads
+                both_written.wait()
+                seen[name] = (run_id, run_context.get("ranking"), run_context.snapshot())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert not errors
+    assert seen["first"][0] != seen["second"][0]
+    for name in ("first", "second"):
+        run_id, ranking, snapshot = seen[name]
+        assert ranking == {"by": name}
+        assert snapshot == {"ranking": {"by": name}, "timings": {name: 1.0}}
+        assert backend.snapshot(run_id) == {}
+
+
+def test_bind_nests_and_restores_the_outer_run(backend):
+    with run_context.bind("outer", release=False):
+        run_context.put("summary", "outer summary")
+        with run_context.bind("inner"):
+            assert run_context.get("summary") is None
+            run_context.put("summary", "inner summary")
+        assert run_context.current_run_id() == "outer"
+        assert run_context.get("summary") == "outer summary"
+    assert backend.get("outer", "summary") == "outer summary"
+    assert backend.get("inner", "summary") is None
+
+
+def test_without_a_bound_run_nothing_is_recorded(backend):
+    assert run_context.current_run_id() is None
+    run_context.put("summary", "dropped")
+    assert run_context.get("summary", "default") == "default"
+    assert run_context.snapshot() == {}
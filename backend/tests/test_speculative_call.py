@@ -0,0 +1,87 @@
+import html
+import re
+import threading
+from urllib.parse import urlsplit
+
+import pytest
+
+import call_waiters
+import server
+
+
+class StubTwilio:
+    """client.calls.create(...) and client.calls(sid).update(status=...)"""
+
+    def __init__(self, fail_update: bool = False):
+        self.fail_update = fail_update
+        self.updates = []
+        self.calls = self
+
+    def create(self, to, from_, url):
+        return type("Call", (), {"sid": "CA123"})()
+
+    def __call__(self, sid):
+        stub = self
+
+        class Context:
+            def update(self, status):
+                if stub.fail_update:
+                    raise RuntimeError("twilio down")
+                stub.updates.append((sid, status))
+        return Context()
+
+
+@pytest.fixture(autouse=True)
+def local_waiters(monkeypatch):
+    monkeypatch.setattr(call_waiters, "CALL_WAIT_MODE", "local")
+
+
+def test_cancel_hangs_up_and_clears_message(monkeypatch):
+    twilio = StubTwilio()
+    monkeypatch.setattr(server, "client", twilio)
+    request_id = server.start_call("+15550000002")
+    server.cancel_call(request_id)
+    assert twilio.updates == [("CA123", "completed")]
+    assert call_waiters.message_for(request_id) is None
+    assert call_waiters.waiter_for(request_id) is None
+
+
+def test_failed_hangup_leaves_goodbye_for_voice(monkeypatch):
+    monkeypatch.setattr(server, "client", StubTwilio(fail_update=True))
+    request_id = server.start_call("+15550000002")
+    server.cancel_call(request_id)
+    assert call_waiters.message_for(request_id) == {"messages": [], "cancelled": True}
+    call_waiters.clear_message(request_id)
+
+
+def test_timeout_clears_message(monkeypatch):
+    monkeypatch.setattr(server, "client", StubTwilio())
+    request_id = server.start_call("+15550000002")
+    server.attach_message(request_id, "/audio/clip.mp3")
+    assert server.wait_for_result(request_id, timeout_sec=0) == "timeout"
+    assert call_waiters.message_for(request_id) is None
+
+
+def test_held_call_plays_attached_message_and_returns_digit(monkeypatch):
+    monkeypatch.setattr(server, "client", StubTwilio())
+    web = server.app.test_client()
+    request_id = server.start_call("+15550000002")
+
+    # Answered before the message exists: /voice holds and redirects back to itself
+    held = web.post(f"/voice?request_id={request_id}").get_data(as_text=True)
+    assert "<Redirect" in held and "<Gather" not in held
+
+    server.attach_message(request_id, "Approve the picks?")
+    result = {}
+    waiting = threading.Thread(target=lambda: result.update(digit=server.wait_for_result(request_id, timeout_sec=5)))
+    waiting.start()
+
+    redirect = html.unescape(re.search(r"<Redirect[^>]*>(.*?)</Redirect>", held).group(1))
+    twiml = web.post(urlsplit(redirect).path + "?" + urlsplit(redirect).query).get_data(as_text=True)
+    assert "Approve the picks?" in twiml
+    action = urlsplit(html.unescape(re.search(r'<Gather[^>]*action="([^"]+)"', twiml).group(1)))
+    web.post(f"{action.path}?{action.query}", data={"Digits": "1"})
+
+    waiting.join(5)
+    assert result["digit"] == "1"
+    assert call_waiters.message_for(request_id) is None
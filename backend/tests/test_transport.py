@@ -0,0 +1,113 @@
+import gc
+import io
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+import transport
+
+
+class FakeSession:
+    """Plays back a list of responses or exceptions, one per request"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def response(status, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.raw = io.BytesIO(b"")
+    resp.headers.update(headers or {})
+    return resp
+
+
+@pytest.fixture
+def session(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(transport.time, "sleep", sleeps.append)
+
+    def install(outcomes):
+        fake = FakeSession(outcomes)
+        fake.sleeps = sleeps
+        monkeypatch.setattr(transport, "session_for", lambda vendor: fake)
+        return fake
+    return install
+
+
+def test_read_timeout_is_not_retried(session):
+    fake = session([requests.ReadTimeout(), response(200)])
+    with pytest.raises(requests.ReadTimeout):
+        transport.request("dataforseo", "POST", "https://api.example.com/v3/task")
+    assert fake.calls == 1
+
+
+def connection_refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, "/v3/task", reason))
+
+
+def connection_aborted():
+    return requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError(104, "reset")))
+
+
+def test_connect_errors_are_retried(session):
+    fake = session([requests.ConnectTimeout(), connection_refused(), response(200)])
+    assert transport.request("dataforseo", "POST", "https://api.example.com/v3/task").status_code == 200
+    assert fake.calls == 3
+
+
+def test_dropped_connection_is_not_retried_for_post(session):
+    fake = session([connection_aborted(), response(200)])
+    with pytest.raises(requests.ConnectionError):
+        transport.request("dataforseo", "POST", "https://api.example.com/v3/task")
+    assert fake.calls == 1
+
+
+def test_dropped_connection_is_retried_for_idempotent_methods(session):
+    fake = session([connection_aborted(), response(200)])
+    assert transport.request("twilio", "get", "https://api.example.com/Calls/CA1.json").status_code == 200
+    assert fake.calls == 2
+
+
+def test_retry_after_is_honoured(session):
+    fake = session([response(429, {"Retry-After": "3"}), response(200)])
+    assert transport.request("dataforseo", "POST", "https://api.example.com/v3/task").status_code == 200
+    assert fake.sleeps == [3.0]
+
+
+def test_long_retry_after_is_returned(session):
+    fake = session([response(503, {"Retry-After": "120"}), response(200)])
+    assert transport.request("dataforseo", "POST", "https://api.example.com/v3/task").status_code == 503
+    assert fake.calls == 1
+
+
+def test_elevenlabs_connections_counted_once_and_forgotten_when_closed(monkeypatch):
+    monkeypatch.setattr(transport, "_counters", {})
+
+    class Stream:
+        pass
+
+    class Response:
+        def __init__(self, stream):
+            self.extensions = {"network_stream": stream}
+
+    stream = Stream()
+    for _ in range(3):
+        transport._count_elevenlabs_response(Response(stream))
+    transport._count_elevenlabs_response(Response(Stream()))
+
+    assert transport._counters["elevenlabs"]["requests"] == 4
+    assert transport._counters["elevenlabs"]["connections"] == 2
+    del stream
+    gc.collect()
+    assert len(transport._elevenlabs_streams) == 0
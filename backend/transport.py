@@ -0,0 +1,266 @@
+"""
+Shared outbound HTTP transport for DataForSEO, ElevenLabs and Twilio.
+
+Every vendor gets a keep-alive connection pool, connect/read timeouts, bounded
+retries with jittered backoff and a per-host concurrency limit. Only failures
+that can't have reached the vendor (refused connections, connect timeouts) and
+retryable statuses are retried, so a billed POST whose connection dropped or
+whose response timed out is not sent twice; idempotent methods also retry a
+dropped connection. 429/503 responses wait out their Retry-After. Settings can
+be overridden per vendor with TRANSPORT_<VENDOR>_<SETTING> environment
+variables, e.g. TRANSPORT_DATAFORSEO_READ_TIMEOUT=20.
+"""
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from config import env_float, env_int
+
+VENDOR_DEFAULTS = {
+    "dataforseo": {"connect_timeout": 3.05, "read_timeout": 30, "retries": 2, "backoff": 0.5,
+                   "max_concurrency": 8, "pool_size": 8},
+    "elevenlabs": {"connect_timeout": 3.05, "read_timeout": 60, "retries": 1, "backoff": 0.5,
+                   "max_concurrency": 4, "pool_size": 4},
+    "twilio": {"connect_timeout": 3.05, "read_timeout": 15, "retries": 2, "backoff": 0.5,
+               "max_concurrency": 8, "pool_size": 8},
+}
+
+# Status codes worth another attempt; everything else is returned to the caller
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses whose Retry-After header we wait for instead of our own backoff
+RETRY_AFTER_STATUSES = {429, 503}
+# Methods safe to resend after a connection dropped mid-request
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"}
+MAX_BACKOFF_SECONDS = 8.0
+# A Retry-After longer than this is handed back to the caller rather than slept through
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+
+def vendor_setting(vendor: str, name: str):
+    default = VENDOR_DEFAULTS.get(vendor, VENDOR_DEFAULTS["dataforseo"])[name]
+    key = f"TRANSPORT_{vendor.upper()}_{name.upper()}"
+    return env_int(key, default) if isinstance(default, int) else env_float(key, default)
+
+
+def backoff_delay(vendor: str, attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+    base = vendor_setting(vendor, "backoff")
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base * (2 ** attempt)))
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Seconds asked for by a Retry-After header (delay or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def never_sent(error: requests.ConnectionError) -> bool:
+    """Whether a connection error happened before the request could reach the vendor"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)
+    # Also covers NewConnectionError and NameResolutionError
+    return isinstance(reason, ConnectTimeoutError)
+
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_counters: Dict[str, Dict[str, int]] = {}
+_elevenlabs_client = None
+_elevenlabs_streams: "weakref.WeakSet" = weakref.WeakSet()  # open connections, dropped once closed
+_twilio_http_client = None
+
+
+def _count(vendor: str, name: str, amount: int = 1):
+    with _lock:
+        counters = _counters.setdefault(vendor, {"requests": 0, "retries": 0, "errors": 0, "connections": 0})
+        counters[name] += amount
+
+
+def _host_slot(vendor: str, host: str) -> threading.BoundedSemaphore:
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(vendor_setting(vendor, "max_concurrency"))
+        return slot
+
+
+@contextmanager
+def host_slot(vendor: str, host: str):
+    """Hold one of the host's concurrency slots for the duration of a call"""
+    slot = _host_slot(vendor, host)
+    slot.acquire()
+    try:
+        yield
+    finally:
+        slot.release()
+
+
+def session_for(vendor: str) -> requests.Session:
+    """Keep-alive session with a vendor-sized connection pool"""
+    with _lock:
+        session = _sessions.get(vendor)
+        if session is None:
+            pool_size = vendor_setting(vendor, "pool_size")
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[vendor] = session
+        return session
+
+
+def request(vendor: str, method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the vendor's pool with timeouts, retries and the host concurrency limit"""
+    kwargs.setdefault("timeout", (vendor_setting(vendor, "connect_timeout"), vendor_setting(vendor, "read_timeout")))
+    retries = vendor_setting(vendor, "retries")
+    session = session_for(vendor)
+    host = urlsplit(url).netloc
+
+    for attempt in range(retries + 1):
+        _count(vendor, "requests")
+        delay = backoff_delay(vendor, attempt)
+        try:
+            with host_slot(vendor, host):
+                response = session.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            if response.status_code in RETRY_AFTER_STATUSES:
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None:
+                    if retry_after > MAX_RETRY_AFTER_SECONDS:
+                        return response
+                    delay = retry_after
+            response.close()
+        except requests.ConnectionError as e:
+            # Includes ConnectTimeout; a read timeout is raised below instead
+            if attempt == retries or not (never_sent(e) or method.upper() in IDEMPOTENT_METHODS):
+                _count(vendor, "errors")
+                raise
+        except requests.Timeout:
+            _count(vendor, "errors")
+            raise
+        _count(vendor, "retries")
+        time.sleep(delay)
+
+
+def _count_elevenlabs_response(response):
+    """httpx response hook: a network stream we haven't seen means the pool opened a new connection"""
+    _count("elevenlabs", "requests")
+    stream = response.extensions.get("network_stream")
+    if stream is not None:
+        with _lock:
+            new_connection = stream not in _elevenlabs_streams
+            _elevenlabs_streams.add(stream)
+        if new_connection:
+            _count("elevenlabs", "connections")
+
+
+def elevenlabs_client():
+    """Process-wide ElevenLabs client reusing one pooled httpx client"""
+    global _elevenlabs_client
+    with _lock:
+        if _elevenlabs_client is not None:
+            return _elevenlabs_client
+
+    import httpx
+    from elevenlabs import ElevenLabs
+
+    vendor = "elevenlabs"
+    pool_size = vendor_setting(vendor, "pool_size")
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(vendor_setting(vendor, "read_timeout"), connect=vendor_setting(vendor, "connect_timeout")),
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        transport=httpx.HTTPTransport(retries=vendor_setting(vendor, "retries")),
+        event_hooks={"response": [_count_elevenlabs_response]},
+    )
+    client_options = {"api_key": os.getenv("ELEVENLABS_API_KEY"), "httpx_client": http_client}
+    if os.getenv("ELEVENLABS_BASE_URL"):
+        client_options["base_url"] = os.getenv("ELEVENLABS_BASE_URL")
+    client = ElevenLabs(**client_options)
+    with _lock:
+        if _elevenlabs_client is None:
+            _elevenlabs_client = client
+        return _elevenlabs_client
+
+
+def twilio_http_client():
+    """Pooled Twilio HTTP client with timeouts and retries"""
+    global _twilio_http_client
+    from twilio.http.http_client import TwilioHttpClient
+
+    vendor = "twilio"
+    with _lock:
+        if _twilio_http_client is None:
+            _twilio_http_client = TwilioHttpClient(
+                pool_connections=True,
+                timeout=vendor_setting(vendor, "read_timeout"),
+                max_retries=vendor_setting(vendor, "retries"),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=vendor_setting(vendor, "pool_size"),
+                max_retries=vendor_setting(vendor, "retries"),
+            )
+            _twilio_http_client.session.mount("https://", adapter)
+            _sessions[vendor] = _twilio_http_client.session
+        return _twilio_http_client
+
+
+def _session_pool_stats(session: Optional[requests.Session]) -> Dict[str, int]:
+    stats = {"connections": 0, "pooled_requests": 0}
+    if session is None:
+        return stats
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        manager = adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                stats["connections"] += pool.num_connections
+                stats["pooled_requests"] += pool.num_requests
+    return stats
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    """Per-vendor request, retry and connection counts plus the connection reuse rate"""
+    with _lock:
+        counters = {vendor: dict(values) for vendor, values in _counters.items()}
+        sessions = dict(_sessions)
+
+    stats = {}
+    for vendor in sorted(set(counters) | set(sessions)):
+        entry = counters.get(vendor, {"requests": 0, "retries": 0, "errors": 0, "connections": 0})
+        if vendor in sessions:
+            pooled = _session_pool_stats(sessions[vendor])
+            entry["connections"] = pooled["connections"]
+            entry["requests"] = max(entry["requests"], pooled["pooled_requests"])
+        requests_sent = entry["requests"]
+        entry["reuse_rate"] = round(1 - entry["connections"] / requests_sent, 4) if requests_sent else 0.0
+        stats[vendor] = entry
+    return stats
@@ -5,7 +5,8 @@ import LoadingDots from "@/components/LoadingDots";
 import ThemeToggle from "@/components/ThemeToggle";
 import { TrendingUp } from "lucide-react";
 import { useToast } from "@/hooks/use-toast";
-import { parseBackendResponse } from "@/utils/responseParser";
+import { parseBackendResponse, type ChatEnvelope } from "@/utils/responseParser";
+import { readEventStream } from "@/utils/eventStream";
 
 interface Message {
   id: string;
@@ -48,8 +49,23 @@ export default function ChatPage() {
     setMessages((prev) => [...prev, userMessage]);
     setIsLoading(true);
 
+    const aiMessageId = (Date.now() + 1).toString();
+    let aiContent = "";
+
+    // Create the assistant message on first content, then update it in place
+    const showAiContent = (text: string) => {
+      const isFirst = aiContent === "";
+      aiContent = text;
+      setIsLoading(false);
+      setMessages((prev) =>
+        isFirst
+          ? [...prev, { id: aiMessageId, role: "assistant", content: text, timestamp: getTimestamp() }]
+          : prev.map((message) => (message.id === aiMessageId ? { ...message, content: text } : message)),
+      );
+    };
+
     try {
-      const response = await fetch('http://localhost:8000/api/chat', {
+      const response = await fetch('http://localhost:8000/api/chat/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -57,23 +73,36 @@ export default function ChatPage() {
         body: JSON.stringify({ message: content }),
       });
 
+      if (response.status === 429) {
+        // Too many finance requests in flight: the body is a response envelope
+        const busy = await response.json();
+        showAiContent(busy.response);
+        return;
+      }
+
       if (!response.ok) {
         throw new Error(`API error: ${response.status}`);
       }
 
-      const data = await response.json();
-      
-      // Parse the backend response using our utility function
-      const aiContent = parseBackendResponse(data);
-      
-      const aiMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        role: "assistant",
-        content: aiContent,
-        timestamp: getTimestamp(),
-      };
-      
-      setMessages((prev) => [...prev, aiMessage]);
+      await readEventStream(response, ({ event, data }) => {
+        if (event === "token") {
+          // Generic answers arrive token by token
+          showAiContent(aiContent + data.text);
+        } else if (event === "progress") {
+          // Finance answers: show the picks and summary before the approval call ends
+          if (data.event === "ranking_ready" && data.text) {
+            showAiContent(`${data.text}\n\nPreparing a summary...`);
+          } else if (data.event === "summary_ready" && data.summary) {
+            showAiContent(`**Summary:**\n${data.summary}\n\nWaiting for the senior manager's approval...`);
+          }
+        } else if (event === "done" && data.is_finance) {
+          // The done event carries the response envelope
+          showAiContent(parseBackendResponse(data as ChatEnvelope));
+        } else if (event === "error") {
+          // The stream failed part-way: the data is an error envelope
+          showAiContent(data.response || data.error || "Sorry, something went wrong. Please try again.");
+        }
+      });
     } catch (error) {
       console.error('Error calling backend:', error);
       
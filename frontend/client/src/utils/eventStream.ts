@@ -0,0 +1,56 @@
+/**
+ * Minimal reader for server-sent events delivered over a fetch() response.
+ * (EventSource only supports GET, while the chat endpoint takes a POST body.)
+ */
+
+export interface StreamEvent {
+  event: string;
+  data: any;
+}
+
+/**
+ * Reads an SSE response body and calls onEvent for each complete event
+ */
+export async function readEventStream(
+  response: Response,
+  onEvent: (event: StreamEvent) => void,
+): Promise<void> {
+  if (!response.body) {
+    throw new Error("Response has no body to stream");
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      const dataLines: string[] = [];
+      for (const line of block.split("\n")) {
+        if (line.startsWith("event:")) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+          dataLines.push(line.slice(5).trimStart());
+        }
+      }
+      // Comment-only blocks (keep-alives) carry no data
+      if (dataLines.length === 0) continue;
+
+      try {
+        onEvent({ event, data: JSON.parse(dataLines.join("\n")) });
+      } catch (error) {
+        console.error("Failed to parse stream event:", error);
+      }
+    }
+  }
+}
@@ -1,100 +1,66 @@
 /**
- * Utility functions for parsing backend API responses
+ * Types and formatting for the backend's chat response envelope
+ * (see backend/responses.py). The backend always sends JSON, so the
+ * envelope is used as-is with no string rewriting.
  */
 
-export interface BackendResponse {
-  response: string | any;
-  ok?: boolean;
-  is_finance?: boolean;
+export interface StockPick {
+  rank: number;
+  symbol: string;
+  name: string;
+  price: number | null;
+  change_percent: number;
 }
 
-export interface ParsedResponseContent {
-  summary_result?: string;
-  final_response?: string;
+export interface ApprovalDecision {
+  status: "approved" | "declined" | "no_answer" | "failed";
+  digit: string;
+  message: string;
 }
 
-/**
- * Converts Python dictionary string format to JSON string format
- * Handles common Python-to-JSON conversions
- */
-export function pythonDictToJson(pythonStr: string): string {
-  return pythonStr
-    .replace(/'/g, '"')           // Replace single quotes with double quotes
-    .replace(/True/g, 'true')     // Replace Python True with JSON true
-    .replace(/False/g, 'false')   // Replace Python False with JSON false
-    .replace(/None/g, 'null');    // Replace Python None with JSON null
+export interface ChatEnvelope {
+  ok: boolean;
+  is_finance: boolean;
+  response: string;
+  picks: StockPick[];
+  summary: string | null;
+  approval: ApprovalDecision | null;
+  audio_url: string | null;
+  timings: { total_ms: number; steps: Record<string, number> };
+  cached?: boolean;
+  error?: string;
 }
 
 /**
- * Attempts to parse a Python dictionary string into a JavaScript object
+ * Renders ranked picks as a markdown list
  */
-export function parsePythonDict(pythonStr: string): ParsedResponseContent | null {
-  try {
-    const jsonStr = pythonDictToJson(pythonStr);
-    return JSON.parse(jsonStr);
-  } catch (error) {
-    console.error('Failed to parse Python dict:', error);
-    return null;
-  }
+export function formatPicks(picks: StockPick[]): string {
+  return picks
+    .map((pick) => {
+      const change = `${pick.change_percent >= 0 ? "+" : ""}${pick.change_percent.toFixed(1)}%`;
+      return `${pick.rank}. ${pick.name} (${pick.symbol}) ${change}`;
+    })
+    .join("\n");
 }
 
 /**
- * Formats the parsed content into a readable message
+ * Builds the chat message for a response envelope
  */
-export function formatResponseContent(content: ParsedResponseContent): string {
-  const { summary_result, final_response } = content;
-  
-  if (summary_result && final_response) {
-    return `**Summary:**\n${summary_result}\n\n**Recommendation:**\n${final_response}`;
-  } else if (final_response) {
-    return final_response;
-  } else if (summary_result) {
-    return summary_result;
+export function parseBackendResponse(data: ChatEnvelope): string {
+  if (!data.ok || !data.is_finance) {
+    return data.response || data.error || "";
   }
-  
-  return '';
-}
 
-/**
- * Main function to parse backend response and extract AI content
- */
-export function parseBackendResponse(data: BackendResponse): string {
-  // Check if we have the new response structure with 'ok' field
-  if (data.ok !== undefined && data.response) {
-    // Handle stringified Python dict in the response field
-    if (typeof data.response === 'string') {
-      const parsed = parsePythonDict(data.response);
-      
-      if (parsed) {
-        const formatted = formatResponseContent(parsed);
-        if (formatted) {
-          return formatted;
-        }
-      }
-      
-      // If parsing failed or no content found, return the raw response
-      return data.response;
-    } else if (typeof data.response === 'object') {
-      // If response is already an object, extract content directly
-      const formatted = formatResponseContent(data.response);
-      if (formatted) {
-        return formatted;
-      }
-      
-      return data.response.final_response || 
-             data.response.summary_result || 
-             JSON.stringify(data.response);
-    }
+  const sections: string[] = [];
+  if (data.picks.length > 0) {
+    sections.push(`**Top picks:**\n${formatPicks(data.picks)}`);
+  }
+  if (data.summary) {
+    sections.push(`**Summary:**\n${data.summary}`);
   }
-  
-  // Handle direct structured response (legacy format)
-  if (data.summary_result && data.final_response) {
-    return formatResponseContent(data as ParsedResponseContent);
+  if (data.approval) {
+    sections.push(`**Recommendation:**\n${data.approval.message}`);
   }
-  
-  // Fallback to original format handling
-  return data.response || 
-         (data as any).message || 
-         (data as any).data || 
-         JSON.stringify(data);
-}
\ No newline at end of file
+
+  return sections.length > 0 ? sections.join("\n\n") : data.response;
+}